@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Benchmark validated vs trusted Email construction from parsed messages.
+
+Usage:
+    python benchmarks/bench_email_model.py [--messages 500] [--recipients 300]
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.models import Email  # noqa: E402
+
+
+def make_parsed(index: int, recipients: int) -> dict:
+    """Build an EmailParser-style dict for a newsletter with many recipients."""
+    body = f"Weekly update {index}. " * 200
+    return {
+        "id": f"msg{index}",
+        "message_id": f"<msg{index}@example.com>",
+        "thread_id": f"thread{index}",
+        "in_reply_to": None,
+        "references": [],
+        "sender": "news@example.com",
+        "sender_name": "News",
+        "recipients": [f"member{i}@example.com" for i in range(recipients)],
+        "cc": [f"list{i}@lists.example.org" for i in range(recipients // 10)],
+        "bcc": [],
+        "subject": f"Weekly update {index}",
+        "body": body,
+        "html_body": "",
+        "text": body[:8000],
+        "body_size": len(body),
+        "html_size": 0,
+        "date": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        "labels": ["INBOX", "UNREAD"],
+        "attachments": [],
+        "is_read": False,
+        "is_starred": False,
+    }
+
+
+def _measure(label: str, build, corpus: list) -> float:
+    """Time one construction pass and report peak traced memory."""
+    start = time.perf_counter()
+    emails = [build(parsed) for parsed in corpus]
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    emails = [build(parsed) for parsed in corpus]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label:<32} {elapsed * 1000:9.1f} ms {peak / 1e6:9.1f} MB peak")
+    del emails
+    return elapsed
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500, help="Number of emails")
+    parser.add_argument("--recipients", type=int, default=300, help="Recipients per email")
+    args = parser.parse_args()
+
+    corpus = [make_parsed(i, args.recipients) for i in range(args.messages)]
+    print(f"Corpus: {args.messages} emails x {args.recipients} recipients\n")
+
+    validated = _measure("Email(**parsed)", lambda parsed: Email(**parsed), corpus)
+    trusted = _measure("Email.from_parsed(parsed)", Email.from_parsed, corpus)
+    print(f"\nSpeedup: {validated / trusted:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Benchmark EmailParser on a synthetic corpus of large newsletters.
+
+Usage:
+    python benchmarks/bench_email_parser.py [--messages 200] [--workers 4]
+"""
+
+import argparse
+import base64
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils import EmailParser  # noqa: E402
+from src.utils.email_parser import HTML_EXTRACTORS, resolve_html_extractor  # noqa: E402
+
+WORDS = (
+    "offer sale update product launch community weekly digest new feature release "
+    "event webinar discount member exclusive limited time free shipping newsletter"
+).split()
+
+
+def _b64(text: str) -> str:
+    """Encode text the way the Gmail API does."""
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii")
+
+
+def _paragraphs(rng: random.Random, count: int) -> list:
+    """Generate random paragraphs of newsletter-like text."""
+    return [" ".join(rng.choice(WORDS) for _ in range(60)) for _ in range(count)]
+
+
+def make_newsletter(index: int, rng: random.Random, html_kb: int = 200) -> dict:
+    """Build a Gmail API message resource for a large HTML newsletter.
+
+    The layout mirrors common newsletters: multipart/mixed containing a
+    multipart/alternative (plain + heavily styled HTML) and attachments.
+    """
+    paragraphs = _paragraphs(rng, 40)
+    plain = "\n\n".join(paragraphs)
+
+    style = "<style>" + "".join(f".c{i}{{color:#{i:06x};margin:{i}px}}" for i in range(300))
+    style += "</style>"
+    rows = []
+    while sum(map(len, rows)) < html_kb * 1024:
+        text = rng.choice(paragraphs)
+        rows.append(
+            f'<tr><td class="c{len(rows) % 300}" style="padding:8px;font-family:Arial">'
+            f'<a href="https://example.com/track/{index}/{len(rows)}">{text}</a></td></tr>'
+        )
+    html = f"<html><head>{style}</head><body><table>{''.join(rows)}</table></body></html>"
+
+    return {
+        "id": f"news{index}",
+        "threadId": f"thread{index}",
+        "labelIds": ["INBOX", "UNREAD", "CATEGORY_PROMOTIONS"],
+        "payload": {
+            "mimeType": "multipart/mixed",
+            "headers": [
+                {"name": "From", "value": "News <news@example.com>"},
+                {"name": "To", "value": "me@example.com"},
+                {"name": "Subject", "value": f"Weekly digest #{index}"},
+                {"name": "Date", "value": "Mon, 1 Jan 2024 12:00:00 +0000"},
+                {"name": "Message-ID", "value": f"<news{index}@example.com>"},
+            ],
+            "parts": [
+                {
+                    "mimeType": "multipart/alternative",
+                    "parts": [
+                        {"mimeType": "text/plain", "body": {"data": _b64(plain)}},
+                        {"mimeType": "text/html", "body": {"data": _b64(html)}},
+                    ],
+                },
+                {"mimeType": "image/png", "filename": "banner.png", "body": {"size": 40960}},
+                {"mimeType": "application/pdf", "filename": "catalog.pdf", "body": {"size": 1048576}},
+            ],
+        },
+    }
+
+
+def make_corpus(count: int, seed: int = 0) -> list:
+    """Build a deterministic corpus of newsletter messages."""
+    rng = random.Random(seed)
+    return [make_newsletter(i, rng) for i in range(count)]
+
+
+def _words(text: str) -> set:
+    """Get the set of alphabetic words in a text."""
+    return {word for word in text.lower().split() if word.isalpha()}
+
+
+def bench_html_extractors(corpus: list) -> None:
+    """Compare HTML-to-text extractors on the corpus' HTML parts."""
+    html_parts = [
+        base64.urlsafe_b64decode(m["payload"]["parts"][0]["parts"][1]["body"]["data"]).decode()
+        for m in corpus
+    ]
+    print(f"\nHTML-only bodies: {len(html_parts)} x {len(html_parts[0]) // 1024} KB")
+
+    baseline_words = None
+    baseline_time = None
+    for name in ("html2text",) + HTML_EXTRACTORS[1:3]:
+        if resolve_html_extractor(name) != name:
+            print(f"{name:<40} {'not installed':>12}")
+            continue
+
+        extractor = EmailParser(html_extractor=name)
+        outputs = []
+        elapsed = _time(
+            f"_html_to_text ({name})",
+            lambda: outputs.append([extractor._html_to_text(html) for html in html_parts]),
+        )
+        words = _words(outputs[-1][0])
+        if baseline_words is None:
+            baseline_words, baseline_time = words, elapsed
+            continue
+        overlap = len(words & baseline_words) / max(len(baseline_words), 1)
+        print(f"{'':<40} {baseline_time / elapsed:6.1f}x faster, {overlap:.0%} word overlap")
+
+
+def _time(label: str, func, repeat: int = 3) -> float:
+    """Run func repeatedly and print the best wall time."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<40} {best * 1000:9.1f} ms")
+    return best
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200, help="Corpus size")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Pool size")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.messages)
+    size_mb = sum(len(str(m)) for m in corpus) / 1e6
+    print(f"Corpus: {len(corpus)} newsletters, {size_mb:.1f} MB, {os.cpu_count()} CPUs\n")
+
+    email_parser = EmailParser()
+    serial = _time(
+        "parse_gmail_message (serial)",
+        lambda: [email_parser.parse_gmail_message(m) for m in corpus],
+    )
+
+    bench_html_extractors(corpus[:50])
+
+    lean_parser = EmailParser(keep_html=False)
+    _time(
+        "parse_gmail_message (keep_html=False)",
+        lambda: [lean_parser.parse_gmail_message(m) for m in corpus],
+    )
+
+    if hasattr(email_parser, "parse_many") and args.workers > 1:
+        with email_parser.create_pool(args.workers) as pool:
+            pooled = _time(
+                f"parse_many ({args.workers} processes)",
+                lambda: email_parser.parse_many(corpus, executor=pool, workers=args.workers),
+            )
+        print(f"\nProcess pool speedup: {serial / pooled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
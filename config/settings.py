@@ -2,7 +2,7 @@
 
 from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import List, Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -20,6 +20,18 @@ class Settings(BaseSettings):
 
     # Google Gemini API
     google_api_key: str = Field(..., description="Google Gemini API key")
+    gemini_max_concurrent_requests: int = Field(
+        default=8, ge=1, description="Maximum in-flight async Gemini requests"
+    )
+    gemini_batch_token_budget: int = Field(
+        default=8000, ge=1, description="Approximate prompt token budget per batch summary request"
+    )
+    gemini_max_emails_per_batch: int = Field(
+        default=20, ge=1, description="Maximum emails packed into one batch summary request"
+    )
+    gemini_max_output_tokens: int = Field(
+        default=8192, ge=1, description="Model output token limit a batch answer must fit in"
+    )
 
     # Gmail API
     gmail_client_id: str = Field(..., description="Gmail OAuth client ID")
@@ -44,6 +56,73 @@ class Settings(BaseSettings):
     chroma_persist_directory: str = Field(
         default="./data/chroma_db", description="ChromaDB persistence directory"
     )
+    email_archive_path: str = Field(
+        default="./data/email_archive.jsonl",
+        description="Archive of processed emails used by rebuild-index",
+    )
+    vector_retention_days: int = Field(
+        default=90,
+        ge=0,
+        description="Evict vectors and archived emails older than this many days (0 = keep)",
+    )
+    vector_max_count: int = Field(
+        default=50000, ge=0, description="Maximum stored vectors (0 = unlimited)"
+    )
+    retention_interval: int = Field(
+        default=3600, description="Seconds between background retention runs (0 = disabled)"
+    )
+    retention_batch_size: int = Field(
+        default=500, ge=1, description="Maximum vectors evicted per retention step"
+    )
+    thread_index_path: str = Field(
+        default="./data/thread_index.db", description="Message-ID and thread summary index path"
+    )
+    fingerprint_enabled: bool = Field(
+        default=True, description="Match exact and near-exact duplicates before vector search"
+    )
+    fingerprint_index_path: str = Field(
+        default="./data/fingerprints.db", description="Fingerprint index database path"
+    )
+    fingerprint_max_distance: int = Field(
+        default=6, ge=0, le=7, description="Maximum SimHash Hamming distance for a near match"
+    )
+    vector_distance_metric: Literal["cosine", "ip", "l2"] = Field(
+        default="cosine", description="HNSW distance metric for the embeddings collection"
+    )
+
+    # Summary Cache Configuration
+    summary_cache_enabled: bool = Field(
+        default=True, description="Cache Gemini results by email content hash"
+    )
+    summary_cache_path: str = Field(
+        default="./data/summary_cache.db", description="Summary cache SQLite file"
+    )
+    summary_cache_ttl: int = Field(
+        default=604800, description="Summary cache entry time-to-live in seconds"
+    )
+    summary_cache_max_entries: int = Field(
+        default=10000, description="Maximum number of summary cache entries"
+    )
+
+    # Embedding Configuration
+    embedding_model_name: str = Field(
+        default="all-MiniLM-L6-v2", description="SentenceTransformer embedding model"
+    )
+    embedding_backend: Literal["sentence-transformers", "onnx", "onnx-int8"] = Field(
+        default="sentence-transformers", description="Embedding inference backend"
+    )
+    embedding_threads: int = Field(
+        default=0, ge=0, description="CPU threads for embedding inference (0 = backend default)"
+    )
+    embedding_warmup: bool = Field(
+        default=True, description="Load the embedding model in the background at web startup"
+    )
+    embedding_batch_size: int = Field(
+        default=64, ge=1, description="Number of texts encoded per embedding model batch"
+    )
+    embedding_cache_size: int = Field(
+        default=1024, ge=0, description="In-memory LRU size for computed embeddings"
+    )
 
     # Email Processing Configuration
     email_check_interval: int = Field(
@@ -55,6 +134,58 @@ class Settings(BaseSettings):
     duplicate_similarity_threshold: float = Field(
         default=0.85, description="Similarity threshold for duplicate detection (0-1)"
     )
+    gmail_incremental_sync: bool = Field(
+        default=True, description="Fetch new mail via Gmail history instead of listing is:unread"
+    )
+    gmail_sync_state_path: str = Field(
+        default="./data/gmail_sync.json", description="Gmail history checkpoint file path"
+    )
+    gmail_metadata_first: bool = Field(
+        default=True, description="Fetch headers first and bodies only for mail that needs them"
+    )
+    gmail_triage_labels: str = Field(
+        default="CATEGORY_PROMOTIONS,CATEGORY_SOCIAL",
+        description="Comma-separated labels of mail triaged from headers without a body fetch",
+    )
+    email_max_part_bytes: int = Field(
+        default=1048576, ge=1024, description="Maximum decoded bytes kept per MIME part"
+    )
+    email_text_max_chars: int = Field(
+        default=8000, ge=500, description="Maximum length of the working text used for processing"
+    )
+    email_strip_quoted: bool = Field(
+        default=True, description="Drop quoted replies and signatures from the working text"
+    )
+    email_keep_html: bool = Field(
+        default=False, description="Keep decoded HTML bodies after converting them to text"
+    )
+    email_html_extractor: Literal["auto", "selectolax", "lxml", "html2text"] = Field(
+        default="auto",
+        description="HTML-to-text extractor; auto uses selectolax or lxml when installed",
+    )
+    email_html_text_budget: int = Field(
+        default=65536, ge=1024, description="Maximum characters of text extracted from HTML"
+    )
+    email_parse_workers: int = Field(
+        default=0, ge=0, description="Processes used to parse fetched batches (0 = in-process)"
+    )
+    gmail_push_mode: Literal["off", "pubsub", "file"] = Field(
+        default="off", description="Trigger processing from push notifications instead of polling"
+    )
+    gmail_pubsub_topic: str = Field(
+        default="", description="Pub/Sub topic registered with users.watch"
+    )
+    gmail_pubsub_subscription: str = Field(
+        default="", description="Pub/Sub subscription pulled for Gmail notifications"
+    )
+    gmail_push_file_path: str = Field(
+        default="./data/gmail_push.jsonl", description="Notification file tailed in file push mode"
+    )
+
+    # Processing Pipeline Concurrency
+    llm_stage_concurrency: int = Field(
+        default=8, ge=1, description="Concurrent Gemini calls per cycle"
+    )
 
     # Auto-Response Configuration
     auto_response_enabled: bool = Field(
@@ -77,6 +208,11 @@ class Settings(BaseSettings):
         """Get job keywords as a list."""
         return [kw.strip().lower() for kw in self.job_keywords.split(",")]
 
+    @property
+    def gmail_triage_labels_list(self) -> List[str]:
+        """Get triage labels as a list."""
+        return [label.strip() for label in self.gmail_triage_labels.split(",") if label.strip()]
+
     @property
     def base_path(self) -> Path:
         """Get base path of the project."""
@@ -3,6 +3,7 @@
 
 import asyncio
 import sys
+import time
 
 from config import get_settings
 from src.utils import setup_logging
@@ -19,8 +20,19 @@ def main():
     parser = argparse.ArgumentParser(description="Email Agent - AI-powered email management")
     parser.add_argument(
         "command",
-        choices=["web", "process", "stats"],
-        help="Command to run: web (start web UI), process (process emails once), stats (show statistics)",
+        choices=["web", "process", "stats", "rebuild-index"],
+        help=(
+            "Command to run: web (start web UI), process (process emails once), "
+            "stats (show statistics), rebuild-index (re-embed archived emails)"
+        ),
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=256, help="Emails per batch for rebuild-index"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Let rebuild-index replace the index even when the archive is empty",
     )
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
 
@@ -66,14 +78,60 @@ def main():
         # Show statistics
         from src.agents import EmailAgent
 
+        start = time.perf_counter()
         agent = EmailAgent(settings)
         stats = agent.get_statistics()
+        elapsed = time.perf_counter() - start
 
         print("\n📊 Email Agent Statistics:")
         print(f"   Vector store size: {stats['vector_store_size']} emails")
+        if stats["summary_cache"]:
+            cache = stats["summary_cache"]
+            print(
+                f"   Summary cache: {cache['entries']} entries, "
+                f"{cache['hits']} hits / {cache['misses']} misses"
+            )
+        if stats["fingerprint_index"]:
+            fingerprints = stats["fingerprint_index"]
+            print(
+                f"   Fingerprint index: {fingerprints['entries']} entries, "
+                f"{fingerprints['hit_rate']:.0%} hit rate "
+                f"({fingerprints['exact_hits']} exact / {fingerprints['near_hits']} near)"
+            )
+        threads = stats["thread_index"]
+        print(
+            f"   Thread index: {threads['messages']} messages in {threads['threads']} threads, "
+            f"{threads['known_hits']} known hits"
+        )
         print(f"   Auto-response: {'Enabled' if stats['settings']['auto_response_enabled'] else 'Disabled'}")
         print(f"   Duplicate threshold: {stats['settings']['duplicate_threshold']}")
         print(f"   Check interval: {stats['settings']['check_interval']}s")
+        print(f"   Startup time: {elapsed:.2f}s")
+
+    elif args.command == "rebuild-index":
+        # Re-embed archived emails into the vector store
+        from pathlib import Path
+
+        from src.services import EmailArchive, RAGService
+
+        print("🔄 Rebuilding vector index from archive...")
+        start = time.perf_counter()
+        rag_service = RAGService(settings)
+        archive = EmailArchive(Path(settings.email_archive_path))
+        compacted = archive.compact(cutoff=rag_service.retention_cutoff())
+        print(f"   Archive compacted: {compacted['dropped']} superseded or expired emails dropped")
+        if not compacted["kept"] and not args.force:
+            print(
+                f"❌ No archived emails in {archive.path}; keeping the current index "
+                "(use --force to replace it anyway)",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        indexed = rag_service.rebuild_index(
+            archive.iter_batches(args.batch_size), allow_empty=args.force
+        )
+
+        print(f"\n✅ Re-indexed {indexed} emails in {time.perf_counter() - start:.2f}s")
 
 
 if __name__ == "__main__":
@@ -91,8 +91,8 @@ class EmailAgent:
                         await self._handle_job_email(email)
                         job_responses_sent += 1
 
-                # Mark as read
-                self.gmail_service.mark_as_read(email.id)
+            # Mark all processed emails as read in one call
+            self.gmail_service.mark_as_read_batch([email.id for email in emails])
 
             # Send summaries to Slack
             if summaries:
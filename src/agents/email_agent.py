@@ -1,16 +1,28 @@
 """Main email agent implementation using Google ADK framework."""
 
 import asyncio
+import time
 from pathlib import Path
-from typing import List
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from config import Settings, get_settings
 from src.models import Email, EmailSummary
-from src.services import GeminiService, GmailService, RAGService, SlackService
+from src.services import (
+    EmailArchive,
+    GeminiService,
+    GmailService,
+    RAGService,
+    SlackService,
+    ThreadIndex,
+)
+from src.services.push_subscriber import PushSubscriber
 from src.utils import get_logger
 
 logger = get_logger(__name__)
 
+# Renew Gmail watches this long before they expire
+WATCH_RENEWAL_MARGIN = 3600
+
 
 class EmailAgent:
     """Main email agent orchestrator."""
@@ -29,70 +41,128 @@ class EmailAgent:
         self.gemini_service = GeminiService(self.settings)
         self.rag_service = RAGService(self.settings)
         self.slack_service = SlackService(self.settings)
+        self.archive = EmailArchive(Path(self.settings.email_archive_path))
+        self.thread_index = ThreadIndex(Path(self.settings.thread_index_path))
+
+        # Emails whose read-marking failed, retried on the next cycle
+        self._pending_read_ids: List[str] = []
+
+        # One cycle at a time; triggers that arrive meanwhile request a rerun
+        self._cycle_lock = asyncio.Lock()
+        self._cycle_requested = False
 
         logger.info("Email Agent initialized successfully")
 
     async def process_emails(self) -> dict:
         """Process new emails with all features.
 
+        Cycles never overlap, since they would fetch the same unread mail and
+        share the Gmail client across threads. A trigger that arrives while a
+        cycle runs returns at once and makes the running cycle go again when
+        it finishes, so mail that arrived in the meantime is not left waiting.
+
+        Returns:
+            Processing statistics
+        """
+        if self._cycle_lock.locked():
+            self._cycle_requested = True
+            logger.info("Processing cycle already running, coalescing trigger")
+            return {"status": "skipped", "message": "A processing cycle is already running"}
+
+        async with self._cycle_lock:
+            while True:
+                self._cycle_requested = False
+                stats = await self._run_cycle()
+                if not self._cycle_requested:
+                    return stats
+                logger.info("Running coalesced processing cycle")
+
+    async def _run_cycle(self) -> dict:
+        """Fetch and process one batch of new emails.
+
         Returns:
             Processing statistics
         """
         logger.info("Starting email processing cycle")
 
         try:
-            # Fetch unread emails
-            emails = self.gmail_service.fetch_emails(
-                max_results=self.settings.max_emails_per_check, query="is:unread"
-            )
+            # Fetch new unread emails
+            history_id = None
+            if self.settings.gmail_incremental_sync:
+                emails, history_id = await asyncio.to_thread(
+                    self.gmail_service.sync_emails,
+                    max_results=self.settings.max_emails_per_check,
+                )
+            else:
+                emails = await asyncio.to_thread(
+                    self.gmail_service.fetch_emails,
+                    max_results=self.settings.max_emails_per_check,
+                    query="is:unread",
+                )
 
             if not emails:
+                await self._commit_sync_state(history_id, [])
                 logger.info("No new emails to process")
                 return {"status": "success", "emails_processed": 0}
 
             logger.info(f"Processing {len(emails)} emails")
+            fetched = len(emails)
 
-            # Process emails concurrently
-            summaries = []
-            duplicates_found = []
-            job_responses_sent = 0
+            # Bulk mail triaged from headers skips the LLM and vector store
+            triaged = [email for email in emails if not email.body_loaded]
+            emails = [email for email in emails if email.body_loaded]
 
-            for email in emails:
-                # Add to RAG for duplicate detection
-                self.rag_service.add_email(email)
+            # Messages already processed under another ID reuse earlier results
+            known = await asyncio.to_thread(self.thread_index.find_known, emails)
 
-                # Check for duplicates
-                similar = self.rag_service.find_similar_emails(
-                    email, threshold=self.settings.duplicate_similarity_threshold
+            # Process emails concurrently, each stage bounded by its own limit
+            limits = self._create_stage_limits()
+            summaries_task = asyncio.create_task(self._summarize_batch(emails, limits, known))
+            # One batched vector store call per cycle
+            duplicates_task = asyncio.create_task(
+                asyncio.to_thread(self._find_duplicates, emails, known)
+            )
+            results = await asyncio.gather(
+                *(
+                    self._process_single_email(email, limits, summaries_task, duplicates_task)
+                    for email in emails
                 )
+            )
+            results.extend(
+                {
+                    "email_id": email.id,
+                    "similar": [],
+                    "summary": self.gemini_service.header_summary(email),
+                    "job_related": False,
+                }
+                for email in triaged
+            )
 
-                if similar:
-                    duplicates_found.append((email.id, len(similar)))
-                    logger.info(f"Found {len(similar)} similar emails for: {email.subject}")
-
-                # Summarize email
-                summary = self.gemini_service.summarize_email(email)
-                summaries.append(summary)
-
-                # Auto-respond to job emails
-                if self.settings.auto_response_enabled:
-                    if self.gemini_service.is_job_related(
-                        email, self.settings.job_keywords_list
-                    ):
-                        logger.info(f"Job-related email detected: {email.subject}")
-                        await self._handle_job_email(email)
-                        job_responses_sent += 1
+            # Every email has been handled; mark them all as read in one call
+            await self._flush_read_marks([result["email_id"] for result in results], limits)
 
-                # Mark as read
-                self.gmail_service.mark_as_read(email.id)
+            summaries = [result["summary"] for result in results]
+            duplicates_found = [
+                (result["email_id"], len(result["similar"]))
+                for result in results
+                if result["similar"]
+            ]
+            job_responses_sent = sum(1 for result in results if result["job_related"])
 
             # Send summaries to Slack
             if summaries:
-                self.slack_service.send_email_summaries(summaries)
+                await asyncio.to_thread(self.slack_service.send_email_summaries, summaries)
+
+            # Recorded last, so a failed cycle never leaves emails looking known
+            await asyncio.to_thread(self._record_processed, emails, known, await summaries_task)
+
+            # Only now is it safe to move the sync checkpoint past these emails
+            await self._commit_sync_state(history_id, [result["email_id"] for result in results])
 
             stats = {
                 "status": "success",
-                "emails_processed": len(emails),
+                "emails_processed": fetched,
+                "triaged": len(triaged),
                 "duplicates_found": len(duplicates_found),
                 "job_responses_sent": job_responses_sent,
                 "high_priority": len([s for s in summaries if s.priority.value == "high"]),
@@ -106,16 +176,354 @@ class EmailAgent:
             logger.error(f"Error in email processing: {e}", exc_info=True)
             return {"status": "error", "message": str(e)}
 
-    async def _handle_job_email(self, email: Email) -> None:
+    async def run_push_trigger(
+        self, subscriber: PushSubscriber, fallback_interval: Optional[float] = None
+    ) -> None:
+        """Process emails whenever a push notification arrives.
+
+        Notifications that arrive together trigger a single cycle. If none
+        arrives within ``fallback_interval`` seconds, a cycle runs anyway so
+        lost notifications never stall processing. When a Pub/Sub topic is
+        configured, the Gmail watch is registered and renewed before it
+        expires. Runs until cancelled.
+
+        Args:
+            subscriber: Source of change notifications
+            fallback_interval: Seconds without notifications before polling
+                (None disables the fallback poll)
+        """
+        renew_at = 0.0
+
+        while True:
+            try:
+                if self.settings.gmail_pubsub_topic and time.time() >= renew_at:
+                    response = await asyncio.to_thread(
+                        self.gmail_service.watch, self.settings.gmail_pubsub_topic
+                    )
+                    if response and response.get("expiration"):
+                        renew_at = int(response["expiration"]) / 1000 - WATCH_RENEWAL_MARGIN
+                    else:
+                        renew_at = time.time() + 60
+
+                notifications = await subscriber.receive(timeout=fallback_interval)
+                if notifications:
+                    logger.info(
+                        "Push notification received",
+                        count=len(notifications),
+                        history_id=notifications[-1].get("historyId"),
+                    )
+                else:
+                    logger.info("No push notification received, running fallback poll")
+
+                await self.process_emails()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in push trigger: {e}", exc_info=True)
+                await asyncio.sleep(1)
+
+    def _create_stage_limits(self) -> Dict[str, asyncio.Semaphore]:
+        """Create per-stage concurrency limits for a processing cycle.
+
+        Returns:
+            Dictionary of stage name to semaphore
+        """
+        return {
+            "llm": asyncio.Semaphore(self.settings.llm_stage_concurrency),
+            # The shared googleapiclient service (httplib2) is not thread-safe
+            "gmail": asyncio.Semaphore(1),
+        }
+
+    async def _run_stage(
+        self, limit: asyncio.Semaphore, func: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        """Run a blocking service call in a worker thread under a stage limit.
+
+        Args:
+            limit: Stage semaphore
+            func: Blocking callable
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Result of func
+        """
+        async with limit:
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def _run_async_stage(self, limit: asyncio.Semaphore, awaitable: Awaitable) -> Any:
+        """Await a native async service call under a stage limit.
+
+        Args:
+            limit: Stage semaphore
+            awaitable: Coroutine to await
+
+        Returns:
+            Result of the awaitable
+        """
+        async with limit:
+            return await awaitable
+
+    async def _summarize_batch(
+        self,
+        emails: List[Email],
+        limits: Dict[str, asyncio.Semaphore],
+        known: Optional[Dict[str, dict]] = None,
+    ) -> Dict[str, EmailSummary]:
+        """Summarize a cycle's emails using batched prompts.
+
+        Known messages reuse their stored summary; known messages without
+        one are summarized again. Replies to threads with a running summary,
+        and threads with several new messages, are summarized once per
+        thread from the new messages only. Everything else is packed into
+        batched prompts. Nothing is recorded in the thread index here.
+
+        Args:
+            emails: Emails to summarize
+            limits: Per-stage concurrency limits
+            known: Known messages from ThreadIndex.find_known (optional)
+
+        Returns:
+            Dictionary of email ID to summary
+        """
+        known = known or {}
+        summaries: Dict[str, EmailSummary] = {}
+
+        for email in emails:
+            record = known.get(email.id)
+            if record and record["summary"] is not None:
+                summaries[email.id] = self._summary_for(record["summary"], email)
+
+        pending = sorted(
+            (email for email in emails if email.id not in summaries),
+            key=lambda email: email.date,
+        )
+        threads = await asyncio.to_thread(self._group_threads, pending)
+
+        singles = [
+            thread_emails[0]
+            for thread_emails, previous in threads
+            if previous is None and len(thread_emails) == 1
+        ]
+        updates = [
+            (thread_emails, previous)
+            for thread_emails, previous in threads
+            if previous is not None or len(thread_emails) > 1
+        ]
+
+        batch_summaries, *thread_summaries = await asyncio.gather(
+            self._run_async_stage(
+                limits["llm"], self.gemini_service.batch_summarize_async(singles)
+            ),
+            *(
+                self._run_async_stage(
+                    limits["llm"],
+                    self.gemini_service.summarize_thread_async(thread_emails, previous),
+                )
+                for thread_emails, previous in updates
+            ),
+        )
+
+        summaries.update({summary.email_id: summary for summary in batch_summaries})
+        for (thread_emails, _), summary in zip(updates, thread_summaries):
+            for email in thread_emails:
+                summaries[email.id] = self._summary_for(summary, email)
+
+        return summaries
+
+    def _record_processed(
+        self,
+        emails: List[Email],
+        known: Dict[str, dict],
+        summaries: Dict[str, EmailSummary],
+    ) -> None:
+        """Record a finished cycle's newly summarized emails in the thread index.
+
+        Args:
+            emails: Emails processed this cycle
+            known: Known messages from ThreadIndex.find_known
+            summaries: Dictionary of email ID to summary
+        """
+        new_emails = sorted(
+            (email for email in emails if known.get(email.id, {}).get("summary") is None),
+            key=lambda email: email.date,
+        )
+        self.thread_index.record(new_emails, summaries)
+
+    def _group_threads(
+        self, emails: List[Email]
+    ) -> List[Tuple[List[Email], Optional[EmailSummary]]]:
+        """Group emails by thread and load each thread's running summary.
+
+        Args:
+            emails: Emails in chronological order
+
+        Returns:
+            List of (thread emails, running summary or None) tuples
+        """
+        threads: Dict[str, List[Email]] = {}
+        for email in emails:
+            threads.setdefault(self.thread_index.thread_key(email), []).append(email)
+
+        return [
+            (thread_emails, self.thread_index.get_thread_summary(thread_key))
+            for thread_key, thread_emails in threads.items()
+        ]
+
+    def _summary_for(self, summary: EmailSummary, email: Email) -> EmailSummary:
+        """Attribute a shared thread or message summary to an email.
+
+        Args:
+            summary: Summary to reuse
+            email: Email it is reported for
+
+        Returns:
+            Copy of the summary with the email's own identity fields
+        """
+        return summary.model_copy(
+            update={
+                "email_id": email.id,
+                "subject": email.subject,
+                "sender": email.sender,
+                "date": email.date,
+            }
+        )
+
+    async def _process_single_email(
+        self,
+        email: Email,
+        limits: Dict[str, asyncio.Semaphore],
+        summaries_task: "asyncio.Task[Dict[str, EmailSummary]]",
+        duplicates_task: "asyncio.Task[Dict[str, list]]",
+    ) -> dict:
+        """Run the processing pipeline for a single email.
+
+        The job check runs concurrently with the cycle's batched summarization
+        and duplicate detection. Marking as read is left to the end of the
+        cycle, after every summary exists and auto-responses are handled.
+
+        Args:
+            email: Email to process
+            limits: Per-stage concurrency limits
+            summaries_task: Task producing the cycle's summaries
+            duplicates_task: Task producing the cycle's similar emails
+
+        Returns:
+            Per-email processing result
+        """
+        job_related = False
+        if self.settings.auto_response_enabled:
+            job_related = await self._run_async_stage(
+                limits["llm"],
+                self.gemini_service.is_job_related_async(email, self.settings.job_keywords_list),
+            )
+
+        similar = (await duplicates_task).get(email.id, [])
+        summary = (await summaries_task)[email.id]
+
+        if similar:
+            logger.info(f"Found {len(similar)} similar emails for: {email.subject}")
+
+        # Auto-respond to job emails
+        if job_related:
+            logger.info(f"Job-related email detected: {email.subject}")
+            await self._handle_job_email(email, limits)
+
+        return {
+            "email_id": email.id,
+            "similar": similar,
+            "summary": summary,
+            "job_related": job_related,
+        }
+
+    async def _flush_read_marks(
+        self, email_ids: List[str], limits: Dict[str, asyncio.Semaphore]
+    ) -> None:
+        """Mark a cycle's emails as read with batchModify.
+
+        IDs that still fail after the per-email retry are kept and retried
+        with the next cycle's flush.
+
+        Args:
+            email_ids: IDs of the emails handled this cycle
+            limits: Per-stage concurrency limits
+        """
+        email_ids = self._pending_read_ids + email_ids
+        if not email_ids:
+            return
+
+        self._pending_read_ids = await self._run_stage(
+            limits["gmail"], self.gmail_service.mark_as_read_batch, email_ids
+        )
+        if self._pending_read_ids:
+            logger.warning(
+                f"Failed to mark {len(self._pending_read_ids)} emails as read, will retry"
+            )
+
+    async def _commit_sync_state(self, history_id: Optional[str], email_ids: List[str]) -> None:
+        """Advance the Gmail sync checkpoint past a finished cycle's emails.
+
+        Args:
+            history_id: History ID returned by sync_emails (None to skip)
+            email_ids: IDs of the emails handled this cycle
+        """
+        if history_id is None:
+            return
+
+        await asyncio.to_thread(self.gmail_service.commit_sync_state, history_id, email_ids)
+
+    def _find_duplicates(
+        self, emails: List[Email], known: Optional[Dict[str, dict]] = None
+    ) -> Dict[str, list]:
+        """Look up similar emails, then add the emails to the vector store.
+
+        Known messages skip the vector store entirely. A message delivered
+        under a new ID is a duplicate of the email it was first processed as;
+        a re-fetched email is already stored and reports no duplicates.
+
+        Args:
+            emails: Emails to check
+            known: Known messages from ThreadIndex.find_known (optional)
+
+        Returns:
+            Dictionary of email ID to list of (email_id, similarity_score) tuples
+        """
+        known = known or {}
+        similar = {
+            email_id: [(record["email_id"], 1.0)] if record["email_id"] != email_id else []
+            for email_id, record in known.items()
+        }
+
+        new_emails = [email for email in emails if email.id not in known]
+        if new_emails:
+            similar.update(
+                self.rag_service.find_similar_and_upsert(
+                    new_emails, threshold=self.settings.duplicate_similarity_threshold
+                )
+            )
+
+            # Keep a local copy so the index can be rebuilt without Gmail
+            self.archive.append(new_emails)
+
+        return similar
+
+    async def _handle_job_email(
+        self, email: Email, limits: Dict[str, asyncio.Semaphore] | None = None
+    ) -> None:
         """Handle job-related email with auto-response.
 
         Args:
             email: Job-related email
+            limits: Per-stage concurrency limits (optional)
         """
+        limits = limits or self._create_stage_limits()
+
         try:
             # Generate response
-            response_body = self.gemini_service.generate_auto_response(
-                email, include_resume=True
+            response_body = await self._run_async_stage(
+                limits["llm"],
+                self.gemini_service.generate_auto_response_async(email, include_resume=True),
             )
 
             # Get resume path
@@ -127,7 +535,9 @@ class EmailAgent:
 
             # Send response
             subject = f"Re: {email.subject}"
-            success = self.gmail_service.send_email(
+            success = await self._run_stage(
+                limits["gmail"],
+                self.gmail_service.send_email,
                 to=email.sender,
                 subject=subject,
                 body=response_body,
@@ -184,8 +594,15 @@ class EmailAgent:
         Returns:
             Statistics dictionary
         """
+        cache = self.gemini_service.cache
+        fingerprints = self.rag_service.fingerprints
+
         return {
             "vector_store_size": self.rag_service.get_email_count(),
+            "embedding_model_loaded": self.rag_service.model_loaded,
+            "summary_cache": cache.get_stats() if cache is not None else None,
+            "fingerprint_index": fingerprints.get_stats() if fingerprints is not None else None,
+            "thread_index": self.thread_index.get_stats(),
             "settings": {
                 "auto_response_enabled": self.settings.auto_response_enabled,
                 "duplicate_threshold": self.settings.duplicate_similarity_threshold,
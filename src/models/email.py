@@ -2,9 +2,40 @@
 
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import (
+    BaseModel,
+    EmailStr,
+    Field,
+    PrivateAttr,
+    TypeAdapter,
+    ValidationError,
+    model_validator,
+)
+
+from src.utils.email_parser import working_text
+
+_EMAIL_STR = TypeAdapter(EmailStr)
+
+
+@lru_cache(maxsize=4096)
+def _validate_address(address: str) -> Optional[str]:
+    """Validate an address the same way the model's EmailStr fields do.
+
+    Mailing-list traffic repeats the same recipients, so results are cached.
+
+    Args:
+        address: Email address
+
+    Returns:
+        Normalized address, or None if it is invalid
+    """
+    try:
+        return _EMAIL_STR.validate_python(address)
+    except ValidationError:
+        return None
 
 
 class EmailCategory(str, Enum):
@@ -36,6 +67,8 @@ class Email(BaseModel):
     id: str = Field(..., description="Unique email ID")
     message_id: str = Field(..., description="Email message ID")
     thread_id: Optional[str] = Field(None, description="Email thread ID")
+    in_reply_to: Optional[str] = Field(None, description="In-Reply-To message ID")
+    references: List[str] = Field(default_factory=list, description="References message IDs")
     sender: EmailStr = Field(..., description="Sender email address")
     sender_name: Optional[str] = Field(None, description="Sender name")
     recipients: List[EmailStr] = Field(default_factory=list, description="Recipients")
@@ -44,11 +77,107 @@ class Email(BaseModel):
     subject: str = Field(..., description="Email subject")
     body: str = Field(..., description="Email body content")
     html_body: Optional[str] = Field(None, description="HTML email body")
+    text: str = Field(default="", description="Cleaned, capped body text used for processing")
+    body_size: int = Field(default=0, description="Raw plain-text body size in bytes")
+    html_size: int = Field(default=0, description="Raw HTML body size in bytes")
     date: datetime = Field(..., description="Email date and time")
     labels: List[str] = Field(default_factory=list, description="Email labels")
     attachments: List[str] = Field(default_factory=list, description="Attachment names")
     is_read: bool = Field(default=False, description="Email read status")
     is_starred: bool = Field(default=False, description="Email starred status")
+    body_loaded: bool = Field(
+        default=True, description="Whether body, HTML body and attachments have been fetched"
+    )
+    quarantined_addresses: List[str] = Field(
+        default_factory=list, description="Malformed recipient addresses dropped at parse time"
+    )
+
+    _body_loader: Optional[Callable[[], Optional[Dict]]] = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def _fill_text(self) -> "Email":
+        """Derive the working text for emails not built by EmailParser."""
+        if not self.text and self.body:
+            self.text = working_text(self.body)
+            self.body_size = self.body_size or len(self.body.encode("utf-8"))
+        return self
+
+    @classmethod
+    def from_parsed(cls, data: Dict[str, Any]) -> "Email":
+        """Build an email from EmailParser output without full validation.
+
+        The parser already produces correctly typed fields, so only the
+        addresses are validated, with the same rules as ``EmailStr``.
+        Malformed recipient, CC and BCC addresses are moved to
+        ``quarantined_addresses`` instead of failing the whole email, so the
+        result always passes ``model_validate``.
+
+        Args:
+            data: Parsed email dictionary from EmailParser.parse_gmail_message
+
+        Returns:
+            Email instance
+
+        Raises:
+            ValueError: If the sender address is invalid
+        """
+        fields = dict(data)
+        fields["sender"] = _EMAIL_STR.validate_python(data["sender"])
+
+        quarantined = []
+        for name in ("recipients", "cc", "bcc"):
+            kept = []
+            for address in data.get(name, []):
+                validated = _validate_address(address)
+                if validated is not None:
+                    kept.append(validated)
+                else:
+                    quarantined.append(address)
+            fields[name] = kept
+        fields["quarantined_addresses"] = quarantined
+
+        if not fields.get("text") and fields.get("body"):
+            fields["text"] = working_text(fields["body"])
+
+        return cls.model_construct(**fields)
+
+    def set_body_loader(self, loader: Callable[[], Optional[Dict]]) -> None:
+        """Defer body fields to a loader called on first resolve_body().
+
+        Args:
+            loader: Callable returning a dict with body, html_body and
+                attachments, or None on failure
+        """
+        self._body_loader = loader
+        self.body_loaded = False
+
+    def resolve_body(self) -> str:
+        """Get the body, fetching it first if it was deferred.
+
+        Returns:
+            Email body (empty if it could not be fetched)
+        """
+        if not self.body_loaded and self._body_loader is not None:
+            fields = self._body_loader()
+            if fields is not None:
+                self.set_body(fields)
+        return self.body
+
+    def set_body(self, fields: Dict) -> None:
+        """Fill in deferred body fields.
+
+        Args:
+            fields: Dict with body, html_body and attachments, plus text,
+                body_size and html_size when parsed by EmailParser
+        """
+        self.body = fields["body"]
+        self.html_body = fields["html_body"]
+        self.attachments = fields["attachments"]
+        self.text = fields.get("text") or working_text(self.body)
+        self.body_size = fields.get("body_size", len(self.body.encode("utf-8")))
+        self.html_size = fields.get("html_size", 0)
+        self.body_loaded = True
+        self._body_loader = None
 
 
 class EmailSummary(BaseModel):
@@ -1,8 +1,17 @@
 """Services module."""
 
+from .email_archive import EmailArchive
 from .gemini_service import GeminiService
 from .gmail_service import GmailService
 from .rag_service import RAGService
 from .slack_service import SlackService
+from .thread_index import ThreadIndex
 
-__all__ = ["GmailService", "GeminiService", "RAGService", "SlackService"]
+__all__ = [
+    "EmailArchive",
+    "GmailService",
+    "GeminiService",
+    "RAGService",
+    "SlackService",
+    "ThreadIndex",
+]
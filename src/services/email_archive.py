@@ -0,0 +1,174 @@
+"""Local archive of processed emails used to rebuild the vector index."""
+
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, TextIO
+
+from src.models import Email
+from src.utils import as_utc, get_logger
+
+logger = get_logger(__name__)
+
+
+class EmailArchive:
+    """Append-only JSON Lines archive of processed emails.
+
+    Re-processed emails are appended again, so the archive can hold several
+    copies of an email; readers keep the latest one. ``compact`` rewrites
+    the file without superseded copies and, given a cutoff, without emails
+    past the retention window.
+    """
+
+    def __init__(self, path: Path):
+        """Initialize email archive.
+
+        Args:
+            path: Archive file path
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def append(self, emails: List[Email]) -> None:
+        """Append emails to the archive.
+
+        HTML bodies are not archived; only the fields needed to rebuild
+        embeddings and metadata are kept.
+
+        Args:
+            emails: Emails to archive
+        """
+        if not emails:
+            return
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            lines = [email.model_dump_json(exclude={"html_body"}) + "\n" for email in emails]
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+        except Exception as e:
+            logger.error(f"Error archiving emails: {e}")
+
+    def iter_batches(self, batch_size: int = 256) -> Iterator[List[Email]]:
+        """Read archived emails in batches, keeping the latest copy of each ID.
+
+        The file is streamed twice: once to find the line holding each
+        email's latest copy, then to parse only those lines. Memory grows
+        with the number of distinct IDs, not with the archived bodies.
+
+        Args:
+            batch_size: Number of emails per batch
+
+        Yields:
+            Lists of emails
+        """
+        if not self.path.exists():
+            return
+
+        batch: List[Email] = []
+        with open(self.path, encoding="utf-8") as f:
+            latest = self._latest_lines(f)
+            f.seek(0)
+
+            for line_number, line in enumerate(f, start=1):
+                email = self._parse_line(line, line_number, latest)
+                if email is None:
+                    continue
+
+                batch.append(email)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+
+        if batch:
+            yield batch
+
+    def compact(self, cutoff: Optional[datetime] = None) -> dict:
+        """Rewrite the archive with only the latest copy of each email.
+
+        Args:
+            cutoff: Drop emails dated before this time (optional)
+
+        Returns:
+            Dictionary with kept and dropped email counts
+        """
+        if not self.path.exists():
+            return {"kept": 0, "dropped": 0}
+
+        if cutoff is not None:
+            cutoff = as_utc(cutoff)
+
+        kept = 0
+        dropped = 0
+        tmp_path = self.path.with_suffix(".tmp")
+
+        try:
+            with self._lock:
+                with open(self.path, encoding="utf-8") as src, open(
+                    tmp_path, "w", encoding="utf-8"
+                ) as dst:
+                    latest = self._latest_lines(src)
+                    src.seek(0)
+
+                    for line_number, line in enumerate(src, start=1):
+                        email = self._parse_line(line, line_number, latest)
+                        if email is None or (cutoff is not None and as_utc(email.date) < cutoff):
+                            if line.strip():
+                                dropped += 1
+                            continue
+
+                        dst.write(line if line.endswith("\n") else line + "\n")
+                        kept += 1
+
+                tmp_path.replace(self.path)
+
+        except Exception as e:
+            logger.error(f"Error compacting email archive: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return {"kept": 0, "dropped": 0}
+
+        logger.info("Email archive compacted", kept=kept, dropped=dropped)
+        return {"kept": kept, "dropped": dropped}
+
+    def _latest_lines(self, f: TextIO) -> Dict[str, int]:
+        """Find the line number of the latest copy of each archived email.
+
+        Args:
+            f: Archive file positioned at the start
+
+        Returns:
+            Dictionary of email ID to line number
+        """
+        latest: Dict[str, int] = {}
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                latest[json.loads(line)["id"]] = line_number
+            except Exception:
+                continue
+        return latest
+
+    def _parse_line(self, line: str, line_number: int, latest: Dict[str, int]) -> Optional[Email]:
+        """Parse an archive line if it holds the latest copy of its email.
+
+        Args:
+            line: Archive line
+            line_number: 1-based line number
+            latest: Result of _latest_lines for the same file
+
+        Returns:
+            Email, or None for blank, superseded or malformed lines
+        """
+        if not line.strip():
+            return None
+
+        try:
+            data = json.loads(line)
+            if latest.get(data["id"]) != line_number:
+                return None
+            return Email.model_validate(data)
+        except Exception as e:
+            logger.warning(f"Skipping malformed archive line {line_number}: {e}")
+            return None
@@ -0,0 +1,182 @@
+"""Embedding model backends for RAGService."""
+
+from abc import ABC, abstractmethod
+from typing import List
+
+import numpy as np
+
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+EMBEDDING_BACKENDS = ("sentence-transformers", "onnx", "onnx-int8")
+
+# Files published with the sentence-transformers models on the Hugging Face Hub
+ONNX_MODEL_FILE = "onnx/model.onnx"
+ONNX_INT8_MODEL_FILE = "onnx/model_quint8_avx2.onnx"
+
+
+class EmbeddingBackend(ABC):
+    """Interface shared by embedding backends.
+
+    Backends mirror ``SentenceTransformer.encode`` so they can be swapped
+    without changing callers.
+    """
+
+    @abstractmethod
+    def encode(
+        self, texts: List[str], batch_size: int = 32, normalize_embeddings: bool = False
+    ) -> np.ndarray:
+        """Encode texts into embeddings.
+
+        Args:
+            texts: Texts to encode
+            batch_size: Number of texts per inference batch
+            normalize_embeddings: Whether to L2-normalize the output
+
+        Returns:
+            Matrix of shape (len(texts), dim)
+        """
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """PyTorch backend using sentence-transformers."""
+
+    def __init__(self, model_name: str, threads: int = 0):
+        """Initialize SentenceTransformer backend.
+
+        Args:
+            model_name: SentenceTransformer model name
+            threads: Number of intra-op CPU threads (0 keeps the default)
+        """
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads > 0:
+            torch.set_num_threads(threads)
+
+        self.model = SentenceTransformer(model_name)
+
+    def encode(
+        self, texts: List[str], batch_size: int = 32, normalize_embeddings: bool = False
+    ) -> np.ndarray:
+        """Encode texts into embeddings."""
+        return self.model.encode(
+            texts, batch_size=batch_size, normalize_embeddings=normalize_embeddings
+        )
+
+
+class OnnxEmbeddingBackend(EmbeddingBackend):
+    """ONNX Runtime backend that runs without torch.
+
+    Uses the ONNX exports published alongside sentence-transformers models
+    and reproduces their mean pooling.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        quantized: bool = False,
+        threads: int = 0,
+        max_length: int = 256,
+    ):
+        """Initialize ONNX backend.
+
+        Args:
+            model_name: Model name or Hugging Face Hub repository ID
+            quantized: Use the int8-quantized export
+            threads: Number of intra-op CPU threads (0 keeps the default)
+            max_length: Maximum tokens per text
+        """
+        import onnxruntime as ort
+        from huggingface_hub import hf_hub_download
+        from tokenizers import Tokenizer
+
+        repo_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+        model_file = ONNX_INT8_MODEL_FILE if quantized else ONNX_MODEL_FILE
+
+        self.tokenizer = Tokenizer.from_file(hf_hub_download(repo_id, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        if threads > 0:
+            options.intra_op_num_threads = threads
+
+        self.session = ort.InferenceSession(
+            hf_hub_download(repo_id, model_file),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        logger.info(f"Loaded ONNX embedding model {repo_id}", file=model_file)
+
+    def encode(
+        self, texts: List[str], batch_size: int = 32, normalize_embeddings: bool = False
+    ) -> np.ndarray:
+        """Encode texts into embeddings."""
+        if isinstance(texts, str):
+            return self.encode([texts], batch_size, normalize_embeddings)[0]
+
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start : start + batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+            inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                inputs["token_type_ids"] = np.array(
+                    [e.type_ids for e in encodings], dtype=np.int64
+                )
+
+            token_embeddings = self.session.run(None, inputs)[0]
+            batches.append(mean_pool(token_embeddings, attention_mask))
+
+        embeddings = np.vstack(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+
+        if normalize_embeddings and len(embeddings):
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-12)
+
+        return embeddings
+
+
+def mean_pool(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Average token embeddings, ignoring padding.
+
+    Args:
+        token_embeddings: Array of shape (batch, tokens, dim)
+        attention_mask: Array of shape (batch, tokens)
+
+    Returns:
+        Array of shape (batch, dim)
+    """
+    mask = attention_mask[..., None].astype(token_embeddings.dtype)
+    summed = (token_embeddings * mask).sum(axis=1)
+    counts = np.maximum(mask.sum(axis=1), 1e-9)
+    return summed / counts
+
+
+def create_embedding_backend(
+    model_name: str, backend: str = "sentence-transformers", threads: int = 0
+) -> EmbeddingBackend:
+    """Create an embedding backend by name.
+
+    Args:
+        model_name: Embedding model name
+        backend: One of EMBEDDING_BACKENDS
+        threads: Number of intra-op CPU threads (0 keeps the default)
+
+    Returns:
+        Embedding backend instance
+    """
+    if backend == "sentence-transformers":
+        return SentenceTransformerBackend(model_name, threads=threads)
+    if backend == "onnx":
+        return OnnxEmbeddingBackend(model_name, threads=threads)
+    if backend == "onnx-int8":
+        return OnnxEmbeddingBackend(model_name, quantized=True, threads=threads)
+
+    raise ValueError(f"Unknown embedding backend: {backend}")
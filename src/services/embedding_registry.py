@@ -0,0 +1,72 @@
+"""Process-wide registry of lazily loaded embedding models."""
+
+import threading
+import time
+from typing import Dict, Tuple
+
+from src.utils import get_logger
+
+from .embedding_backends import EmbeddingBackend, create_embedding_backend
+
+logger = get_logger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+_models: Dict[Tuple[str, str, int], EmbeddingBackend] = {}
+_lock = threading.Lock()
+
+
+def get_embedding_model(
+    model_name: str = DEFAULT_EMBEDDING_MODEL,
+    backend: str = "sentence-transformers",
+    threads: int = 0,
+) -> EmbeddingBackend:
+    """Get a shared embedding model, loading it on first use.
+
+    Backend imports (torch, onnxruntime) are deferred until a model is
+    actually needed, so commands that never encode text skip them.
+
+    Args:
+        model_name: Embedding model name
+        backend: Embedding backend name
+        threads: Number of intra-op CPU threads (0 keeps the default)
+
+    Returns:
+        Loaded embedding backend
+    """
+    key = (model_name, backend, threads)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            start = time.perf_counter()
+            model = create_embedding_backend(model_name, backend=backend, threads=threads)
+            _models[key] = model
+            logger.info(
+                f"Loaded embedding model {model_name}",
+                backend=backend,
+                seconds=round(time.perf_counter() - start, 2),
+            )
+
+    return model
+
+
+def is_model_loaded(
+    model_name: str = DEFAULT_EMBEDDING_MODEL,
+    backend: str = "sentence-transformers",
+    threads: int = 0,
+) -> bool:
+    """Check whether a model has already been loaded.
+
+    Args:
+        model_name: Embedding model name
+        backend: Embedding backend name
+        threads: Number of intra-op CPU threads
+
+    Returns:
+        True if the model is loaded
+    """
+    return (model_name, backend, threads) in _models
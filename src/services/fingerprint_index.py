@@ -0,0 +1,329 @@
+"""Content fingerprint index for exact and near-exact duplicate detection."""
+
+import hashlib
+import re
+import sqlite3
+import threading
+from datetime import timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.models import Email
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 8
+BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+SHINGLE_SIZE = 3
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize_body(body: str) -> str:
+    """Normalize an email body for fingerprinting.
+
+    Args:
+        body: Raw email body
+
+    Returns:
+        Lowercased words joined by single spaces
+    """
+    return " ".join(_WORD_RE.findall(body.lower()))
+
+
+def simhash(text: str) -> int:
+    """Compute a 64-bit SimHash over word shingles.
+
+    Args:
+        text: Normalized text
+
+    Returns:
+        Unsigned 64-bit fingerprint
+    """
+    words = text.split()
+    if len(words) >= SHINGLE_SIZE:
+        features = [
+            " ".join(words[i : i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)
+        ]
+    else:
+        features = words
+
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        value = int.from_bytes(
+            hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big"
+        )
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def _to_signed(value: int) -> int:
+    """Map an unsigned 64-bit integer onto SQLite's signed INTEGER range."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value: int) -> int:
+    """Inverse of _to_signed."""
+    return value + (1 << 64) if value < 0 else value
+
+
+def _bands(value: int) -> List[int]:
+    """Split a fingerprint into SIMHASH_BANDS fixed-width bands."""
+    mask = (1 << BAND_BITS) - 1
+    return [value >> (i * BAND_BITS) & mask for i in range(SIMHASH_BANDS)]
+
+
+class FingerprintIndex:
+    """SQLite-backed index of body hashes and SimHash signatures.
+
+    Exact duplicates are matched on a SHA-256 of the normalized body.
+    Near-exact duplicates are matched on SimHash Hamming distance; the
+    signature is split into bands so any pair within ``max_distance`` bits
+    (fewer than SIMHASH_BANDS) shares at least one band and is found with an
+    indexed lookup.
+    """
+
+    def __init__(self, path: Path, max_distance: int = 6, min_length: int = 50):
+        """Initialize fingerprint index.
+
+        Args:
+            path: SQLite database file path
+            max_distance: Maximum SimHash Hamming distance for a near match
+            min_length: Minimum normalized body length to fingerprint
+        """
+        self.path = Path(path)
+        self.max_distance = min(max_distance, SIMHASH_BANDS - 1)
+        self.min_length = min_length
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        band_columns = ", ".join(f"band{i} INTEGER NOT NULL" for i in range(SIMHASH_BANDS))
+        self._conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                email_id TEXT PRIMARY KEY,
+                sha TEXT NOT NULL,
+                simhash INTEGER NOT NULL,
+                {band_columns},
+                email_date REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fingerprints_sha ON fingerprints (sha)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_fingerprints_email_date ON fingerprints (email_date)"
+        )
+        for i in range(SIMHASH_BANDS):
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_fingerprints_band{i} ON fingerprints (band{i})"
+            )
+        self._conn.commit()
+
+        logger.info("Fingerprint index initialized", path=str(self.path))
+
+    def fingerprint(self, email: Email) -> Optional[Tuple[str, int]]:
+        """Compute the fingerprint of an email body.
+
+        The exact hash covers the whole normalized body, so emails that
+        differ anywhere never count as exact duplicates. The SimHash is
+        computed from the capped working text, which keeps near-duplicate
+        detection cheap and ignores quoted history.
+
+        Args:
+            email: Email to fingerprint
+
+        Returns:
+            (sha, simhash) tuple, or None if the body is too short to be
+            distinctive
+        """
+        body = normalize_body(email.body)
+        if len(body) < self.min_length:
+            return None
+        text = normalize_body(email.text) or body
+        return hashlib.sha256(body.encode("utf-8")).hexdigest(), simhash(text)
+
+    def match_and_add(
+        self, emails: List[Email], threshold: float = 0.0
+    ) -> Dict[str, Tuple[str, float]]:
+        """Match emails against the index, then add their fingerprints.
+
+        Emails are processed in order, so a later email in the batch can
+        match an earlier one. An email never matches its own stored entry.
+
+        Args:
+            emails: Emails to check and index
+            threshold: Minimum similarity (1 - distance / 64) for a near match
+
+        Returns:
+            Dictionary of email ID to (matched_email_id, similarity) for hits
+        """
+        matches: Dict[str, Tuple[str, float]] = {}
+
+        try:
+            with self._lock:
+                for email in emails:
+                    fingerprint = self.fingerprint(email)
+                    if fingerprint is None:
+                        continue
+
+                    match = self._lookup(email.id, *fingerprint)
+                    if match is not None and match[1] >= threshold:
+                        matches[email.id] = match
+                        if match[1] == 1.0:
+                            self.exact_hits += 1
+                        else:
+                            self.near_hits += 1
+                    else:
+                        self.misses += 1
+
+                    self._insert(email, *fingerprint)
+
+                self._conn.commit()
+
+        except Exception as e:
+            logger.error(f"Error matching fingerprints: {e}")
+
+        return matches
+
+    def _lookup(self, email_id: str, sha: str, value: int) -> Optional[Tuple[str, float]]:
+        """Find the closest indexed email for a fingerprint.
+
+        Args:
+            email_id: ID of the email being checked (excluded from results)
+            sha: Normalized body hash
+            value: SimHash signature
+
+        Returns:
+            (email_id, similarity) of the best match, or None
+        """
+        row = self._conn.execute(
+            "SELECT email_id FROM fingerprints WHERE sha = ? AND email_id != ? LIMIT 1",
+            (sha, email_id),
+        ).fetchone()
+        if row is not None:
+            return row[0], 1.0
+
+        conditions = " OR ".join(f"band{i} = ?" for i in range(SIMHASH_BANDS))
+        rows = self._conn.execute(
+            f"SELECT email_id, simhash FROM fingerprints WHERE ({conditions}) AND email_id != ?",
+            (*_bands(value), email_id),
+        ).fetchall()
+
+        best = None
+        for candidate_id, candidate in rows:
+            distance = bin(value ^ _to_unsigned(candidate)).count("1")
+            if distance <= self.max_distance and (best is None or distance < best[1]):
+                best = (candidate_id, distance)
+
+        if best is None:
+            return None
+        # The hashes differ, so even an identical SimHash is not an exact match
+        return best[0], 1 - max(best[1], 1) / SIMHASH_BITS
+
+    def _insert(self, email: Email, sha: str, value: int) -> None:
+        """Insert or replace a fingerprint row, dated by the email's date."""
+        date = email.date if email.date.tzinfo else email.date.replace(tzinfo=timezone.utc)
+        placeholders = ", ".join("?" for _ in range(SIMHASH_BANDS + 4))
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO fingerprints VALUES ({placeholders})",
+            (email.id, sha, _to_signed(value), *_bands(value), date.timestamp()),
+        )
+
+    def add(self, emails: Iterable[Email]) -> None:
+        """Add fingerprints without matching, e.g. when rebuilding.
+
+        Args:
+            emails: Emails to index
+        """
+        try:
+            with self._lock:
+                for email in emails:
+                    fingerprint = self.fingerprint(email)
+                    if fingerprint is not None:
+                        self._insert(email, *fingerprint)
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"Error adding fingerprints: {e}")
+
+    def remove(self, email_ids: List[str]) -> None:
+        """Remove fingerprints for the given emails.
+
+        Args:
+            email_ids: Email IDs to remove
+        """
+        if not email_ids:
+            return
+
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "DELETE FROM fingerprints WHERE email_id = ?", [(i,) for i in email_ids]
+                )
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"Error removing fingerprints: {e}")
+
+    def evict_before(self, timestamp: float) -> int:
+        """Remove fingerprints of emails dated before a point in time.
+
+        Args:
+            timestamp: Unix timestamp cutoff, compared with the email date
+
+        Returns:
+            Number of fingerprints removed
+        """
+        try:
+            with self._lock:
+                cursor = self._conn.execute(
+                    "DELETE FROM fingerprints WHERE email_date < ?", (timestamp,)
+                )
+                self._conn.commit()
+                return cursor.rowcount
+        except Exception as e:
+            logger.error(f"Error evicting fingerprints: {e}")
+            return 0
+
+    def clear(self) -> None:
+        """Remove all fingerprints."""
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM fingerprints")
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"Error clearing fingerprints: {e}")
+
+    def size(self) -> int:
+        """Get number of indexed emails.
+
+        Returns:
+            Number of entries
+        """
+        try:
+            with self._lock:
+                return self._conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+        except Exception:
+            return 0
+
+    def get_stats(self) -> dict:
+        """Get fingerprint hit/miss statistics.
+
+        Returns:
+            Statistics dictionary
+        """
+        lookups = self.exact_hits + self.near_hits + self.misses
+        hits = self.exact_hits + self.near_hits
+        return {
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "entries": self.size(),
+        }
@@ -1,7 +1,9 @@
 """Gemini AI service for email processing and classification."""
 
+import asyncio
 import json
-from typing import List
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 import google.generativeai as genai
 
@@ -9,8 +11,47 @@ from config import Settings
 from src.models import Email, EmailCategory, EmailPriority, EmailSummary
 from src.utils import get_logger
 
+from .summary_cache import SummaryCache
+
 logger = get_logger(__name__)
 
+DEFAULT_AUTO_RESPONSE = """Thank you for your email regarding the opportunity.
+
+I am very interested in learning more about this position. I have attached my resume for your review.
+
+I would be happy to discuss this further at your convenience. Please feel free to contact me.
+
+Best regards"""
+
+SUMMARY_SCHEMA = """{
+    "summary": "A concise 2-3 sentence summary of the email",
+    "category": "One of: important, urgent, job_related, promotional, social, updates, spam, personal, work, other",
+    "priority": "One of: high, medium, low",
+    "action_items": ["List of action items mentioned"],
+    "deadlines": ["List of deadlines or time-sensitive information"],
+    "key_points": ["3-5 key points from the email"],
+    "requires_response": true/false,
+    "sentiment": "positive, neutral, or negative"
+}"""
+
+# Rough characters-per-token ratio used to size batch prompts
+CHARS_PER_TOKEN = 4
+
+# Estimated output tokens of one JSON summary in a batch answer
+SUMMARY_OUTPUT_TOKENS = 400
+
+# Bump a version whenever its prompt changes so stale cache entries are ignored
+PROMPT_VERSIONS = {"summary": "1", "category": "1", "job": "1"}
+
+# Gmail labels that determine the category of mail triaged from headers
+LABEL_CATEGORIES = {
+    "SPAM": EmailCategory.SPAM,
+    "CATEGORY_PROMOTIONS": EmailCategory.PROMOTIONAL,
+    "CATEGORY_SOCIAL": EmailCategory.SOCIAL,
+    "CATEGORY_FORUMS": EmailCategory.SOCIAL,
+    "CATEGORY_UPDATES": EmailCategory.UPDATES,
+}
+
 
 class GeminiService:
     """Gemini AI service for email intelligence."""
@@ -27,11 +68,38 @@ class GeminiService:
         # Initialize model
         self.model = genai.GenerativeModel("gemini-1.5-flash")
 
+        # Caps in-flight requests across all async callers
+        self._request_limit = asyncio.Semaphore(settings.gemini_max_concurrent_requests)
+
+        # Persistent cache of results keyed by email content
+        self.cache: Optional[SummaryCache] = None
+        if settings.summary_cache_enabled:
+            self.cache = SummaryCache(
+                Path(settings.summary_cache_path),
+                ttl_seconds=settings.summary_cache_ttl,
+                max_entries=settings.summary_cache_max_entries,
+            )
+
         logger.info("Gemini service initialized successfully")
 
     def summarize_email(self, email: Email) -> EmailSummary:
         """Generate comprehensive summary of an email.
 
+        Args:
+            email: Email to summarize
+
+        Returns:
+            EmailSummary object
+        """
+        cached = self._get_cached_summary(email)
+        if cached is not None:
+            return cached
+
+        return self._summarize_uncached(email)
+
+    def _summarize_uncached(self, email: Email) -> EmailSummary:
+        """Summarize an email that already missed the cache, then cache it.
+
         Args:
             email: Email to summarize
 
@@ -39,67 +107,48 @@ class GeminiService:
             EmailSummary object
         """
         try:
-            prompt = f"""Analyze the following email and provide a structured summary in JSON format.
+            response = self.model.generate_content(self._build_summary_prompt(email))
+            summary = self._parse_summary(email, response.text)
+            self._cache_summary(email, summary)
+            return summary
 
-Email Subject: {email.subject}
-From: {email.sender}
-Date: {email.date}
-Body:
-{email.body[:2000]}
+        except Exception as e:
+            logger.error(f"Error summarizing email: {e}", exc_info=True)
+            return self._default_summary(email)
 
-Provide a JSON response with the following structure:
-{{
-    "summary": "A concise 2-3 sentence summary of the email",
-    "category": "One of: important, urgent, job_related, promotional, social, updates, spam, personal, work, other",
-    "priority": "One of: high, medium, low",
-    "action_items": ["List of action items mentioned"],
-    "deadlines": ["List of deadlines or time-sensitive information"],
-    "key_points": ["3-5 key points from the email"],
-    "requires_response": true/false,
-    "sentiment": "positive, neutral, or negative"
-}}
+    async def summarize_email_async(self, email: Email) -> EmailSummary:
+        """Generate comprehensive summary of an email without blocking the event loop.
 
-Respond ONLY with valid JSON, no other text."""
+        Args:
+            email: Email to summarize
 
-            response = self.model.generate_content(prompt)
-            result_text = response.text.strip()
-
-            # Remove markdown code blocks if present
-            if result_text.startswith("```"):
-                result_text = result_text.split("```")[1]
-                if result_text.startswith("json"):
-                    result_text = result_text[4:]
-                result_text = result_text.strip()
-
-            result = json.loads(result_text)
-
-            return EmailSummary(
-                email_id=email.id,
-                subject=email.subject,
-                sender=email.sender,
-                date=email.date,
-                summary=result.get("summary", ""),
-                category=EmailCategory(result.get("category", "other")),
-                priority=EmailPriority(result.get("priority", "medium")),
-                action_items=result.get("action_items", []),
-                deadlines=result.get("deadlines", []),
-                key_points=result.get("key_points", []),
-                requires_response=result.get("requires_response", False),
-                sentiment=result.get("sentiment", "neutral"),
-            )
+        Returns:
+            EmailSummary object
+        """
+        cached = self._get_cached_summary(email)
+        if cached is not None:
+            return cached
+
+        return await self._summarize_uncached_async(email)
+
+    async def _summarize_uncached_async(self, email: Email) -> EmailSummary:
+        """Summarize an email that already missed the cache, then cache it.
+
+        Args:
+            email: Email to summarize
+
+        Returns:
+            EmailSummary object
+        """
+        try:
+            response_text = await self._generate_async(self._build_summary_prompt(email))
+            summary = self._parse_summary(email, response_text)
+            self._cache_summary(email, summary)
+            return summary
 
         except Exception as e:
             logger.error(f"Error summarizing email: {e}", exc_info=True)
-            # Return default summary on error
-            return EmailSummary(
-                email_id=email.id,
-                subject=email.subject,
-                sender=email.sender,
-                date=email.date,
-                summary="Unable to generate summary",
-                category=EmailCategory.OTHER,
-                priority=EmailPriority.MEDIUM,
-            )
+            return self._default_summary(email)
 
     def classify_email(self, email: Email) -> EmailCategory:
         """Classify email into a category.
@@ -110,34 +159,40 @@ Respond ONLY with valid JSON, no other text."""
         Returns:
             EmailCategory
         """
+        cache_key = self._cache_key("category", email, 1000)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return EmailCategory(cached)
+
         try:
-            prompt = f"""Classify the following email into ONE category.
+            response = self.model.generate_content(self._build_classification_prompt(email))
+            category = self._parse_category(response.text)
+            self._cache_set(cache_key, category.value)
+            return category
 
-Subject: {email.subject}
-From: {email.sender}
-Body: {email.body[:1000]}
+        except Exception as e:
+            logger.error(f"Error classifying email: {e}")
+            return EmailCategory.OTHER
 
-Categories:
-- important: Critical business or personal matters
-- urgent: Time-sensitive matters requiring immediate attention
-- job_related: Job opportunities, applications, interviews
-- promotional: Marketing, advertisements, offers
-- social: Social media notifications
-- updates: Product updates, newsletters
-- spam: Unwanted or suspicious emails
-- personal: Personal communications
-- work: Work-related communications
-- other: Everything else
+    async def classify_email_async(self, email: Email) -> EmailCategory:
+        """Classify email into a category without blocking the event loop.
 
-Respond with ONLY the category name, nothing else."""
+        Args:
+            email: Email to classify
 
-            response = self.model.generate_content(prompt)
-            category_str = response.text.strip().lower()
+        Returns:
+            EmailCategory
+        """
+        cache_key = self._cache_key("category", email, 1000)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return EmailCategory(cached)
 
-            try:
-                return EmailCategory(category_str)
-            except ValueError:
-                return EmailCategory.OTHER
+        try:
+            response_text = await self._generate_async(self._build_classification_prompt(email))
+            category = self._parse_category(response_text)
+            self._cache_set(cache_key, category.value)
+            return category
 
         except Exception as e:
             logger.error(f"Error classifying email: {e}")
@@ -155,21 +210,47 @@ Respond with ONLY the category name, nothing else."""
         """
         try:
             # Quick keyword check first
-            text = f"{email.subject} {email.body}".lower()
-            if any(keyword in text for keyword in job_keywords):
+            if self._has_job_keywords(email, job_keywords):
+                cache_key = self._cache_key("job", email, 1000)
+                cached = self._cache_get(cache_key)
+                if cached is not None:
+                    return bool(cached)
+
                 # Use AI for confirmation
-                prompt = f"""Is the following email related to a job opportunity, application, or interview?
+                response = self.model.generate_content(self._build_job_prompt(email))
+                is_job = "yes" in response.text.strip().lower()
+                self._cache_set(cache_key, is_job)
+                return is_job
 
-Subject: {email.subject}
-From: {email.sender}
-Body: {email.body[:1000]}
+            return False
 
-Respond with ONLY "yes" or "no"."""
+        except Exception as e:
+            logger.error(f"Error checking if job-related: {e}")
+            return False
+
+    async def is_job_related_async(self, email: Email, job_keywords: List[str]) -> bool:
+        """Determine if email is job-related using AI without blocking the event loop.
+
+        Args:
+            email: Email to check
+            job_keywords: List of job-related keywords
 
-                response = self.model.generate_content(prompt)
-                answer = response.text.strip().lower()
+        Returns:
+            True if job-related
+        """
+        try:
+            # Quick keyword check first
+            if self._has_job_keywords(email, job_keywords):
+                cache_key = self._cache_key("job", email, 1000)
+                cached = self._cache_get(cache_key)
+                if cached is not None:
+                    return bool(cached)
 
-                return "yes" in answer
+                # Use AI for confirmation
+                response_text = await self._generate_async(self._build_job_prompt(email))
+                is_job = "yes" in response_text.strip().lower()
+                self._cache_set(cache_key, is_job)
+                return is_job
 
             return False
 
@@ -188,7 +269,323 @@ Respond with ONLY "yes" or "no"."""
             Response email body
         """
         try:
-            prompt = f"""Generate a professional auto-response to the following job-related email.
+            response = self.model.generate_content(
+                self._build_auto_response_prompt(email, include_resume)
+            )
+            return response.text.strip()
+
+        except Exception as e:
+            logger.error(f"Error generating auto-response: {e}")
+            return DEFAULT_AUTO_RESPONSE
+
+    async def generate_auto_response_async(
+        self, email: Email, include_resume: bool = True
+    ) -> str:
+        """Generate an auto-response for job-related emails without blocking the event loop.
+
+        Args:
+            email: Original email
+            include_resume: Whether resume will be attached
+
+        Returns:
+            Response email body
+        """
+        try:
+            response_text = await self._generate_async(
+                self._build_auto_response_prompt(email, include_resume)
+            )
+            return response_text.strip()
+
+        except Exception as e:
+            logger.error(f"Error generating auto-response: {e}")
+            return DEFAULT_AUTO_RESPONSE
+
+    async def _generate_async(self, prompt: str) -> str:
+        """Run a prompt through the async generation API.
+
+        Args:
+            prompt: Prompt text
+
+        Returns:
+            Response text
+        """
+        async with self._request_limit:
+            response = await self.model.generate_content_async(prompt)
+        return response.text
+
+    def _cache_key(self, kind: str, email: Email, body_chars: int) -> str:
+        """Build the cache key for a prompt kind and email.
+
+        Args:
+            kind: Prompt kind (summary, category or job)
+            email: Email sent to the model
+            body_chars: Number of body characters included in the prompt
+
+        Returns:
+            Cache key
+        """
+        return SummaryCache.make_key(
+            kind, PROMPT_VERSIONS[kind], email.subject, email.text[:body_chars]
+        )
+
+    def _cache_get(self, key: str) -> Optional[Any]:
+        """Look up a cached result if caching is enabled.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value or None
+        """
+        return self.cache.get(key) if self.cache is not None else None
+
+    def _cache_set(self, key: str, value: Any) -> None:
+        """Store a result if caching is enabled.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+        """
+        if self.cache is not None:
+            self.cache.set(key, value)
+
+    def _get_cached_summary(self, email: Email) -> Optional[EmailSummary]:
+        """Get a cached summary re-stamped with this email's identity.
+
+        Args:
+            email: Email to summarize
+
+        Returns:
+            EmailSummary or None on a miss
+        """
+        result = self._cache_get(self._cache_key("summary", email, 2000))
+        if result is None:
+            return None
+
+        try:
+            return self._summary_from_result(email, result)
+        except Exception:
+            return None
+
+    def _cache_summary(self, email: Email, summary: EmailSummary) -> None:
+        """Store a summary for later reuse.
+
+        Args:
+            email: Summarized email
+            summary: Generated summary
+        """
+        self._cache_set(
+            self._cache_key("summary", email, 2000), summary.model_dump(mode="json")
+        )
+
+    def _build_summary_prompt(self, email: Email) -> str:
+        """Build the summarization prompt for an email.
+
+        Args:
+            email: Email to summarize
+
+        Returns:
+            Prompt text
+        """
+        return f"""Analyze the following email and provide a structured summary in JSON format.
+
+Email Subject: {email.subject}
+From: {email.sender}
+Date: {email.date}
+Body:
+{email.text[:2000]}
+
+Provide a JSON response with the following structure:
+{SUMMARY_SCHEMA}
+
+Respond ONLY with valid JSON, no other text."""
+
+    def _parse_summary(self, email: Email, response_text: str) -> EmailSummary:
+        """Parse a summarization response into an EmailSummary.
+
+        Args:
+            email: Summarized email
+            response_text: Raw model response
+
+        Returns:
+            EmailSummary object
+        """
+        result = json.loads(self._strip_code_fence(response_text))
+        return self._summary_from_result(email, result)
+
+    def _strip_code_fence(self, response_text: str) -> str:
+        """Remove a markdown code block wrapper from a model response.
+
+        Args:
+            response_text: Raw model response
+
+        Returns:
+            Response text without code fences
+        """
+        result_text = response_text.strip()
+
+        # Remove markdown code blocks if present
+        if result_text.startswith("```"):
+            result_text = result_text.split("```")[1]
+            if result_text.startswith("json"):
+                result_text = result_text[4:]
+            result_text = result_text.strip()
+
+        return result_text
+
+    def _summary_from_result(self, email: Email, result: Dict) -> EmailSummary:
+        """Build an EmailSummary from a parsed JSON result.
+
+        Args:
+            email: Summarized email
+            result: Parsed summary fields
+
+        Returns:
+            EmailSummary object
+        """
+        return EmailSummary(
+            email_id=email.id,
+            subject=email.subject,
+            sender=email.sender,
+            date=email.date,
+            summary=result.get("summary", ""),
+            category=EmailCategory(result.get("category", "other")),
+            priority=EmailPriority(result.get("priority", "medium")),
+            action_items=result.get("action_items", []),
+            deadlines=result.get("deadlines", []),
+            key_points=result.get("key_points", []),
+            requires_response=result.get("requires_response", False),
+            sentiment=result.get("sentiment", "neutral"),
+        )
+
+    def header_summary(self, email: Email) -> EmailSummary:
+        """Summarize an email from its headers and labels without calling the model.
+
+        Used for bulk mail triaged without fetching its body.
+
+        Args:
+            email: Email to summarize
+
+        Returns:
+            Low-priority EmailSummary categorized from Gmail labels
+        """
+        category = next(
+            (LABEL_CATEGORIES[label] for label in email.labels if label in LABEL_CATEGORIES),
+            EmailCategory.UPDATES,
+        )
+        return EmailSummary(
+            email_id=email.id,
+            subject=email.subject,
+            sender=email.sender,
+            date=email.date,
+            summary=f"{category.value.title()} email from {email.sender_name or email.sender}",
+            category=category,
+            priority=EmailPriority.LOW,
+        )
+
+    def _default_summary(self, email: Email) -> EmailSummary:
+        """Build the fallback summary used when summarization fails.
+
+        Args:
+            email: Email that could not be summarized
+
+        Returns:
+            EmailSummary object
+        """
+        return EmailSummary(
+            email_id=email.id,
+            subject=email.subject,
+            sender=email.sender,
+            date=email.date,
+            summary="Unable to generate summary",
+            category=EmailCategory.OTHER,
+            priority=EmailPriority.MEDIUM,
+        )
+
+    def _build_classification_prompt(self, email: Email) -> str:
+        """Build the classification prompt for an email.
+
+        Args:
+            email: Email to classify
+
+        Returns:
+            Prompt text
+        """
+        return f"""Classify the following email into ONE category.
+
+Subject: {email.subject}
+From: {email.sender}
+Body: {email.text[:1000]}
+
+Categories:
+- important: Critical business or personal matters
+- urgent: Time-sensitive matters requiring immediate attention
+- job_related: Job opportunities, applications, interviews
+- promotional: Marketing, advertisements, offers
+- social: Social media notifications
+- updates: Product updates, newsletters
+- spam: Unwanted or suspicious emails
+- personal: Personal communications
+- work: Work-related communications
+- other: Everything else
+
+Respond with ONLY the category name, nothing else."""
+
+    def _parse_category(self, response_text: str) -> EmailCategory:
+        """Parse a classification response into an EmailCategory.
+
+        Args:
+            response_text: Raw model response
+
+        Returns:
+            EmailCategory
+        """
+        try:
+            return EmailCategory(response_text.strip().lower())
+        except ValueError:
+            return EmailCategory.OTHER
+
+    def _has_job_keywords(self, email: Email, job_keywords: List[str]) -> bool:
+        """Check whether an email mentions any job keyword.
+
+        Args:
+            email: Email to check
+            job_keywords: List of job-related keywords
+
+        Returns:
+            True if any keyword is present
+        """
+        text = f"{email.subject} {email.text}".lower()
+        return any(keyword in text for keyword in job_keywords)
+
+    def _build_job_prompt(self, email: Email) -> str:
+        """Build the job-confirmation prompt for an email.
+
+        Args:
+            email: Email to check
+
+        Returns:
+            Prompt text
+        """
+        return f"""Is the following email related to a job opportunity, application, or interview?
+
+Subject: {email.subject}
+From: {email.sender}
+Body: {email.text[:1000]}
+
+Respond with ONLY "yes" or "no"."""
+
+    def _build_auto_response_prompt(self, email: Email, include_resume: bool) -> str:
+        """Build the auto-response prompt for a job-related email.
+
+        Args:
+            email: Original email
+            include_resume: Whether resume will be attached
+
+        Returns:
+            Prompt text
+        """
+        return f"""Generate a professional auto-response to the following job-related email.
 
 Original Email Subject: {email.subject}
 From: {email.sender}
@@ -202,31 +599,316 @@ The response should:
 
 Generate ONLY the email body, no subject line."""
 
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+    def batch_summarize(self, emails: List[Email]) -> List[EmailSummary]:
+        """Summarize multiple emails efficiently.
 
-        except Exception as e:
-            logger.error(f"Error generating auto-response: {e}")
-            return """Thank you for your email regarding the opportunity.
+        Emails are packed into multi-email prompts sized against
+        ``gemini_batch_token_budget``. Emails missing from a batch response,
+        or returned malformed, fall back to single-email calls.
 
-I am very interested in learning more about this position. I have attached my resume for your review.
+        Args:
+            emails: List of emails to summarize
 
-I would be happy to discuss this further at your convenience. Please feel free to contact me.
+        Returns:
+            List of EmailSummary objects in input order
+        """
+        summaries: Dict[str, EmailSummary] = {}
+        pending: List[Email] = []
 
-Best regards"""
+        for email in emails:
+            cached = self._get_cached_summary(email)
+            if cached is not None:
+                summaries[email.id] = cached
+            else:
+                pending.append(email)
 
-    def batch_summarize(self, emails: List[Email]) -> List[EmailSummary]:
-        """Summarize multiple emails efficiently.
+        for batch in self._plan_summary_batches(pending):
+            if len(batch) == 1:
+                summaries[batch[0].id] = self._summarize_uncached(batch[0])
+                continue
+
+            try:
+                response = self.model.generate_content(self._build_batch_summary_prompt(batch))
+                results = self._parse_batch_summaries(batch, response.text)
+            except Exception as e:
+                logger.error(f"Error summarizing email batch: {e}", exc_info=True)
+                results = {}
+
+            for email in batch:
+                summary = results.get(email.id)
+                if summary is None:
+                    logger.debug(f"Falling back to single summary for {email.id}")
+                    summary = self._summarize_uncached(email)
+                else:
+                    self._cache_summary(email, summary)
+                summaries[email.id] = summary
+
+        return [summaries[email.id] for email in emails]
+
+    async def batch_summarize_async(self, emails: List[Email]) -> List[EmailSummary]:
+        """Summarize multiple emails with batched prompts without blocking the event loop.
 
         Args:
             emails: List of emails to summarize
 
         Returns:
-            List of EmailSummary objects
+            List of EmailSummary objects in input order
         """
-        summaries = []
+        summaries: Dict[str, EmailSummary] = {}
+        pending: List[Email] = []
+
         for email in emails:
-            summary = self.summarize_email(email)
-            summaries.append(summary)
+            cached = self._get_cached_summary(email)
+            if cached is not None:
+                summaries[email.id] = cached
+            else:
+                pending.append(email)
+
+        batches = self._plan_summary_batches(pending)
+        results = await asyncio.gather(*(self._summarize_batch_async(b) for b in batches))
+
+        for batch_summaries in results:
+            summaries.update(batch_summaries)
+
+        return [summaries[email.id] for email in emails]
+
+    async def _summarize_batch_async(self, batch: List[Email]) -> Dict[str, EmailSummary]:
+        """Summarize one planned batch, falling back to single-email calls.
+
+        Args:
+            batch: Emails packed into one prompt
+
+        Returns:
+            Dictionary of email ID to summary
+        """
+        if len(batch) == 1:
+            return {batch[0].id: await self._summarize_uncached_async(batch[0])}
+
+        try:
+            response_text = await self._generate_async(self._build_batch_summary_prompt(batch))
+            results = self._parse_batch_summaries(batch, response_text)
+        except Exception as e:
+            logger.error(f"Error summarizing email batch: {e}", exc_info=True)
+            results = {}
+
+        for email in batch:
+            if email.id in results:
+                self._cache_summary(email, results[email.id])
+
+        missing = [email for email in batch if email.id not in results]
+        if missing:
+            logger.debug(f"Falling back to single summaries for {len(missing)} emails")
+            fallbacks = await asyncio.gather(
+                *(self._summarize_uncached_async(email) for email in missing)
+            )
+            results.update({summary.email_id: summary for summary in fallbacks})
+
+        return results
+
+    def summarize_thread(
+        self, emails: List[Email], previous: Optional[EmailSummary] = None
+    ) -> EmailSummary:
+        """Summarize new messages of a thread, building on its running summary.
+
+        Args:
+            emails: New thread messages in chronological order
+            previous: Running summary of the thread so far (optional)
+
+        Returns:
+            Updated thread summary, attributed to the latest message
+        """
+        try:
+            response = self.model.generate_content(
+                self._build_thread_summary_prompt(emails, previous)
+            )
+            return self._parse_summary(emails[-1], response.text)
+
+        except Exception as e:
+            logger.error(f"Error summarizing thread: {e}", exc_info=True)
+            return self.summarize_email(emails[-1])
+
+    async def summarize_thread_async(
+        self, emails: List[Email], previous: Optional[EmailSummary] = None
+    ) -> EmailSummary:
+        """Summarize new messages of a thread without blocking the event loop.
+
+        Args:
+            emails: New thread messages in chronological order
+            previous: Running summary of the thread so far (optional)
+
+        Returns:
+            Updated thread summary, attributed to the latest message
+        """
+        try:
+            response_text = await self._generate_async(
+                self._build_thread_summary_prompt(emails, previous)
+            )
+            return self._parse_summary(emails[-1], response_text)
+
+        except Exception as e:
+            logger.error(f"Error summarizing thread: {e}", exc_info=True)
+            return await self.summarize_email_async(emails[-1])
+
+    def _build_thread_summary_prompt(
+        self, emails: List[Email], previous: Optional[EmailSummary]
+    ) -> str:
+        """Build a prompt that updates a thread summary with new messages.
+
+        Only the new messages are sent; earlier messages are represented by
+        the running summary.
+
+        Args:
+            emails: New thread messages
+            previous: Running summary of the thread so far (optional)
+
+        Returns:
+            Prompt text
+        """
+        sections = "\n".join(self._format_batch_email(email) for email in emails)
+        if previous is None:
+            context = "This is a new email thread."
+        else:
+            running = previous.model_dump_json(
+                include={
+                    "summary",
+                    "category",
+                    "priority",
+                    "action_items",
+                    "deadlines",
+                    "key_points",
+                }
+            )
+            context = f"Summary of the thread so far:\n{running}"
+
+        return f"""Summarize the following email thread in JSON format.
+
+{context}
+
+New messages in the thread:
+{sections}
+Provide one JSON object covering the whole thread, including earlier messages,
+with the following structure:
+{SUMMARY_SCHEMA}
+
+Respond ONLY with valid JSON, no other text."""
+
+    def _plan_summary_batches(self, emails: List[Email]) -> List[List[Email]]:
+        """Group emails into batches that fit the prompt and output budgets.
+
+        A batch answer holds one summary per email, so besides the prompt
+        token budget each batch is capped at ``gemini_max_emails_per_batch``
+        emails and at as many summaries as fit ``gemini_max_output_tokens``.
+        A truncated answer would send every email in it to a single call.
+
+        Args:
+            emails: Emails to group
+
+        Returns:
+            List of email batches
+        """
+        budget = self.settings.gemini_batch_token_budget
+        overhead = self._estimate_tokens(self._build_batch_summary_prompt([]))
+        max_emails = max(
+            min(
+                self.settings.gemini_max_emails_per_batch,
+                self.settings.gemini_max_output_tokens // SUMMARY_OUTPUT_TOKENS,
+            ),
+            1,
+        )
+
+        batches: List[List[Email]] = []
+        current: List[Email] = []
+        used = overhead
+
+        for email in emails:
+            cost = self._estimate_tokens(self._format_batch_email(email))
+            if current and (used + cost > budget or len(current) >= max_emails):
+                batches.append(current)
+                current, used = [], overhead
+            current.append(email)
+            used += cost
+
+        if current:
+            batches.append(current)
+
+        return batches
+
+    def _estimate_tokens(self, text: str) -> int:
+        """Estimate the token count of a prompt fragment.
+
+        Args:
+            text: Prompt text
+
+        Returns:
+            Approximate number of tokens
+        """
+        return len(text) // CHARS_PER_TOKEN + 1
+
+    def _format_batch_email(self, email: Email) -> str:
+        """Format a single email section of a batch prompt.
+
+        Args:
+            email: Email to format
+
+        Returns:
+            Prompt section text
+        """
+        return f"""---
+Email ID: {email.id}
+Email Subject: {email.subject}
+From: {email.sender}
+Date: {email.date}
+Body:
+{email.text[:2000]}
+"""
+
+    def _build_batch_summary_prompt(self, emails: List[Email]) -> str:
+        """Build a prompt that summarizes several emails at once.
+
+        Args:
+            emails: Emails to summarize
+
+        Returns:
+            Prompt text
+        """
+        sections = "\n".join(self._format_batch_email(email) for email in emails)
+        return f"""Analyze each of the following emails and provide a structured summary for each in JSON format.
+
+{sections}
+Provide a JSON array with one object per email. Each object must include the
+"email_id" given above and the following structure:
+{SUMMARY_SCHEMA}
+
+Respond ONLY with a valid JSON array, no other text."""
+
+    def _parse_batch_summaries(
+        self, emails: List[Email], response_text: str
+    ) -> Dict[str, EmailSummary]:
+        """Parse a batch summarization response.
+
+        Entries that are malformed or reference unknown email IDs are skipped
+        so that callers can fall back to single-email calls for them.
+
+        Args:
+            emails: Emails included in the batch prompt
+            response_text: Raw model response
+
+        Returns:
+            Dictionary of email ID to summary
+        """
+        by_id = {email.id: email for email in emails}
+        results = json.loads(self._strip_code_fence(response_text))
+        if not isinstance(results, list):
+            raise ValueError("Batch summary response is not a JSON array")
+
+        summaries: Dict[str, EmailSummary] = {}
+        for result in results:
+            email = by_id.get(result.get("email_id")) if isinstance(result, dict) else None
+            if email is None:
+                continue
+            try:
+                summaries[email.id] = self._summary_from_result(email, result)
+            except Exception as e:
+                logger.debug(f"Malformed batch summary for {email.id}: {e}")
 
         return summaries
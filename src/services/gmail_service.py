@@ -1,17 +1,21 @@
 """Gmail API service for email operations."""
 
 import base64
+import json
 import pickle
+from concurrent.futures.process import BrokenProcessPool
 from email.mime.application import MIMEApplication
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 
 from config import Settings
 from src.models import Email
@@ -25,6 +29,34 @@ SCOPES = [
     "https://www.googleapis.com/auth/gmail.modify",
 ]
 
+# Gmail API accepts at most 100 calls per batch HTTP request
+GMAIL_BATCH_LIMIT = 100
+
+# users.messages.batchModify accepts at most 1000 message IDs per call
+GMAIL_MODIFY_LIMIT = 1000
+
+# Headers requested in the metadata phase of a two-phase fetch
+METADATA_HEADERS = [
+    "From",
+    "To",
+    "Cc",
+    "Subject",
+    "Date",
+    "Message-ID",
+    "In-Reply-To",
+    "References",
+    "Precedence",
+]
+
+# Precedence header values of bulk mail that is triaged without a body
+BULK_PRECEDENCE = {"bulk", "junk"}
+
+# Failure recorded for messages deleted before they could be fetched
+MESSAGE_NOT_FOUND = "Message not found"
+
+# Syncs that may fail to fetch a pending message before it is dropped
+MAX_FETCH_ATTEMPTS = 5
+
 
 class GmailService:
     """Gmail API service for email operations."""
@@ -37,7 +69,16 @@ class GmailService:
         """
         self.settings = settings
         self.service = None
-        self.parser = EmailParser()
+        self.parser = EmailParser(
+            max_part_bytes=settings.email_max_part_bytes,
+            keep_html=settings.email_keep_html,
+            text_max_chars=settings.email_text_max_chars,
+            html_extractor=settings.email_html_extractor,
+            html_text_budget=settings.email_html_text_budget,
+            strip_quoted=settings.email_strip_quoted,
+        )
+        self._parse_pool = None
+        self._parse_workers = 0
         self._initialize_service()
 
     def _initialize_service(self) -> None:
@@ -112,6 +153,30 @@ class GmailService:
         Returns:
             List of Email objects
         """
+        emails, failures = self.fetch_emails_batched(max_results=max_results, query=query)
+
+        if failures:
+            logger.warning(
+                f"Failed to fetch {len(failures)} emails", failed_ids=list(failures)
+            )
+
+        return emails
+
+    def fetch_emails_batched(
+        self, max_results: int = 50, query: str = "is:unread"
+    ) -> Tuple[List[Email], Dict[str, str]]:
+        """Fetch emails from Gmail using batch HTTP requests.
+
+        Message bodies are retrieved with up to 100 ``get`` calls per batch
+        request instead of one round trip per message.
+
+        Args:
+            max_results: Maximum number of emails to fetch
+            query: Gmail search query
+
+        Returns:
+            Tuple of (emails, failures) where failures maps message ID to error
+        """
         try:
             logger.info(f"Fetching emails with query: {query}", max_results=max_results)
 
@@ -122,26 +187,508 @@ class GmailService:
                 .execute()
             )
 
-            messages = results.get("messages", [])
-            emails = []
+            message_ids = [message["id"] for message in results.get("messages", [])]
+
+        except Exception as e:
+            logger.error(f"Error fetching emails: {e}", exc_info=True)
+            return [], {}
+
+        emails, failures = self._get_emails(message_ids)
+
+        logger.info(f"Fetched {len(emails)} emails successfully", failed=len(failures))
+        return emails, failures
+
+    def sync_emails(self, max_results: int = 50) -> Tuple[List[Email], Optional[str]]:
+        """Fetch unread inbox messages added since the last sync.
+
+        Uses ``users.history.list`` from a persisted ``historyId`` checkpoint,
+        so a cycle with no new mail costs a single small API call. Without a
+        checkpoint, or when Gmail reports it as expired, a full ``is:unread``
+        resync runs.
 
-            for message in messages:
-                msg = (
-                    self.service.users()
-                    .messages()
-                    .get(userId="me", id=message["id"], format="full")
-                    .execute()
+        The checkpoint is not advanced here. Every listed message, fetched or
+        not, is stored in ``pending_ids`` until the caller reports it as
+        processed through ``commit_sync_state``, so a cycle that never
+        finishes leaves its messages to be fetched again. Newly added
+        messages are fetched ahead of carried-over ones; messages that no
+        longer exist, or that fail ``MAX_FETCH_ATTEMPTS`` syncs in a row,
+        are dropped.
+
+        Args:
+            max_results: Maximum number of emails to fetch
+
+        Returns:
+            Tuple of (emails, history ID to commit once they are processed,
+            or None when no checkpoint should be stored)
+        """
+        state = self._load_sync_state()
+        if not state.get("history_id"):
+            return self._full_sync(max_results)
+
+        try:
+            added_ids, history_id = self._list_history(state["history_id"])
+        except HttpError as e:
+            if e.resp.status == 404:
+                logger.warning("Gmail history checkpoint expired, running full resync")
+                return self._full_sync(max_results)
+            logger.error(f"Error listing Gmail history: {e}")
+            return [], None
+        except Exception as e:
+            logger.error(f"Error listing Gmail history: {e}", exc_info=True)
+            return [], None
+
+        message_ids = list(dict.fromkeys(added_ids + state.get("pending_ids", [])))
+        attempts = state.get("attempts", {})
+        self._save_sync_state(state["history_id"], message_ids, attempts)
+
+        emails, failures = self._get_emails(message_ids[:max_results])
+        self._record_failures(state["history_id"], message_ids, attempts, failures)
+
+        logger.info(
+            f"Synced {len(emails)} emails from history",
+            failed=len(failures),
+            deferred=max(len(message_ids) - max_results, 0),
+        )
+        return emails, history_id
+
+    def _full_sync(self, max_results: int) -> Tuple[List[Email], Optional[str]]:
+        """Fetch the newest unread emails.
+
+        The history ID is read before listing, so messages that arrive while
+        the resync runs are picked up by the next incremental sync. Only the
+        newest ``max_results`` unread messages are kept pending, so new mail
+        never queues behind an old unread backlog.
+
+        Args:
+            max_results: Maximum number of emails to fetch
+
+        Returns:
+            Tuple of (emails, history ID to commit once they are processed)
+        """
+        try:
+            history_id = self.service.users().getProfile(userId="me").execute()["historyId"]
+        except Exception as e:
+            logger.error(f"Error reading Gmail profile: {e}", exc_info=True)
+            return self.fetch_emails(max_results=max_results, query="is:unread"), None
+
+        try:
+            message_ids = self._list_message_ids("is:unread", limit=max_results)
+        except Exception as e:
+            logger.error(f"Error listing unread emails: {e}", exc_info=True)
+            return [], None
+
+        self._save_sync_state(None, message_ids)
+        emails, failures = self._get_emails(message_ids)
+        self._record_failures(None, message_ids, {}, failures)
+
+        logger.info(
+            "Full Gmail resync completed",
+            emails=len(emails),
+            failed=len(failures),
+            history_id=history_id,
+        )
+        return emails, history_id
+
+    def commit_sync_state(self, history_id: str, processed_ids: List[str]) -> None:
+        """Advance the sync checkpoint after a cycle has handled its emails.
+
+        Args:
+            history_id: History ID returned by ``sync_emails``
+            processed_ids: IDs of the emails the cycle processed
+        """
+        state = self._load_sync_state()
+        processed = set(processed_ids)
+        pending_ids = [
+            message_id
+            for message_id in state.get("pending_ids", [])
+            if message_id not in processed
+        ]
+        self._save_sync_state(history_id, pending_ids, state.get("attempts", {}))
+
+    def _record_failures(
+        self,
+        history_id: Optional[str],
+        message_ids: List[str],
+        attempts: Dict[str, int],
+        failures: Dict[str, str],
+    ) -> None:
+        """Count failed fetches and drop messages that will never succeed.
+
+        Args:
+            history_id: Checkpoint to keep
+            message_ids: Pending message IDs
+            attempts: Failed fetches so far by message ID, updated in place
+            failures: Failures of this sync by message ID
+        """
+        if not failures:
+            return
+
+        dropped = set()
+        for message_id, error in failures.items():
+            attempts[message_id] = attempts.get(message_id, 0) + 1
+            if error == MESSAGE_NOT_FOUND or attempts[message_id] >= MAX_FETCH_ATTEMPTS:
+                dropped.add(message_id)
+
+        if dropped:
+            logger.warning(
+                f"Dropping {len(dropped)} unfetchable emails", dropped_ids=sorted(dropped)
+            )
+            message_ids = [message_id for message_id in message_ids if message_id not in dropped]
+
+        self._save_sync_state(history_id, message_ids, attempts)
+
+    def _list_message_ids(self, query: str, limit: int) -> List[str]:
+        """List the IDs of the newest messages matching a query.
+
+        Args:
+            query: Gmail search query
+            limit: Maximum number of IDs to list
+
+        Returns:
+            Message IDs, newest first
+        """
+        message_ids: List[str] = []
+        page_token = None
+
+        while len(message_ids) < limit:
+            response = (
+                self.service.users()
+                .messages()
+                .list(
+                    userId="me",
+                    q=query,
+                    maxResults=min(limit - len(message_ids), 500),
+                    pageToken=page_token,
+                )
+                .execute()
+            )
+            message_ids.extend(message["id"] for message in response.get("messages", []))
+
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+
+        return message_ids[:limit]
+
+    def _list_history(self, start_history_id: str) -> Tuple[List[str], str]:
+        """List unread inbox messages added after a history checkpoint.
+
+        Args:
+            start_history_id: History ID of the last checkpoint
+
+        Returns:
+            Tuple of (added message IDs in history order, latest history ID)
+        """
+        message_ids: List[str] = []
+        history_id = start_history_id
+        page_token = None
+
+        while True:
+            response = (
+                self.service.users()
+                .history()
+                .list(
+                    userId="me",
+                    startHistoryId=start_history_id,
+                    historyTypes=["messageAdded"],
+                    labelId="INBOX",
+                    pageToken=page_token,
                 )
+                .execute()
+            )
+
+            for record in response.get("history", []):
+                for added in record.get("messagesAdded", []):
+                    message = added.get("message", {})
+                    if "UNREAD" in message.get("labelIds", ["UNREAD"]):
+                        message_ids.append(message["id"])
+
+            history_id = response.get("historyId", history_id)
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+
+        return list(dict.fromkeys(message_ids)), history_id
+
+    def _get_emails(self, message_ids: List[str]) -> Tuple[List[Email], Dict[str, str]]:
+        """Fetch and parse messages by ID.
+
+        With ``gmail_metadata_first``, headers and labels are fetched first
+        and full bodies only for messages that pass the triage pre-filter.
+        The rest are returned with a deferred body (``body_loaded`` False)
+        that is fetched on ``Email.resolve_body()``.
+
+        Args:
+            message_ids: IDs of the messages to fetch
+
+        Returns:
+            Tuple of (emails, failures) where failures maps message ID to error
+        """
+        if not self.settings.gmail_metadata_first:
+            return self._parse_messages(*self._batch_get_messages(message_ids))
+
+        messages, failures = self._batch_get_messages(
+            message_ids, format="metadata", metadata_headers=METADATA_HEADERS
+        )
+        triaged_ids = {msg.get("id") for msg in messages if self._can_triage(msg)}
+        emails, failures = self._parse_messages(messages, failures)
+
+        for email in emails:
+            email.set_body_loader(partial(self.get_body, email.id))
+
+        failures.update(self.load_bodies([e for e in emails if e.id not in triaged_ids]))
+        emails = [email for email in emails if email.id not in failures]
+
+        logger.debug(
+            f"Fetched {len(emails)} emails metadata-first",
+            triaged=len(triaged_ids),
+        )
+        return emails, failures
+
+    def _parse_messages(
+        self, messages: List[Dict], failures: Dict[str, str]
+    ) -> Tuple[List[Email], Dict[str, str]]:
+        """Parse raw Gmail messages into Email objects.
+
+        Args:
+            messages: Raw Gmail messages
+            failures: Failures so far, extended with parse errors
+
+        Returns:
+            Tuple of (emails, failures)
+        """
+        emails = []
+        pool = self._get_parse_pool()
+        try:
+            parsed = self.parser.parse_many(messages, executor=pool, workers=self._parse_workers)
+        except BrokenProcessPool as e:
+            # A worker was killed (e.g. out of memory); the next batch gets a new pool
+            logger.warning(f"Email parse pool broke, parsing in-process: {e}")
+            self.close()
+            parsed = self.parser.parse_many(messages)
+
+        for msg, parsed_email in zip(messages, parsed):
+            try:
+                if isinstance(parsed_email, Exception):
+                    raise parsed_email
+                email = Email.from_parsed(parsed_email)
+                if email.quarantined_addresses:
+                    logger.warning(
+                        f"Quarantined malformed addresses in email {email.id}",
+                        count=len(email.quarantined_addresses),
+                    )
+                emails.append(email)
+            except Exception as e:
+                logger.error(f"Error parsing email {msg.get('id')}: {e}")
+                failures[msg.get("id", "")] = str(e)
 
-                parsed_email = self.parser.parse_gmail_message(msg)
-                emails.append(Email(**parsed_email))
+        return emails, failures
 
-            logger.info(f"Fetched {len(emails)} emails successfully")
-            return emails
+    def _get_parse_pool(self):
+        """Get the process pool used to parse fetched batches.
 
+        Returns:
+            Process pool, or None to parse in-process
+        """
+        workers = self.settings.email_parse_workers
+        if workers <= 1:
+            return None
+
+        if self._parse_pool is None:
+            self._parse_pool = self.parser.create_pool(workers)
+            self._parse_workers = workers
+            logger.info("Email parse pool started", workers=workers)
+        return self._parse_pool
+
+    def close(self) -> None:
+        """Release resources held by the service."""
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+            self._parse_pool = None
+            self._parse_workers = 0
+
+    def _can_triage(self, message: Dict) -> bool:
+        """Check whether a message can be triaged from headers and labels alone.
+
+        Args:
+            message: Gmail message fetched with format="metadata"
+
+        Returns:
+            True if the full body is not needed
+        """
+        if set(message.get("labelIds", [])) & set(self.settings.gmail_triage_labels_list):
+            return True
+
+        for header in message.get("payload", {}).get("headers", []):
+            if header["name"].lower() == "precedence":
+                return header["value"].strip().lower() in BULK_PRECEDENCE
+        return False
+
+    def load_bodies(self, emails: List[Email]) -> Dict[str, str]:
+        """Fetch deferred bodies for several emails in batch requests.
+
+        Args:
+            emails: Emails whose body may not be loaded yet
+
+        Returns:
+            Failures by message ID
+        """
+        pending = {email.id: email for email in emails if not email.body_loaded}
+        if not pending:
+            return {}
+
+        messages, failures = self._batch_get_messages(list(pending))
+        for msg in messages:
+            try:
+                pending[msg["id"]].set_body(self._body_fields(msg))
+            except Exception as e:
+                logger.error(f"Error parsing email body {msg.get('id')}: {e}")
+                failures[msg.get("id", "")] = str(e)
+
+        return failures
+
+    def get_body(self, email_id: str) -> Optional[Dict]:
+        """Fetch the body fields of a single email.
+
+        Args:
+            email_id: Email ID
+
+        Returns:
+            Dict with body, html_body and attachments, or None on failure
+        """
+        try:
+            msg = (
+                self.service.users()
+                .messages()
+                .get(userId="me", id=email_id, format="full")
+                .execute()
+            )
+            return self._body_fields(msg)
         except Exception as e:
-            logger.error(f"Error fetching emails: {e}", exc_info=True)
-            return []
+            logger.error(f"Error fetching email body {email_id}: {e}")
+            return None
+
+    def _body_fields(self, message: Dict) -> Dict:
+        """Extract the body fields of a full Gmail message.
+
+        Args:
+            message: Gmail message fetched with format="full"
+
+        Returns:
+            Dict with body, html_body, attachments, text and sizes
+        """
+        parsed = self.parser.parse_gmail_message(message)
+        return {
+            key: parsed[key]
+            for key in ("body", "html_body", "attachments", "text", "body_size", "html_size")
+        }
+
+    def _load_sync_state(self) -> Dict:
+        """Load the incremental sync checkpoint.
+
+        Returns:
+            Dictionary with ``history_id``, ``pending_ids`` and ``attempts``,
+            or empty
+        """
+        path = Path(self.settings.gmail_sync_state_path)
+        if not path.exists():
+            return {}
+
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable Gmail sync state: {e}")
+            return {}
+
+    def _save_sync_state(
+        self,
+        history_id: Optional[str],
+        pending_ids: List[str],
+        attempts: Optional[Dict[str, int]] = None,
+    ) -> None:
+        """Persist the incremental sync checkpoint.
+
+        Args:
+            history_id: Latest processed history ID (None forces a full resync)
+            pending_ids: Message IDs still to be processed
+            attempts: Failed fetches by message ID, pruned to pending IDs
+        """
+        pending = set(pending_ids)
+        attempts = {
+            message_id: count
+            for message_id, count in (attempts or {}).items()
+            if message_id in pending
+        }
+        path = Path(self.settings.gmail_sync_state_path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(
+                json.dumps(
+                    {
+                        "history_id": str(history_id) if history_id else None,
+                        "pending_ids": pending_ids,
+                        "attempts": attempts,
+                    }
+                ),
+                encoding="utf-8",
+            )
+            tmp_path.replace(path)
+        except Exception as e:
+            logger.error(f"Error saving Gmail sync state: {e}")
+
+    def _batch_get_messages(
+        self,
+        message_ids: List[str],
+        format: str = "full",
+        metadata_headers: Optional[List[str]] = None,
+    ) -> Tuple[List[Dict], Dict[str, str]]:
+        """Retrieve raw Gmail messages in batches.
+
+        Args:
+            message_ids: IDs of the messages to retrieve
+            format: Gmail message format
+            metadata_headers: Headers to include with format="metadata" (optional)
+
+        Returns:
+            Tuple of (messages in request order, failures by message ID)
+        """
+        responses: Dict[str, Dict] = {}
+        failures: Dict[str, str] = {}
+
+        def _on_response(request_id: str, response: Dict, exception: Exception) -> None:
+            if isinstance(exception, HttpError) and exception.resp.status == 404:
+                failures[request_id] = MESSAGE_NOT_FOUND
+            elif exception is not None:
+                failures[request_id] = str(exception)
+            else:
+                responses[request_id] = response
+
+        params = {"format": format}
+        if metadata_headers:
+            params["metadataHeaders"] = metadata_headers
+
+        for start in range(0, len(message_ids), GMAIL_BATCH_LIMIT):
+            chunk = message_ids[start : start + GMAIL_BATCH_LIMIT]
+            batch = self.service.new_batch_http_request(callback=_on_response)
+
+            for message_id in chunk:
+                batch.add(
+                    self.service.users().messages().get(userId="me", id=message_id, **params),
+                    request_id=message_id,
+                )
+
+            try:
+                batch.execute()
+            except Exception as e:
+                logger.error(f"Error executing batch request: {e}")
+                for message_id in chunk:
+                    if message_id not in responses and message_id not in failures:
+                        failures[message_id] = str(e)
+
+        # Index by request ID so the result order never depends on callback order
+        messages = [responses[i] for i in message_ids if i in responses]
+        return messages, failures
 
     def send_email(
         self,
@@ -196,6 +743,51 @@ class GmailService:
             logger.error(f"Error sending email: {e}", exc_info=True)
             return False
 
+    def watch(self, topic_name: str, label_ids: Optional[List[str]] = None) -> Optional[Dict]:
+        """Register Gmail push notifications to a Pub/Sub topic.
+
+        Watches expire after at most seven days and must be renewed.
+
+        Args:
+            topic_name: Topic path (projects/<project>/topics/<name>)
+            label_ids: Labels to watch (defaults to INBOX)
+
+        Returns:
+            Watch response with ``historyId`` and ``expiration`` (epoch ms),
+            or None on failure
+        """
+        try:
+            response = (
+                self.service.users()
+                .watch(
+                    userId="me",
+                    body={
+                        "topicName": topic_name,
+                        "labelIds": label_ids or ["INBOX"],
+                        "labelFilterBehavior": "include",
+                    },
+                )
+                .execute()
+            )
+            logger.info("Gmail watch registered", expiration=response.get("expiration"))
+            return response
+        except Exception as e:
+            logger.error(f"Error registering Gmail watch: {e}")
+            return None
+
+    def stop_watch(self) -> bool:
+        """Stop Gmail push notifications.
+
+        Returns:
+            True if successful
+        """
+        try:
+            self.service.users().stop(userId="me").execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error stopping Gmail watch: {e}")
+            return False
+
     def mark_as_read(self, email_id: str) -> bool:
         """Mark email as read.
 
@@ -214,6 +806,79 @@ class GmailService:
             logger.error(f"Error marking email as read: {e}")
             return False
 
+    def mark_as_read_batch(self, email_ids: List[str]) -> List[str]:
+        """Mark several emails as read with batchModify.
+
+        Args:
+            email_ids: Email IDs
+
+        Returns:
+            IDs that could not be marked as read
+        """
+        return self.batch_modify(email_ids, remove_label_ids=["UNREAD"])
+
+    def add_label_batch(self, email_ids: List[str], label_id: str) -> List[str]:
+        """Add a label to several emails with batchModify.
+
+        Args:
+            email_ids: Email IDs
+            label_id: Label ID
+
+        Returns:
+            IDs that could not be labelled
+        """
+        return self.batch_modify(email_ids, add_label_ids=[label_id])
+
+    def batch_modify(
+        self,
+        email_ids: List[str],
+        add_label_ids: Optional[List[str]] = None,
+        remove_label_ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """Change labels on many emails with up to 1000 IDs per call.
+
+        batchModify succeeds or fails as a whole, so the IDs of a failed
+        call are retried one by one with ``messages.modify``.
+
+        Args:
+            email_ids: Email IDs
+            add_label_ids: Labels to add (optional)
+            remove_label_ids: Labels to remove (optional)
+
+        Returns:
+            IDs whose labels could not be changed
+        """
+        body = {}
+        if add_label_ids:
+            body["addLabelIds"] = add_label_ids
+        if remove_label_ids:
+            body["removeLabelIds"] = remove_label_ids
+
+        email_ids = list(dict.fromkeys(email_ids))
+        failed: List[str] = []
+
+        for start in range(0, len(email_ids), GMAIL_MODIFY_LIMIT):
+            chunk = email_ids[start : start + GMAIL_MODIFY_LIMIT]
+            try:
+                self.service.users().messages().batchModify(
+                    userId="me", body={"ids": chunk, **body}
+                ).execute()
+                continue
+            except Exception as e:
+                logger.warning(f"batchModify failed, retrying {len(chunk)} emails one by one: {e}")
+
+            for email_id in chunk:
+                try:
+                    self.service.users().messages().modify(
+                        userId="me", id=email_id, body=body
+                    ).execute()
+                except Exception as e:
+                    logger.error(f"Error modifying labels of {email_id}: {e}")
+                    failed.append(email_id)
+
+        logger.debug(f"Modified labels of {len(email_ids) - len(failed)} emails")
+        return failed
+
     def add_label(self, email_id: str, label_id: str) -> bool:
         """Add label to email.
 
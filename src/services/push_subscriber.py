@@ -0,0 +1,232 @@
+"""Subscribers for Gmail push notifications."""
+
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional
+
+from config import Settings
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class PushSubscriber(ABC):
+    """Interface for sources of Gmail change notifications.
+
+    A notification is the decoded Pub/Sub payload Gmail publishes, e.g.
+    ``{"emailAddress": "me@example.com", "historyId": "1234"}``.
+    """
+
+    @abstractmethod
+    async def receive(self, timeout: Optional[float] = None) -> List[dict]:
+        """Wait for notifications.
+
+        Args:
+            timeout: Seconds to wait before giving up (None waits forever)
+
+        Returns:
+            All notifications available when the first one arrives, or an
+            empty list on timeout
+        """
+
+    def close(self) -> None:
+        """Release subscriber resources."""
+
+
+class QueueSubscriber(PushSubscriber):
+    """In-process subscriber fed through ``publish``, for tests and embedding."""
+
+    def __init__(self):
+        """Initialize queue subscriber."""
+        self.queue: "asyncio.Queue[dict]" = asyncio.Queue()
+
+    def publish(self, notification: dict) -> None:
+        """Publish a notification.
+
+        Args:
+            notification: Notification payload
+        """
+        self.queue.put_nowait(notification)
+
+    async def receive(self, timeout: Optional[float] = None) -> List[dict]:
+        """Wait for notifications."""
+        try:
+            notifications = [await asyncio.wait_for(self.queue.get(), timeout)]
+        except asyncio.TimeoutError:
+            return []
+
+        while not self.queue.empty():
+            notifications.append(self.queue.get_nowait())
+        return notifications
+
+
+class FileSubscriber(PushSubscriber):
+    """Subscriber that tails a JSON Lines file.
+
+    A local stand-in for Pub/Sub: anything that appends one JSON
+    notification per line (a webhook, a script, a test) triggers a fetch.
+    """
+
+    def __init__(self, path: Path, poll_interval: float = 0.5):
+        """Initialize file subscriber.
+
+        Args:
+            path: Notification file path
+            poll_interval: Seconds between checks for new lines
+        """
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+
+        # Only notifications written after startup are delivered
+        self._offset = self.path.stat().st_size if self.path.exists() else 0
+
+    def publish(self, notification: dict) -> None:
+        """Append a notification to the file.
+
+        Args:
+            notification: Notification payload
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(notification) + "\n")
+
+    async def receive(self, timeout: Optional[float] = None) -> List[dict]:
+        """Wait for notifications."""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        while True:
+            notifications = self._read_new()
+            if notifications:
+                return notifications
+            if deadline is not None and loop.time() >= deadline:
+                return []
+            await asyncio.sleep(self.poll_interval)
+
+    def _read_new(self) -> List[dict]:
+        """Read complete lines appended since the last read.
+
+        Returns:
+            Decoded notifications
+        """
+        if not self.path.exists():
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+
+        # Leave a partially written last line for the next read
+        end = data.rfind(b"\n") + 1
+        self._offset += end
+
+        notifications = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                notifications.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping malformed push notification: {e}")
+        return notifications
+
+
+class PubSubSubscriber(PushSubscriber):
+    """Subscriber that pulls from a Google Cloud Pub/Sub subscription.
+
+    Requires the optional ``google-cloud-pubsub`` package.
+    """
+
+    def __init__(self, subscription: str, max_messages: int = 100):
+        """Initialize Pub/Sub subscriber.
+
+        Args:
+            subscription: Subscription path (projects/<project>/subscriptions/<name>)
+            max_messages: Maximum messages per pull
+        """
+        from google.cloud import pubsub_v1
+
+        self.subscription = subscription
+        self.max_messages = max_messages
+        self.client = pubsub_v1.SubscriberClient()
+
+    async def receive(self, timeout: Optional[float] = None) -> List[dict]:
+        """Wait for notifications."""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        while deadline is None or loop.time() < deadline:
+            remaining = 60.0 if deadline is None else max(deadline - loop.time(), 1.0)
+            try:
+                notifications = await asyncio.to_thread(self._pull, remaining)
+            except Exception as e:
+                logger.warning(f"Pub/Sub pull failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            if notifications:
+                return notifications
+
+        return []
+
+    def _pull(self, timeout: float) -> List[dict]:
+        """Pull and acknowledge one batch of messages.
+
+        Args:
+            timeout: Seconds to wait for messages
+
+        Returns:
+            Decoded notifications
+        """
+        from google.api_core.exceptions import DeadlineExceeded
+
+        try:
+            response = self.client.pull(
+                request={"subscription": self.subscription, "max_messages": self.max_messages},
+                timeout=timeout,
+            )
+        except DeadlineExceeded:
+            return []
+
+        if not response.received_messages:
+            return []
+
+        self.client.acknowledge(
+            request={
+                "subscription": self.subscription,
+                "ack_ids": [m.ack_id for m in response.received_messages],
+            }
+        )
+
+        notifications = []
+        for received in response.received_messages:
+            try:
+                notifications.append(json.loads(received.message.data))
+            except ValueError as e:
+                logger.warning(f"Skipping malformed push notification: {e}")
+        return notifications
+
+    def close(self) -> None:
+        """Release subscriber resources."""
+        self.client.close()
+
+
+def create_push_subscriber(settings: Settings) -> Optional[PushSubscriber]:
+    """Create the subscriber selected by ``gmail_push_mode``.
+
+    Args:
+        settings: Application settings
+
+    Returns:
+        Push subscriber, or None when push is disabled
+    """
+    mode = settings.gmail_push_mode
+    if mode == "off":
+        return None
+    if mode == "pubsub":
+        return PubSubSubscriber(settings.gmail_pubsub_subscription)
+    if mode == "file":
+        return FileSubscriber(Path(settings.gmail_push_file_path))
+
+    raise ValueError(f"Unknown push mode: {mode}")
@@ -1,18 +1,31 @@
 """RAG service for duplicate email detection using vector embeddings."""
 
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import chromadb
+import numpy as np
 from chromadb.config import Settings as ChromaSettings
-from sentence_transformers import SentenceTransformer
 
 from config import Settings
 from src.models import DuplicateEmailGroup, Email
-from src.utils import get_logger
+from src.utils import as_utc, get_logger
+
+from .embedding_registry import get_embedding_model, is_model_loaded
+from .fingerprint_index import FingerprintIndex
 
 logger = get_logger(__name__)
 
+COLLECTION_NAME = "email_embeddings"
+
+# Migrations and rebuilds write here first, then replace the original collection
+STAGING_SUFFIX = "_staging"
+
 
 class RAGService:
     """RAG service for email duplicate detection and similarity search."""
@@ -24,61 +37,377 @@ class RAGService:
             settings: Application settings
         """
         self.settings = settings
-        self.embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
+
+        # Loaded from the shared registry on first encode
+        self._embedding_model: Any = None
+
+        # LRU of embeddings keyed by (email ID, content hash)
+        self._embedding_cache: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._embedding_cache_lock = threading.Lock()
 
         # Initialize ChromaDB
         persist_dir = Path(settings.chroma_persist_directory)
         persist_dir.mkdir(parents=True, exist_ok=True)
 
-        self.client = chromadb.Client(
-            ChromaSettings(
-                persist_directory=str(persist_dir),
-                anonymized_telemetry=False,
+        self.client = chromadb.PersistentClient(
+            path=str(persist_dir),
+            settings=ChromaSettings(anonymized_telemetry=False),
+        )
+
+        self.collection = self._open_collection()
+
+        # Exact and near-exact duplicates are answered before the vector search
+        self.fingerprints: Optional[FingerprintIndex] = None
+        if settings.fingerprint_enabled:
+            self.fingerprints = FingerprintIndex(
+                Path(settings.fingerprint_index_path),
+                max_distance=settings.fingerprint_max_distance,
             )
+
+        logger.info(
+            "RAG service initialized successfully",
+            metric=self.settings.vector_distance_metric,
+            vectors_loaded=self.get_email_count(),
+            persist_directory=str(persist_dir),
+        )
+
+    @property
+    def embedding_model(self) -> Any:
+        """Get the embedding model, loading it on first access."""
+        if self._embedding_model is None:
+            self._embedding_model = get_embedding_model(
+                self.settings.embedding_model_name,
+                backend=self.settings.embedding_backend,
+                threads=self.settings.embedding_threads,
+            )
+        return self._embedding_model
+
+    @embedding_model.setter
+    def embedding_model(self, model: Any) -> None:
+        """Override the embedding model."""
+        self._embedding_model = model
+
+    @property
+    def model_loaded(self) -> bool:
+        """Check whether the embedding model has been loaded."""
+        return self._embedding_model is not None or is_model_loaded(
+            self.settings.embedding_model_name,
+            backend=self.settings.embedding_backend,
+            threads=self.settings.embedding_threads,
+        )
+
+    def warm_up(self) -> None:
+        """Load the embedding model ahead of the first encode."""
+        try:
+            self.embedding_model.encode(["warm up"], normalize_embeddings=True)
+        except Exception as e:
+            logger.error(f"Error warming up embedding model: {e}")
+
+    def _collection_metadata(self) -> dict:
+        """Get metadata for newly created collections.
+
+        Returns:
+            Collection metadata including the HNSW distance metric
+        """
+        return {
+            "description": "Email content embeddings for duplicate detection",
+            "hnsw:space": self.settings.vector_distance_metric,
+        }
+
+    def _open_collection(self, name: str = COLLECTION_NAME):
+        """Open the embeddings collection, migrating it if its metric differs.
+
+        A staging collection left by an interrupted migration or rebuild is
+        recovered first.
+
+        Args:
+            name: Collection name
+
+        Returns:
+            Chroma collection using the configured distance metric
+        """
+        self._recover_staging(name)
+        collection = self.client.get_or_create_collection(
+            name=name, metadata=self._collection_metadata()
         )
 
-        self.collection = self.client.get_or_create_collection(
-            name="email_embeddings",
-            metadata={"description": "Email content embeddings for duplicate detection"},
+        # Collections created without hnsw:space use Chroma's default (l2)
+        current = (collection.metadata or {}).get("hnsw:space", "l2")
+        if current != self.settings.vector_distance_metric:
+            collection = self.migrate_collection(collection)
+
+        return collection
+
+    def _find_collection(self, name: str):
+        """Get a collection if it exists.
+
+        Args:
+            name: Collection name
+
+        Returns:
+            Chroma collection or None
+        """
+        try:
+            return self.client.get_collection(name)
+        except Exception:
+            return None
+
+    def _recover_staging(self, name: str) -> None:
+        """Finish or discard a collection swap interrupted by a crash.
+
+        The original is only deleted once its staging copy is complete. A
+        missing or empty original next to a non-empty staging copy means the
+        process died between the delete and the rename, so the rename is
+        finished. Otherwise the staging copy is partial and is dropped.
+
+        Args:
+            name: Collection name
+        """
+        staging = self._find_collection(name + STAGING_SUFFIX)
+        if staging is None:
+            return
+
+        original = self._find_collection(name)
+        if (original is None or original.count() == 0) and staging.count() > 0:
+            logger.warning(f"Restoring collection {name} from interrupted swap")
+            self._swap_in(staging, name)
+        else:
+            logger.warning(f"Discarding incomplete staging collection for {name}")
+            self.client.delete_collection(staging.name)
+
+    def _swap_in(self, staging, name: str):
+        """Replace a collection with its completed staging copy.
+
+        Args:
+            staging: Staging collection
+            name: Name of the collection it replaces
+
+        Returns:
+            The staging collection under its new name
+        """
+        if self._find_collection(name) is not None:
+            self.client.delete_collection(name)
+        staging.modify(name=name)
+        return staging
+
+    def migrate_collection(self, collection, batch_size: int = 1000):
+        """Rebuild a collection with the configured distance metric.
+
+        Chroma cannot change the metric of an existing index, so stored
+        vectors are read back, normalized and copied into a staging
+        collection. The old collection is only dropped once the copy has
+        succeeded; the copy then takes over its name. A crash between the
+        two steps is recovered by _open_collection.
+
+        Args:
+            collection: Existing Chroma collection
+            batch_size: Number of vectors copied per write
+
+        Returns:
+            Migrated Chroma collection
+
+        Raises:
+            Exception: If the copy fails; the old collection is left intact
+        """
+        name = collection.name
+        staging_name = name + STAGING_SUFFIX
+        current = (collection.metadata or {}).get("hnsw:space", "l2")
+        logger.info(
+            f"Migrating collection {name} from {current} to "
+            f"{self.settings.vector_distance_metric}"
         )
 
-        logger.info("RAG service initialized successfully")
+        data = collection.get(include=["embeddings", "documents", "metadatas"])
+        migrated = self.client.create_collection(
+            name=staging_name, metadata=self._collection_metadata()
+        )
 
-    def add_email(self, email: Email) -> None:
+        ids = data["ids"]
+        try:
+            if ids:
+                vectors = np.asarray(data["embeddings"], dtype=np.float32)
+                vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+                for start in range(0, len(ids), batch_size):
+                    end = start + batch_size
+                    migrated.add(
+                        ids=ids[start:end],
+                        embeddings=vectors[start:end].tolist(),
+                        documents=data["documents"][start:end] if data["documents"] else None,
+                        metadatas=data["metadatas"][start:end] if data["metadatas"] else None,
+                    )
+        except Exception as e:
+            logger.error(f"Error migrating collection {name}, keeping the old index: {e}")
+            self.client.delete_collection(staging_name)
+            raise
+
+        migrated = self._swap_in(migrated, name)
+
+        logger.info(f"Migrated {len(ids)} vectors to {self.settings.vector_distance_metric}")
+        return migrated
+
+    def add_email(self, email: Email) -> List[float]:
         """Add email to vector store.
 
         Args:
             email: Email object to add
+
+        Returns:
+            Email embedding, for reuse in find_similar_emails
         """
-        try:
-            # Create embedding text from subject and body
-            embedding_text = f"{email.subject}\n\n{email.body[:1000]}"
+        embeddings = self.upsert_emails([email])
+        return embeddings[0] if embeddings else []
+
+    def add_emails(
+        self, emails: List[Email], embeddings: Optional[List[List[float]]] = None
+    ) -> List[List[float]]:
+        """Add emails to vector store.
+
+        Args:
+            emails: Email objects to add
+            embeddings: Precomputed embeddings aligned with emails (optional)
+
+        Returns:
+            Embeddings of the given emails, for reuse in queries
+        """
+        return self.upsert_emails(emails, embeddings=embeddings)
+
+    def upsert_emails(
+        self, emails: List[Email], embeddings: Optional[List[List[float]]] = None
+    ) -> List[List[float]]:
+        """Insert or update emails in the vector store with a single batched write.
+
+        Upserting an ID that is already stored replaces it, so re-processing
+        the same email is idempotent.
+
+        Args:
+            emails: Email objects to store
+            embeddings: Precomputed embeddings aligned with emails (optional)
 
-            # Generate embedding
-            embedding = self.embedding_model.encode(embedding_text).tolist()
+        Returns:
+            Embeddings of the given emails, for reuse in queries
+        """
+        if not emails:
+            return []
 
-            # Add to collection
-            self.collection.add(
-                embeddings=[embedding],
-                documents=[embedding_text],
-                metadatas=[
+        try:
+            # Generate embeddings in one batch
+            if embeddings is None:
+                embeddings = self.encode_emails(emails)
+
+            # Skip repeated IDs within the batch
+            seen = set()
+            ids, batch_embeddings, documents, metadatas = [], [], [], []
+            for email, embedding in zip(emails, embeddings):
+                if email.id in seen:
+                    continue
+                seen.add(email.id)
+                ids.append(email.id)
+                batch_embeddings.append(embedding)
+                documents.append(self._embedding_text(email))
+                metadatas.append(
                     {
                         "email_id": email.id,
                         "subject": email.subject,
                         "sender": email.sender,
                         "date": email.date.isoformat(),
+                        "date_ts": as_utc(email.date).timestamp(),
+                        "thread_id": email.thread_id or "",
                     }
-                ],
-                ids=[email.id],
+                )
+
+            self.collection.upsert(
+                embeddings=batch_embeddings,
+                documents=documents,
+                metadatas=metadatas,
+                ids=ids,
             )
 
-            logger.debug(f"Added email to vector store: {email.id}")
+            logger.debug(f"Upserted {len(ids)} emails to vector store")
 
         except Exception as e:
-            logger.error(f"Error adding email to RAG: {e}", exc_info=True)
+            logger.error(f"Error adding emails to RAG: {e}", exc_info=True)
+
+        return embeddings or []
+
+    def encode_emails(self, emails: List[Email]) -> List[List[float]]:
+        """Encode emails into embeddings with one batched model call.
+
+        Emails already encoded with the same content are served from an
+        in-memory LRU; only the remaining texts reach the model.
+
+        Args:
+            emails: Emails to encode
+
+        Returns:
+            List of embeddings aligned with emails
+        """
+        texts = [self._embedding_text(email) for email in emails]
+        keys = [
+            (email.id, hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest())
+            for email, text in zip(emails, texts)
+        ]
+
+        embeddings: List[Optional[List[float]]] = [self._cached_embedding(k) for k in keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        if missing:
+            encoded = self.embedding_model.encode(
+                [texts[i] for i in missing],
+                batch_size=self.settings.embedding_batch_size,
+                normalize_embeddings=True,
+            ).tolist()
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = embedding
+                self._cache_embedding(keys[i], embedding)
+
+        return embeddings
+
+    def _cached_embedding(self, key: Tuple[str, str]) -> Optional[List[float]]:
+        """Look up an embedding in the LRU.
+
+        Args:
+            key: (email ID, content hash)
+
+        Returns:
+            Cached embedding or None
+        """
+        with self._embedding_cache_lock:
+            embedding = self._embedding_cache.get(key)
+            if embedding is not None:
+                self._embedding_cache.move_to_end(key)
+            return embedding
+
+    def _cache_embedding(self, key: Tuple[str, str], embedding: List[float]) -> None:
+        """Store an embedding in the LRU, evicting the oldest entries.
+
+        Args:
+            key: (email ID, content hash)
+            embedding: Embedding vector
+        """
+        with self._embedding_cache_lock:
+            self._embedding_cache[key] = embedding
+            self._embedding_cache.move_to_end(key)
+            while len(self._embedding_cache) > self.settings.embedding_cache_size:
+                self._embedding_cache.popitem(last=False)
+
+    def _embedding_text(self, email: Email) -> str:
+        """Build the text embedded for an email.
+
+        Args:
+            email: Email to embed
+
+        Returns:
+            Embedding text from subject and body
+        """
+        return f"{email.subject}\n\n{email.text[:1000]}"
 
     def find_similar_emails(
-        self, email: Email, threshold: float = 0.85, limit: int = 10
+        self,
+        email: Email,
+        threshold: float = 0.85,
+        limit: int = 10,
+        embedding: Optional[List[float]] = None,
     ) -> List[Tuple[str, float]]:
         """Find similar emails using vector similarity.
 
@@ -86,53 +415,178 @@ class RAGService:
             email: Email to find duplicates for
             threshold: Similarity threshold (0-1)
             limit: Maximum number of results
+            embedding: Precomputed embedding, e.g. returned by add_email (optional)
 
         Returns:
             List of (email_id, similarity_score) tuples
         """
-        try:
-            # Create embedding text
-            embedding_text = f"{email.subject}\n\n{email.body[:1000]}"
-
-            # Generate embedding
-            embedding = self.embedding_model.encode(embedding_text).tolist()
+        return self.find_similar_batch(
+            [email],
+            threshold=threshold,
+            limit=limit,
+            embeddings=[embedding] if embedding else None,
+        ).get(email.id, [])
+
+    def find_similar_batch(
+        self,
+        emails: List[Email],
+        threshold: float = 0.85,
+        limit: int = 10,
+        embeddings: Optional[List[List[float]]] = None,
+    ) -> Dict[str, List[Tuple[str, float]]]:
+        """Find similar emails for a batch with a single multi-vector query.
+
+        The stored copies of the batch's own emails are excluded from the
+        vector search, so no result slot is spent on a self-match. Matches
+        between emails of the same batch are scored in memory instead.
+        Replies quote the messages they answer, so matches from the same
+        Gmail thread are not reported as duplicates.
 
-            # Query similar emails
-            results = self.collection.query(
-                query_embeddings=[embedding], n_results=limit, include=["distances", "metadatas"]
-            )
+        Args:
+            emails: Emails to find duplicates for
+            threshold: Similarity threshold (0-1)
+            limit: Maximum number of results per email
+            embeddings: Precomputed embeddings aligned with emails (optional)
 
-            similar_emails = []
+        Returns:
+            Dictionary of email ID to list of (email_id, similarity_score) tuples
+        """
+        if not emails:
+            return {}
 
-            if results["ids"] and results["ids"][0]:
-                for i, email_id in enumerate(results["ids"][0]):
-                    # Skip self-match
-                    if email_id == email.id:
+        try:
+            if embeddings is None:
+                embeddings = self.encode_emails(emails)
+
+            batch_ids = list(dict.fromkeys(email.id for email in emails))
+            similar_by_email: Dict[str, List[Tuple[str, float]]] = {
+                email.id: [] for email in emails
+            }
+
+            # Query similar emails stored by earlier cycles
+            if self.collection.count() > 0:
+                results = self.collection.query(
+                    query_embeddings=embeddings,
+                    n_results=limit,
+                    where={"email_id": {"$nin": batch_ids}},
+                    include=["distances", "metadatas"],
+                )
+
+                for row, email in enumerate(emails):
+                    ids = results["ids"][row] if results["ids"] else []
+                    for i, email_id in enumerate(ids):
+                        metadata = results["metadatas"][row][i] or {}
+                        if email.thread_id and metadata.get("thread_id") == email.thread_id:
+                            continue
+                        similarity = self._distance_to_similarity(results["distances"][row][i])
+                        if similarity >= threshold:
+                            similar_by_email[email.id].append((email_id, similarity))
+
+            # Score matches within the batch itself (embeddings are normalized)
+            vectors = np.asarray(embeddings, dtype=np.float32)
+            similarities = vectors @ vectors.T
+
+            for row, email in enumerate(emails):
+                for col, other in enumerate(emails):
+                    if other.id == email.id:
                         continue
-
-                    # Convert distance to similarity (1 - normalized distance)
-                    distance = results["distances"][0][i]
-                    similarity = 1 - (distance / 2)  # Normalize L2 distance to 0-1
-
+                    if email.thread_id and other.thread_id == email.thread_id:
+                        continue
+                    similarity = float(similarities[row, col])
                     if similarity >= threshold:
-                        similar_emails.append((email_id, similarity))
+                        similar_by_email[email.id].append((other.id, similarity))
+
+            for email_id, similar_emails in similar_by_email.items():
+                similar_emails.sort(key=lambda match: match[1], reverse=True)
+                del similar_emails[limit:]
 
             logger.debug(
-                f"Found {len(similar_emails)} similar emails for {email.id}",
+                f"Queried similar emails for {len(emails)} emails",
                 threshold=threshold,
             )
 
-            return similar_emails
+            return similar_by_email
 
         except Exception as e:
             logger.error(f"Error finding similar emails: {e}", exc_info=True)
-            return []
+            return {}
+
+    def _distance_to_similarity(self, distance: float) -> float:
+        """Convert a vector store distance to cosine similarity.
+
+        Embeddings are unit-normalized, so every supported metric maps
+        exactly onto cosine similarity.
+
+        Args:
+            distance: Distance reported by Chroma for the configured metric
+
+        Returns:
+            Cosine similarity score
+        """
+        if self.settings.vector_distance_metric == "l2":
+            # Chroma reports squared L2: ||a - b||^2 = 2 - 2 * cos
+            return 1 - distance / 2
+
+        # cosine: 1 - cos, ip: 1 - a.b
+        return 1 - distance
+
+    def find_similar_and_upsert(
+        self, emails: List[Email], threshold: float = 0.85, limit: int = 10
+    ) -> Dict[str, List[Tuple[str, float]]]:
+        """Find neighbours for a batch of emails, then store them.
+
+        Emails whose body matches the fingerprint index are answered there
+        and skip encoding entirely. The rest are queried before the write,
+        which keeps the batch's own vectors out of the search, and the
+        upsert makes re-runs idempotent. Each remaining email is encoded once.
+
+        Args:
+            emails: Emails to check and store
+            threshold: Similarity threshold (0-1)
+            limit: Maximum number of results per email
+
+        Returns:
+            Dictionary of email ID to list of (email_id, similarity_score) tuples
+        """
+        if not emails:
+            return {}
+
+        fingerprint_matches: Dict[str, Tuple[str, float]] = {}
+        if self.fingerprints is not None:
+            fingerprint_matches = self.fingerprints.match_and_add(emails, threshold=threshold)
+
+        similar = {
+            email_id: [match] for email_id, match in fingerprint_matches.items()
+        }
+        remaining = [email for email in emails if email.id not in fingerprint_matches]
+        if not remaining:
+            return similar
+
+        try:
+            embeddings = self.encode_emails(remaining)
+        except Exception as e:
+            logger.error(f"Error encoding emails: {e}", exc_info=True)
+            return similar
+
+        similar.update(
+            self.find_similar_batch(
+                remaining, threshold=threshold, limit=limit, embeddings=embeddings
+            )
+        )
+        self.upsert_emails(remaining, embeddings=embeddings)
+
+        return similar
 
     def detect_duplicates(
         self, emails: List[Email], threshold: float = 0.85
     ) -> List[DuplicateEmailGroup]:
         """Detect duplicate emails in a batch.
 
+        All emails are encoded once and compared in memory. Pairs at or above
+        the threshold are merged with union-find, so the groups do not depend
+        on input order. The earliest email (by date, then ID) of each group
+        is its primary.
+
         Args:
             emails: List of emails to check
             threshold: Similarity threshold
@@ -141,33 +595,54 @@ class RAGService:
             List of duplicate email groups
         """
         try:
-            duplicate_groups = []
-            processed_ids = set()
+            # Collapse repeated IDs so each email is a single node
+            unique = list({email.id: email for email in emails}.values())
+            if len(unique) < 2:
+                return []
 
-            for email in emails:
-                if email.id in processed_ids:
-                    continue
+            vectors = np.asarray(self.encode_emails(unique), dtype=np.float32)
 
-                # Find similar emails
-                similar = self.find_similar_emails(email, threshold=threshold)
+            parent = list(range(len(unique)))
 
-                if similar:
-                    duplicate_ids = [eid for eid, _ in similar]
-                    similarity_scores = [score for _, score in similar]
+            def find(node: int) -> int:
+                while parent[node] != node:
+                    parent[node] = parent[parent[node]]
+                    node = parent[node]
+                return node
 
-                    group = DuplicateEmailGroup(
-                        primary_email_id=email.id,
-                        duplicate_ids=duplicate_ids,
-                        similarity_scores=similarity_scores,
-                        subject=email.subject,
-                        count=len(duplicate_ids) + 1,
-                    )
+            for rows, cols in self._similar_pairs(vectors, threshold):
+                for row, col in zip(rows.tolist(), cols.tolist()):
+                    root_a, root_b = find(row), find(col)
+                    if root_a != root_b:
+                        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+            components: Dict[int, List[int]] = {}
+            for node in range(len(unique)):
+                components.setdefault(find(node), []).append(node)
+
+            duplicate_groups = []
+            for members in components.values():
+                if len(members) < 2:
+                    continue
 
-                    duplicate_groups.append(group)
+                members.sort(key=lambda n: (unique[n].date, unique[n].id))
+                primary, others = members[0], members[1:]
+                scores = vectors[others] @ vectors[primary]
+                ranked = sorted(
+                    zip(others, scores.tolist()), key=lambda m: (-m[1], unique[m[0]].id)
+                )
+
+                duplicate_groups.append(
+                    DuplicateEmailGroup(
+                        primary_email_id=unique[primary].id,
+                        duplicate_ids=[unique[n].id for n, _ in ranked],
+                        similarity_scores=[score for _, score in ranked],
+                        subject=unique[primary].subject,
+                        count=len(members),
+                    )
+                )
 
-                    # Mark all as processed
-                    processed_ids.add(email.id)
-                    processed_ids.update(duplicate_ids)
+            duplicate_groups.sort(key=lambda g: g.primary_email_id)
 
             logger.info(f"Detected {len(duplicate_groups)} duplicate groups")
             return duplicate_groups
@@ -176,6 +651,274 @@ class RAGService:
             logger.error(f"Error detecting duplicates: {e}", exc_info=True)
             return []
 
+    def _similar_pairs(
+        self, vectors: np.ndarray, threshold: float, block_size: int = 1024
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yield index pairs whose cosine similarity meets the threshold.
+
+        The similarity matrix is computed in row blocks so memory stays
+        bounded for large batches. Only pairs with row < col are yielded.
+
+        Args:
+            vectors: Unit-normalized embedding matrix
+            threshold: Similarity threshold
+            block_size: Number of rows per block
+
+        Yields:
+            Tuples of (row indices, column indices) arrays
+        """
+        for start in range(0, len(vectors), block_size):
+            block = vectors[start : start + block_size] @ vectors[start:].T
+            rows, cols = np.nonzero(np.triu(block >= threshold, k=1))
+            yield rows + start, cols + start
+
+    def rebuild_index(self, batches: Iterable[List[Email]], allow_empty: bool = False) -> int:
+        """Re-embed emails batch by batch into a staging collection and swap it in.
+
+        The current index is only replaced once the rebuild has finished, and
+        not at all when nothing was indexed unless ``allow_empty`` is set.
+        Emails outside the retention policy are not re-indexed, so a rebuild
+        never brings back what retention evicted. Fingerprints are upserted
+        in place; stale ones age out with retention.
+
+        Args:
+            batches: Iterable of email batches, e.g. EmailArchive.iter_batches()
+            allow_empty: Replace the index even if no emails were indexed
+
+        Returns:
+            Number of emails indexed
+        """
+        name = self.collection.name
+        staging_name = name + STAGING_SUFFIX
+        if self._find_collection(staging_name) is not None:
+            self.client.delete_collection(staging_name)
+        staging = self.client.create_collection(
+            name=staging_name, metadata=self._collection_metadata()
+        )
+        cutoff = self.retention_cutoff()
+
+        # upsert_emails writes to self.collection; point it at the staging copy
+        live, self.collection = self.collection, staging
+        indexed = 0
+        try:
+            for batch in batches:
+                if cutoff is not None:
+                    batch = [email for email in batch if as_utc(email.date) >= cutoff]
+                self.upsert_emails(batch)
+                if self.fingerprints is not None:
+                    self.fingerprints.add(batch)
+                indexed += len(batch)
+                logger.info(f"Re-indexed {indexed} emails")
+        except Exception:
+            self.collection = live
+            self.client.delete_collection(staging_name)
+            raise
+
+        if not indexed and not allow_empty:
+            logger.warning("Rebuild indexed no emails, keeping the current index")
+            self.collection = live
+            self.client.delete_collection(staging_name)
+            return 0
+
+        self.collection = self._swap_in(staging, name)
+
+        # Apply the count cap to the rebuilt store
+        while True:
+            result = self.enforce_retention()
+            indexed -= result["evicted"]
+            if not result["evicted"] or not result["pending"]:
+                break
+
+        return indexed
+
+    def retention_cutoff(self) -> Optional[datetime]:
+        """Get the email date before which emails fall outside retention.
+
+        Vectors, fingerprints and the email archive are all pruned against
+        this cutoff.
+
+        Returns:
+            Timezone-aware cutoff, or None if age-based retention is disabled
+        """
+        if self.settings.vector_retention_days <= 0:
+            return None
+        return datetime.now(timezone.utc) - timedelta(days=self.settings.vector_retention_days)
+
+    def select_evictions(
+        self, cutoff: Optional[datetime] = None, limit: Optional[int] = None
+    ) -> List[str]:
+        """Select one chunk of stored emails that fall outside the retention policy.
+
+        Emails dated before ``cutoff`` are found with a ``date_ts`` metadata
+        filter. Only when the store still exceeds ``vector_max_count`` after
+        those are the stored dates scanned for the oldest remaining emails.
+        Nothing is deleted.
+
+        Args:
+            cutoff: Email date cutoff from retention_cutoff() (optional)
+            limit: Maximum number of emails to select
+                (defaults to ``retention_batch_size``)
+
+        Returns:
+            Email IDs to evict, expired emails first
+        """
+        limit = limit or self.settings.retention_batch_size
+
+        selected: List[str] = []
+        if cutoff is not None:
+            selected = self._expired_ids(cutoff, limit)
+
+        if self.settings.vector_max_count <= 0 or len(selected) >= limit:
+            return selected
+
+        excess = self.collection.count() - len(selected) - self.settings.vector_max_count
+        if excess <= 0:
+            return selected
+
+        chosen = set(selected)
+        oldest = sorted(
+            (entry for entry in self._scan_dates() if entry[0] not in chosen),
+            key=lambda entry: entry[1],
+        )
+        count = min(excess, limit - len(selected))
+        return selected + [email_id for email_id, _ in oldest[:count]]
+
+    def _expired_ids(self, cutoff: datetime, limit: int) -> List[str]:
+        """Get stored emails dated before a cutoff.
+
+        Args:
+            cutoff: Email date cutoff
+            limit: Maximum number of IDs to return
+
+        Returns:
+            Email IDs
+        """
+        return self.collection.get(
+            where={"date_ts": {"$lt": cutoff.timestamp()}}, limit=limit, include=[]
+        )["ids"]
+
+    def enforce_retention(self, max_deletions: Optional[int] = None) -> dict:
+        """Evict one chunk of emails that fall outside the retention policy.
+
+        Call repeatedly until ``pending`` is zero to compact incrementally.
+        Each call costs a count and a filtered read; the stored dates are
+        only scanned while the store is over ``vector_max_count``.
+        Fingerprints of emails dated before the cutoff are removed as well,
+        including those of duplicates that never reached the vector store.
+
+        Args:
+            max_deletions: Maximum number of emails to evict in this call
+                (defaults to ``retention_batch_size``)
+
+        Returns:
+            Dictionary with evicted count, estimated bytes reclaimed and
+            a lower bound on the emails still pending eviction (zero once
+            nothing is due)
+        """
+        limit = max_deletions or self.settings.retention_batch_size
+
+        try:
+            cutoff = self.retention_cutoff()
+            if self.fingerprints is not None and cutoff is not None:
+                self.fingerprints.evict_before(cutoff.timestamp())
+
+            chunk = self.select_evictions(cutoff, limit)
+            if not chunk:
+                return {"evicted": 0, "bytes_reclaimed": 0, "pending": 0}
+
+            bytes_reclaimed = self._estimate_bytes(chunk)
+            self.collection.delete(ids=chunk)
+            if self.fingerprints is not None:
+                self.fingerprints.remove(chunk)
+
+            pending = 0
+            if self.settings.vector_max_count > 0:
+                pending = max(self.collection.count() - self.settings.vector_max_count, 0)
+            if cutoff is not None and not pending:
+                pending = len(self._expired_ids(cutoff, 1))
+
+            logger.info(
+                f"Evicted {len(chunk)} emails from vector store",
+                bytes_reclaimed=bytes_reclaimed,
+                pending=pending,
+            )
+
+            return {
+                "evicted": len(chunk),
+                "bytes_reclaimed": bytes_reclaimed,
+                "pending": pending,
+            }
+
+        except Exception as e:
+            logger.error(f"Error enforcing retention: {e}", exc_info=True)
+            return {"evicted": 0, "bytes_reclaimed": 0, "pending": 0}
+
+    def _scan_dates(self, page_size: int = 1000) -> List[Tuple[str, datetime]]:
+        """Read the stored date of every email in pages.
+
+        Only needed to find the oldest emails beyond the count cap.
+
+        Args:
+            page_size: Number of metadata records per read
+
+        Returns:
+            List of (email_id, date) tuples
+        """
+        entries = []
+        offset = 0
+
+        while True:
+            page = self.collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+
+            for email_id, metadata in zip(page["ids"], page["metadatas"]):
+                entries.append((email_id, self._parse_stored_date(metadata)))
+            offset += len(page["ids"])
+
+        return entries
+
+    def _parse_stored_date(self, metadata: Optional[dict]) -> datetime:
+        """Parse the date metadata of a stored email.
+
+        Emails without a readable date are treated as new so they are never
+        evicted by age.
+
+        Args:
+            metadata: Stored metadata
+
+        Returns:
+            Timezone-aware datetime
+        """
+        try:
+            return as_utc(datetime.fromisoformat((metadata or {})["date"]))
+        except Exception:
+            return datetime.now(timezone.utc)
+
+    def _estimate_bytes(self, email_ids: List[str]) -> int:
+        """Estimate storage used by the given emails.
+
+        Args:
+            email_ids: Stored email IDs
+
+        Returns:
+            Approximate bytes of vectors, documents and metadata
+        """
+        records = self.collection.get(
+            ids=email_ids, include=["embeddings", "documents", "metadatas"]
+        )
+
+        total = 0
+        for i in range(len(records["ids"])):
+            embedding = records["embeddings"][i] if records["embeddings"] is not None else []
+            document = records["documents"][i] if records["documents"] else ""
+            metadata = records["metadatas"][i] if records["metadatas"] else {}
+            total += len(embedding) * 4
+            total += len((document or "").encode("utf-8"))
+            total += len(json.dumps(metadata or {}))
+
+        return total
+
     def get_email_count(self) -> int:
         """Get total number of emails in vector store.
 
@@ -190,11 +933,13 @@ class RAGService:
     def clear_store(self) -> None:
         """Clear all emails from vector store."""
         try:
-            self.client.delete_collection("email_embeddings")
+            name = self.collection.name
+            self.client.delete_collection(name)
             self.collection = self.client.create_collection(
-                name="email_embeddings",
-                metadata={"description": "Email content embeddings for duplicate detection"},
+                name=name, metadata=self._collection_metadata()
             )
+            if self.fingerprints is not None:
+                self.fingerprints.clear()
             logger.info("Vector store cleared")
         except Exception as e:
             logger.error(f"Error clearing vector store: {e}")
@@ -0,0 +1,172 @@
+"""Persistent content-hash cache for Gemini results."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+# A hit only rewrites an entry's access time once it is this many seconds old,
+# so repeated hits are plain reads without a commit
+ACCESS_REFRESH_SECONDS = 3600
+
+
+class SummaryCache:
+    """SQLite-backed cache of LLM results keyed by email content hash.
+
+    Entries expire after ``ttl_seconds`` and the least recently used entries
+    are evicted once the cache holds more than ``max_entries``. Access times
+    are tracked to within ``ACCESS_REFRESH_SECONDS``.
+    """
+
+    def __init__(self, path: Path, ttl_seconds: int = 604800, max_entries: int = 10000):
+        """Initialize summary cache.
+
+        Args:
+            path: SQLite database file path
+            ttl_seconds: Time-to-live for cache entries
+            max_entries: Maximum number of cached entries
+        """
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)"
+        )
+        self._conn.commit()
+
+        logger.info("Summary cache initialized", path=str(self.path))
+
+    @staticmethod
+    def make_key(kind: str, prompt_version: str, subject: str, body: str) -> str:
+        """Build a cache key from the content sent to the model.
+
+        Args:
+            kind: Result kind (e.g. summary, category)
+            prompt_version: Version of the prompt that produced the result
+            subject: Email subject
+            body: Truncated email body included in the prompt
+
+        Returns:
+            Hex digest cache key
+        """
+        digest = hashlib.sha256()
+        for part in (kind, prompt_version, subject, body):
+            digest.update(part.encode("utf-8", errors="ignore"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Look up a cached value.
+
+        Lookups are called from async code, so a hit only writes when the
+        entry's access time is stale. Expired entries are left for set()
+        to delete.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Decoded JSON value, or None on a miss
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, created_at, accessed_at FROM llm_cache WHERE key = ?",
+                    (key,),
+                ).fetchone()
+
+                if row is None or now - row[1] > self.ttl_seconds:
+                    self.misses += 1
+                    return None
+
+                if now - row[2] > ACCESS_REFRESH_SECONDS:
+                    self._conn.execute(
+                        "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                    )
+                    self._conn.commit()
+                self.hits += 1
+
+            return json.loads(row[0])
+
+        except Exception as e:
+            logger.error(f"Error reading summary cache: {e}")
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value and evict expired or excess entries.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now, now),
+                )
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+                )
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                self._conn.commit()
+
+        except Exception as e:
+            logger.error(f"Error writing summary cache: {e}")
+
+    def size(self) -> int:
+        """Get number of cached entries.
+
+        Returns:
+            Number of entries
+        """
+        try:
+            with self._lock:
+                return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        except Exception:
+            return 0
+
+    def get_stats(self) -> dict:
+        """Get cache hit/miss statistics.
+
+        Returns:
+            Statistics dictionary
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": self.size(),
+        }
@@ -0,0 +1,239 @@
+"""Header index of processed messages and running thread summaries."""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.models import Email, EmailSummary
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class ThreadIndex:
+    """SQLite-backed index keyed by Message-ID and thread.
+
+    Messages are recorded with the thread they belong to and the summary
+    produced for them. A message whose Message-ID is already recorded is
+    known (re-fetched, or the same mail delivered to two aliases) and can
+    reuse earlier results. Each thread keeps one running summary that
+    is updated as new replies arrive.
+    """
+
+    def __init__(self, path: Path):
+        """Initialize thread index.
+
+        Args:
+            path: SQLite database file path
+        """
+        self.path = Path(path)
+        self.known_hits = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                message_id TEXT PRIMARY KEY,
+                email_id TEXT NOT NULL,
+                thread_key TEXT NOT NULL,
+                summary TEXT,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS threads (
+                thread_key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                message_count INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+        logger.info("Thread index initialized", path=str(self.path))
+
+    def find_known(self, emails: List[Email]) -> Dict[str, dict]:
+        """Find emails whose Message-ID was already processed.
+
+        This covers re-fetches of the same email as well as the same message
+        delivered under another ID.
+
+        Args:
+            emails: Emails to check
+
+        Returns:
+            Dictionary of email ID to the stored record, with keys
+            ``email_id`` and ``summary`` (an EmailSummary or None)
+        """
+        known: Dict[str, dict] = {}
+
+        try:
+            with self._lock:
+                for email in emails:
+                    if not email.message_id:
+                        continue
+                    row = self._conn.execute(
+                        "SELECT email_id, summary FROM messages WHERE message_id = ?",
+                        (email.message_id,),
+                    ).fetchone()
+                    if row is None:
+                        continue
+                    known[email.id] = {
+                        "email_id": row[0],
+                        "summary": EmailSummary.model_validate_json(row[1]) if row[1] else None,
+                    }
+                self.known_hits += len(known)
+
+        except Exception as e:
+            logger.error(f"Error reading thread index: {e}")
+
+        return known
+
+    def thread_key(self, email: Email) -> str:
+        """Resolve the thread an email belongs to.
+
+        Gmail's thread ID is used when present. Otherwise the thread of the
+        nearest known message in In-Reply-To/References is used, falling back
+        to the email's own Message-ID (or ID).
+
+        Args:
+            email: Email to resolve
+
+        Returns:
+            Thread key
+        """
+        if email.thread_id:
+            return email.thread_id
+
+        parents = ([email.in_reply_to] if email.in_reply_to else []) + email.references[::-1]
+        try:
+            with self._lock:
+                for parent in parents:
+                    row = self._conn.execute(
+                        "SELECT thread_key FROM messages WHERE message_id = ?", (parent,)
+                    ).fetchone()
+                    if row is not None:
+                        return row[0]
+        except Exception as e:
+            logger.error(f"Error reading thread index: {e}")
+
+        # The thread root is shared by every reply that carries References
+        if email.references:
+            return email.references[0]
+        return email.message_id or email.id
+
+    def get_thread_summary(self, thread_key: str) -> Optional[EmailSummary]:
+        """Get the running summary of a thread.
+
+        Args:
+            thread_key: Thread key from thread_key()
+
+        Returns:
+            Latest thread summary, or None for new threads
+        """
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT summary FROM threads WHERE thread_key = ?", (thread_key,)
+                ).fetchone()
+            return EmailSummary.model_validate_json(row[0]) if row else None
+
+        except Exception as e:
+            logger.error(f"Error reading thread summary: {e}")
+            return None
+
+    def record(self, emails: List[Email], summaries: Dict[str, EmailSummary]) -> None:
+        """Record processed emails and update their threads' running summaries.
+
+        Args:
+            emails: Processed emails in chronological order
+            summaries: Dictionary of email ID to summary
+        """
+        now = time.time()
+        try:
+            rows = []
+            for email in emails:
+                summary = summaries.get(email.id)
+                rows.append(
+                    (
+                        email.message_id or email.id,
+                        email.id,
+                        self.thread_key(email),
+                        summary.model_dump_json() if summary else None,
+                    )
+                )
+
+            with self._lock:
+                for message_id, email_id, thread_key, summary in rows:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?)",
+                        (message_id, email_id, thread_key, summary, now),
+                    )
+                    if summary is None:
+                        continue
+                    self._conn.execute(
+                        "INSERT INTO threads VALUES (?, ?, 1, ?) "
+                        "ON CONFLICT(thread_key) DO UPDATE SET summary = excluded.summary, "
+                        "message_count = message_count + 1, updated_at = excluded.updated_at",
+                        (thread_key, summary, now),
+                    )
+                self._conn.commit()
+
+        except Exception as e:
+            logger.error(f"Error writing thread index: {e}")
+
+    def prune(self, cutoff: Optional[datetime]) -> dict:
+        """Forget messages and threads not touched since a cutoff.
+
+        Entries are aged by when they were recorded, which is never before
+        the email's own date, so nothing is dropped while its vectors are
+        still retained.
+
+        Args:
+            cutoff: Retention cutoff from RAGService.retention_cutoff()
+                (None keeps everything)
+
+        Returns:
+            Dictionary with the number of messages and threads removed
+        """
+        if cutoff is None:
+            return {"messages": 0, "threads": 0}
+
+        try:
+            with self._lock:
+                messages = self._conn.execute(
+                    "DELETE FROM messages WHERE created_at < ?", (cutoff.timestamp(),)
+                ).rowcount
+                threads = self._conn.execute(
+                    "DELETE FROM threads WHERE updated_at < ?", (cutoff.timestamp(),)
+                ).rowcount
+                self._conn.commit()
+
+        except Exception as e:
+            logger.error(f"Error pruning thread index: {e}")
+            return {"messages": 0, "threads": 0}
+
+        return {"messages": messages, "threads": threads}
+
+    def get_stats(self) -> dict:
+        """Get thread index statistics.
+
+        Returns:
+            Statistics dictionary
+        """
+        try:
+            with self._lock:
+                messages = self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+                threads = self._conn.execute("SELECT COUNT(*) FROM threads").fetchone()[0]
+        except Exception:
+            messages = threads = 0
+
+        return {"known_hits": self.known_hits, "messages": messages, "threads": threads}
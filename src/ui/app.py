@@ -1,6 +1,7 @@
 """FastAPI web UI for Email Agent configuration and monitoring."""
 
 import asyncio
+import threading
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException
@@ -10,6 +11,7 @@ from fastapi.staticfiles import StaticFiles
 
 from config import get_settings
 from src.agents import EmailAgent
+from src.services.push_subscriber import create_push_subscriber
 from src.utils import get_logger, setup_logging
 
 logger = get_logger(__name__)
@@ -30,31 +32,76 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize agent
 settings = get_settings()
 setup_logging(settings.debug)
-agent = EmailAgent(settings)
 
-# Background task for periodic email checking
+# Agent is built on first use so importing the app stays cheap
+_agent: EmailAgent | None = None
+_agent_lock = threading.Lock()
+
+# Background tasks for email checking, model warm-up and retention
 email_check_task = None
+warmup_task = None
+retention_task = None
+push_subscriber = None
+
+
+def get_agent() -> EmailAgent:
+    """Get the shared email agent, creating it on first use.
+
+    Returns:
+        EmailAgent instance
+    """
+    global _agent
+    if _agent is None:
+        with _agent_lock:
+            if _agent is None:
+                _agent = EmailAgent(settings)
+    return _agent
+
+
+async def warm_up() -> None:
+    """Build the agent and load the embedding model off the event loop."""
+    try:
+        agent = await asyncio.to_thread(get_agent)
+        await asyncio.to_thread(agent.rag_service.warm_up)
+        logger.info("Email Agent warm-up completed")
+    except Exception as e:
+        logger.error(f"Error warming up Email Agent: {e}")
 
 
 @app.on_event("startup")
 async def startup_event():
     """Start background tasks on app startup."""
-    global email_check_task
+    global email_check_task, warmup_task, retention_task, push_subscriber
     logger.info("Starting Email Agent Dashboard")
 
-    if settings.email_check_interval > 0:
+    if settings.embedding_warmup:
+        warmup_task = asyncio.create_task(warm_up())
+
+    if settings.gmail_push_mode != "off":
+        email_check_task = asyncio.create_task(push_email_check())
+    elif settings.email_check_interval > 0:
         email_check_task = asyncio.create_task(periodic_email_check())
 
+    if settings.retention_interval > 0:
+        retention_task = asyncio.create_task(periodic_retention())
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up on shutdown."""
-    global email_check_task
+    global email_check_task, warmup_task, retention_task
     if email_check_task:
         email_check_task.cancel()
+    if warmup_task:
+        warmup_task.cancel()
+    if retention_task:
+        retention_task.cancel()
+    if push_subscriber:
+        push_subscriber.close()
+    if _agent is not None:
+        _agent.gmail_service.close()
 
     logger.info("Email Agent Dashboard shut down")
 
@@ -65,6 +112,7 @@ async def periodic_email_check():
         try:
             await asyncio.sleep(settings.email_check_interval)
             logger.info("Running periodic email check")
+            agent = await asyncio.to_thread(get_agent)
             await agent.process_emails()
         except asyncio.CancelledError:
             break
@@ -72,6 +120,65 @@ async def periodic_email_check():
             logger.error(f"Error in periodic email check: {e}")
 
 
+async def push_email_check():
+    """Process emails on Gmail push notifications, polling as a fallback."""
+    global push_subscriber
+    try:
+        push_subscriber = create_push_subscriber(settings)
+        agent = await asyncio.to_thread(get_agent)
+        await agent.run_push_trigger(
+            push_subscriber, fallback_interval=settings.email_check_interval or None
+        )
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        logger.error(f"Error in push email check, falling back to polling: {e}")
+        if settings.email_check_interval > 0:
+            await periodic_email_check()
+
+
+async def periodic_retention():
+    """Periodically evict vectors outside the retention policy.
+
+    Eviction runs in small chunks so it never blocks a processing cycle for
+    long. The email archive is then compacted with the same cutoff, so
+    rebuild-index cannot bring evicted emails back, and the thread index is
+    pruned with it.
+    """
+    while True:
+        try:
+            await asyncio.sleep(settings.retention_interval)
+            agent = await asyncio.to_thread(get_agent)
+
+            evicted = 0
+            bytes_reclaimed = 0
+            while True:
+                result = await asyncio.to_thread(agent.rag_service.enforce_retention)
+                evicted += result["evicted"]
+                bytes_reclaimed += result["bytes_reclaimed"]
+                if not result["evicted"] or not result["pending"]:
+                    break
+                await asyncio.sleep(0)
+
+            cutoff = agent.rag_service.retention_cutoff()
+            archived = await asyncio.to_thread(agent.archive.compact, cutoff)
+            pruned = await asyncio.to_thread(agent.thread_index.prune, cutoff)
+
+            if evicted or archived["dropped"] or pruned["messages"]:
+                logger.info(
+                    "Retention run completed",
+                    evicted=evicted,
+                    bytes_reclaimed=bytes_reclaimed,
+                    archive_dropped=archived["dropped"],
+                    threads_pruned=pruned["threads"],
+                    messages_pruned=pruned["messages"],
+                )
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            logger.error(f"Error in periodic retention: {e}")
+
+
 @app.get("/", response_class=HTMLResponse)
 async def root():
     """Serve main dashboard page."""
@@ -237,6 +344,7 @@ async def root():
 async def get_stats():
     """Get agent statistics."""
     try:
+        agent = await asyncio.to_thread(get_agent)
         stats = agent.get_statistics()
         return JSONResponse(content=stats)
     except Exception as e:
@@ -248,6 +356,7 @@ async def get_stats():
 async def process_emails():
     """Manually trigger email processing."""
     try:
+        agent = await asyncio.to_thread(get_agent)
         result = await agent.process_emails()
         return JSONResponse(content=result)
     except Exception as e:
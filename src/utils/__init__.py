@@ -1,6 +1,7 @@
 """Utilities module."""
 
+from .dates import as_utc
 from .email_parser import EmailParser
 from .logger import get_logger, setup_logging
 
-__all__ = ["EmailParser", "get_logger", "setup_logging"]
+__all__ = ["EmailParser", "as_utc", "get_logger", "setup_logging"]
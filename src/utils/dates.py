@@ -0,0 +1,15 @@
+"""Date and time helpers."""
+
+from datetime import datetime, timezone
+
+
+def as_utc(date: datetime) -> datetime:
+    """Treat naive datetimes as UTC so they compare with aware cutoffs.
+
+    Args:
+        date: Naive or timezone-aware datetime
+
+    Returns:
+        Timezone-aware datetime
+    """
+    return date if date.tzinfo is not None else date.replace(tzinfo=timezone.utc)
@@ -1,25 +1,316 @@
 """Email parsing and processing utilities."""
 
 import base64
+import multiprocessing
 import re
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
 from datetime import datetime
 from email.mime.text import MIMEText
 from email.utils import parseaddr
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 import html2text
 from bs4 import BeautifulSoup
 
 
+# Default cap on decoded bytes per MIME part
+DEFAULT_MAX_PART_BYTES = 1024 * 1024
+
+# Default cap on the working text consumers read instead of the full body
+DEFAULT_TEXT_MAX_CHARS = 8000
+
+# Default cap on text extracted from an HTML-only body
+DEFAULT_HTML_TEXT_BUDGET = 64 * 1024
+
+# HTML-to-text extractors, in "auto" preference order after "auto" itself
+HTML_EXTRACTORS = ("auto", "selectolax", "lxml", "html2text")
+
+# Elements whose content is never text
+NON_TEXT_TAGS = ("head", "style", "script", "noscript", "template")
+
+# Parser used by process-pool workers, created once per worker process
+_worker_parser: Optional["EmailParser"] = None
+
+
+# Line patterns for quoted history and signatures, matched against one
+# whitespace-normalized line at a time so cleaning stays linear in body size
+_REPLY_HEADER_START_RE = re.compile(r"(?:On|Le|Am|El|Il) ")
+_REPLY_HEADER_END_RE = re.compile(r"(?:wrote|a écrit|schrieb|escribió|ha scritto) ?:$")
+_SIGNATURE_RE = re.compile(r"(?:--|-{2,} ?Original Message ?-{2,})$", re.IGNORECASE)
+
+# An underscore rule separates Outlook history only when a header follows it;
+# elsewhere it is a table or section divider
+_OUTLOOK_SEPARATOR_RE = re.compile(r"_{10,}$")
+_OUTLOOK_HEADER_RE = re.compile(r"(?:From|Sent):", re.IGNORECASE)
+
+# Mobile sign-offs end the content only when at most this many unquoted
+# lines follow
+_MOBILE_SIGNATURE_RE = re.compile(r"(?:Sent from my \S.*|Get Outlook for \S.*)$", re.IGNORECASE)
+MOBILE_SIGNATURE_TAIL_LINES = 3
+
+
+def _body_lines(body: str) -> Iterator[str]:
+    """Yield whitespace-normalized body lines lazily.
+
+    Args:
+        body: Plain-text email body
+
+    Yields:
+        Lines with runs of whitespace collapsed
+    """
+    start = 0
+    while start < len(body):
+        end = body.find("\n", start)
+        if end == -1:
+            end = len(body)
+        yield " ".join(body[start:end].split())
+        start = end + 1
+
+
+def _content_lines(body: str, strip_quoted: bool = True) -> Iterator[str]:
+    """Yield whitespace-normalized body lines without quoted history.
+
+    Lines are read lazily, so callers that stop early never scan the rest
+    of the body. Quoted lines (``>``) and "On ... wrote:" headers, including
+    headers wrapped onto a second line, are skipped. A signature delimiter,
+    an underscore rule followed by a ``From:``/``Sent:`` header, or a
+    mobile sign-off within the last few lines ends the content.
+
+    Args:
+        body: Plain-text email body
+        strip_quoted: Skip quoted history and signatures
+
+    Yields:
+        Content lines
+    """
+    lines = _body_lines(body)
+    if not strip_quoted:
+        yield from lines
+        return
+
+    # Lines read ahead to classify a separator, replayed before the rest
+    replay: deque = deque()
+
+    def next_line() -> Optional[str]:
+        return replay.popleft() if replay else next(lines, None)
+
+    def read_ahead(limit: int) -> Tuple[List[str], int]:
+        # Read up to ``limit`` unquoted, non-blank lines
+        ahead: List[str] = []
+        found = 0
+        while found < limit:
+            line = next_line()
+            if line is None:
+                break
+            ahead.append(line)
+            if line and not line.startswith(">"):
+                found += 1
+        return ahead, found
+
+    held = None
+    while True:
+        line = next_line()
+        if line is None:
+            break
+
+        # A held line starting like a reply header is one only if the
+        # header ends on this line
+        if held is not None:
+            header, held = held, None
+            if _REPLY_HEADER_END_RE.search(line):
+                continue
+            yield header
+
+        if line.startswith(">"):
+            continue
+        if _REPLY_HEADER_START_RE.match(line):
+            if not _REPLY_HEADER_END_RE.search(line):
+                held = line
+            continue
+        if _SIGNATURE_RE.match(line):
+            return
+        if _OUTLOOK_SEPARATOR_RE.match(line):
+            ahead, found = read_ahead(1)
+            if found and _OUTLOOK_HEADER_RE.match(ahead[-1]):
+                return
+            replay.extendleft(reversed(ahead))
+        elif _MOBILE_SIGNATURE_RE.match(line):
+            ahead, found = read_ahead(MOBILE_SIGNATURE_TAIL_LINES + 1)
+            if found <= MOBILE_SIGNATURE_TAIL_LINES:
+                return
+            replay.extendleft(reversed(ahead))
+        yield line
+
+    if held is not None:
+        yield held
+
+
+def working_text(
+    body: str, max_chars: int = DEFAULT_TEXT_MAX_CHARS, strip_quoted: bool = True
+) -> str:
+    """Build the capped, cleaned text consumers work from.
+
+    The body is cleaned in one streaming pass that stops once ``max_chars``
+    characters are collected, so the cost does not grow with the size of
+    the message or its quoted history.
+
+    Args:
+        body: Plain-text email body
+        max_chars: Maximum length of the result
+        strip_quoted: Drop quoted replies, reply headers and signatures
+
+    Returns:
+        Body with runs of spaces collapsed, blank-line runs reduced to one
+        and at most ``max_chars`` characters
+    """
+    lines: List[str] = []
+    size = 0
+    for line in _content_lines(body, strip_quoted):
+        if line or (lines and lines[-1]):
+            lines.append(line)
+            size += len(line) + 1
+            if size > max_chars:
+                break
+
+    text = "\n".join(lines).strip()
+    if not text and strip_quoted:
+        # Keep something for emails that are entirely quoted or signature
+        return working_text(body, max_chars, strip_quoted=False)
+    return text[:max_chars]
+
+
+def resolve_html_extractor(name: str = "auto") -> str:
+    """Resolve an HTML extractor name to one that can be used here.
+
+    Args:
+        name: One of HTML_EXTRACTORS
+
+    Returns:
+        "selectolax" or "lxml" when requested (or, for "auto", the first
+        installed), otherwise "html2text"
+    """
+    if name not in HTML_EXTRACTORS:
+        raise ValueError(f"Unknown HTML extractor: {name}")
+
+    candidates = HTML_EXTRACTORS[1:3] if name == "auto" else (name,)
+    for candidate in candidates:
+        try:
+            if candidate == "selectolax":
+                import selectolax.lexbor  # noqa: F401
+            elif candidate == "lxml":
+                import lxml.html  # noqa: F401
+            return candidate
+        except ImportError:
+            continue
+
+    return "html2text"
+
+
+def _init_worker(kwargs: Dict) -> None:
+    """Create the parser of a process-pool worker."""
+    global _worker_parser
+    _worker_parser = EmailParser(**kwargs)
+
+
+def _parse_in_worker(message: Dict) -> Union[Dict, Exception]:
+    """Parse one message in a process-pool worker."""
+    try:
+        return _worker_parser.parse_gmail_message(message)
+    except Exception as e:
+        return e
+
+
 class EmailParser:
     """Email parser for processing Gmail API responses."""
 
-    def __init__(self):
-        """Initialize email parser."""
+    def __init__(
+        self,
+        max_part_bytes: int = DEFAULT_MAX_PART_BYTES,
+        keep_html: bool = True,
+        text_max_chars: int = DEFAULT_TEXT_MAX_CHARS,
+        html_extractor: str = "auto",
+        html_text_budget: int = DEFAULT_HTML_TEXT_BUDGET,
+        strip_quoted: bool = True,
+    ):
+        """Initialize email parser.
+
+        Args:
+            max_part_bytes: Maximum decoded bytes kept per MIME part
+            keep_html: Keep the decoded HTML part in ``html_body``; when off it
+                is only decoded if needed for the body and then dropped
+            text_max_chars: Maximum length of the working ``text`` field
+            html_extractor: HTML-to-text extractor (see HTML_EXTRACTORS)
+            html_text_budget: Maximum characters of text extracted from HTML
+            strip_quoted: Drop quoted replies and signatures from ``text``
+        """
+        self.max_part_bytes = max_part_bytes
+        self.keep_html = keep_html
+        self.text_max_chars = text_max_chars
+        self.html_extractor = resolve_html_extractor(html_extractor)
+        self.html_text_budget = html_text_budget
+        self.strip_quoted = strip_quoted
         self.html_converter = html2text.HTML2Text()
         self.html_converter.ignore_links = False
         self.html_converter.ignore_images = True
 
+    def create_pool(self, workers: int) -> ProcessPoolExecutor:
+        """Create a process pool for parse_many.
+
+        Workers are spawned rather than forked, since the pool is created
+        from worker threads of a running event loop.
+
+        Args:
+            workers: Number of worker processes
+
+        Returns:
+            Process pool whose workers share this parser's configuration
+        """
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(
+                {
+                    "max_part_bytes": self.max_part_bytes,
+                    "keep_html": self.keep_html,
+                    "text_max_chars": self.text_max_chars,
+                    "html_extractor": self.html_extractor,
+                    "html_text_budget": self.html_text_budget,
+                    "strip_quoted": self.strip_quoted,
+                },
+            ),
+        )
+
+    def parse_many(
+        self, messages: List[Dict], executor: Optional[Executor] = None, workers: int = 1
+    ) -> List[Union[Dict, Exception]]:
+        """Parse a batch of Gmail API messages.
+
+        Args:
+            messages: Gmail API message objects
+            executor: Pool from create_pool() to parse across processes (optional)
+            workers: Number of worker processes in the executor, used to size chunks
+
+        Returns:
+            Parsed email dictionaries in input order, with the exception in
+            place of any message that failed to parse
+
+        Raises:
+            BrokenProcessPool: If a worker died; the executor is unusable
+        """
+        if executor is None or len(messages) < 2:
+            results: List[Union[Dict, Exception]] = []
+            for message in messages:
+                try:
+                    results.append(self.parse_gmail_message(message))
+                except Exception as e:
+                    results.append(e)
+            return results
+
+        chunksize = max(1, len(messages) // (4 * max(workers, 1)))
+        return list(executor.map(_parse_in_worker, messages, chunksize=chunksize))
+
     def parse_gmail_message(self, message: Dict) -> Dict:
         """Parse Gmail API message into structured format.
 
@@ -30,12 +321,15 @@ class EmailParser:
             Parsed email dictionary
         """
         headers = self._parse_headers(message.get("payload", {}).get("headers", []))
-        body_data = self._extract_body(message.get("payload", {}))
+        reply_ids = self._parse_message_ids(headers.get("in-reply-to", ""))
+        body_data = self._walk_payload(message.get("payload", {}))
 
         return {
             "id": message.get("id"),
             "message_id": headers.get("message-id", ""),
             "thread_id": message.get("threadId"),
+            "in_reply_to": reply_ids[0] if reply_ids else None,
+            "references": self._parse_message_ids(headers.get("references", "")),
             "sender": self._parse_email_address(headers.get("from", "")),
             "sender_name": self._parse_sender_name(headers.get("from", "")),
             "recipients": self._parse_email_list(headers.get("to", "")),
@@ -44,9 +338,12 @@ class EmailParser:
             "subject": headers.get("subject", "(No Subject)"),
             "body": body_data["plain"],
             "html_body": body_data["html"],
+            "text": working_text(body_data["plain"], self.text_max_chars, self.strip_quoted),
+            "body_size": body_data["plain_size"],
+            "html_size": body_data["html_size"],
             "date": self._parse_date(headers.get("date", "")),
             "labels": message.get("labelIds", []),
-            "attachments": self._extract_attachments(message.get("payload", {})),
+            "attachments": body_data["attachments"],
             "is_read": "UNREAD" not in message.get("labelIds", []),
             "is_starred": "STARRED" in message.get("labelIds", []),
         }
@@ -62,49 +359,116 @@ class EmailParser:
         """
         return {h["name"].lower(): h["value"] for h in headers}
 
-    def _extract_body(self, payload: Dict) -> Dict[str, str]:
-        """Extract email body content.
+    def _parse_message_ids(self, header: str) -> List[str]:
+        """Parse message IDs from an In-Reply-To or References header.
+
+        Args:
+            header: Header value
+
+        Returns:
+            List of message IDs including angle brackets
+        """
+        return re.findall(r"<[^<>\s]+>", header)
+
+    def _walk_payload(self, payload: Dict) -> Dict:
+        """Extract body content and attachment names in one pass over the MIME tree.
+
+        The first text/plain part is the body; later text parts are not
+        decoded. The HTML part is decoded only when it is kept (``keep_html``)
+        or needed as the body because no plain part exists; in the latter
+        case it is dropped after conversion unless kept. Attachments are
+        recorded by name without decoding their data. Each decoded part is
+        capped at ``max_part_bytes``.
 
         Args:
             payload: Email payload
 
         Returns:
-            Dictionary with 'plain' and 'html' body content
+            Dictionary with 'plain' and 'html' body content, their raw sizes
+            in bytes ('plain_size', 'html_size') and 'attachments'
         """
-        plain_body = ""
+        plain_part = None
+        html_part = None
+        attachments: List[str] = []
+
+        # Single-part messages carry their content on the payload itself
+        if "parts" not in payload and payload.get("body", {}).get("data"):
+            if payload.get("mimeType") == "text/html":
+                html_part = payload
+            else:
+                plain_part = payload
+
+        stack = list(reversed(payload.get("parts", [])))
+        while stack:
+            part = stack.pop()
+
+            if part.get("filename"):
+                attachments.append(part["filename"])
+                continue
+
+            if "parts" in part:
+                stack.extend(reversed(part["parts"]))
+                continue
+
+            if not part.get("body", {}).get("data"):
+                continue
+
+            mime_type = part.get("mimeType", "")
+            if mime_type == "text/plain" and plain_part is None:
+                plain_part = part
+            elif mime_type == "text/html" and html_part is None:
+                html_part = part
+
+        plain_body = self._decode_part(plain_part["body"]["data"]) if plain_part else ""
         html_body = ""
-
-        if "body" in payload and payload["body"].get("data"):
-            data = payload["body"]["data"]
-            decoded = base64.urlsafe_b64decode(data).decode("utf-8", errors="ignore")
-            plain_body = decoded
-
-        if "parts" in payload:
-            for part in payload["parts"]:
-                mime_type = part.get("mimeType", "")
-                if mime_type == "text/plain" and part.get("body", {}).get("data"):
-                    data = part["body"]["data"]
-                    plain_body = base64.urlsafe_b64decode(data).decode("utf-8", errors="ignore")
-                elif mime_type == "text/html" and part.get("body", {}).get("data"):
-                    data = part["body"]["data"]
-                    html_body = base64.urlsafe_b64decode(data).decode("utf-8", errors="ignore")
-                elif "parts" in part:
-                    # Recursive for nested parts
-                    nested = self._extract_body(part)
-                    if nested["plain"]:
-                        plain_body = nested["plain"]
-                    if nested["html"]:
-                        html_body = nested["html"]
-
-        # Convert HTML to plain text if needed
+        if html_part and (self.keep_html or not plain_body):
+            html_body = self._decode_part(html_part["body"]["data"])
         if not plain_body and html_body:
             plain_body = self._html_to_text(html_body)
 
-        return {"plain": plain_body, "html": html_body}
+        return {
+            "plain": plain_body,
+            "html": html_body if self.keep_html else "",
+            "plain_size": self._part_size(plain_part),
+            "html_size": self._part_size(html_part),
+            "attachments": attachments,
+        }
+
+    def _part_size(self, part: Optional[Dict]) -> int:
+        """Get the raw size of a MIME part in bytes.
+
+        Args:
+            part: Gmail message part, or None
+
+        Returns:
+            Size reported by Gmail, else estimated from the encoded data
+        """
+        if part is None:
+            return 0
+        body = part.get("body", {})
+        return body.get("size") or len(body.get("data", "")) * 3 // 4
+
+    def _decode_part(self, data: str) -> str:
+        """Decode base64url part data, keeping at most ``max_part_bytes``.
+
+        Args:
+            data: base64url-encoded part data
+
+        Returns:
+            Decoded text
+        """
+        # Every 4 base64 characters encode 3 bytes
+        limit = -(-self.max_part_bytes // 3) * 4
+        decoded = base64.urlsafe_b64decode(data[:limit])
+        return decoded[: self.max_part_bytes].decode("utf-8", errors="ignore")
 
     def _html_to_text(self, html: str) -> str:
         """Convert HTML to plain text.
 
+        The C-backed extractors drop non-text elements and emit one text
+        run per line without Markdown link or table formatting. Output is
+        capped at ``html_text_budget`` characters.
+
         Args:
             html: HTML content
 
@@ -112,32 +476,68 @@ class EmailParser:
             Plain text content
         """
         try:
-            return self.html_converter.handle(html)
+            if self.html_extractor == "selectolax":
+                return self._selectolax_to_text(html)
+            if self.html_extractor == "lxml":
+                return self._lxml_to_text(html)
+        except Exception:
+            pass
+
+        try:
+            return self.html_converter.handle(html)[: self.html_text_budget]
         except Exception:
             # Fallback to BeautifulSoup
             soup = BeautifulSoup(html, "html.parser")
-            return soup.get_text(separator="\n", strip=True)
+            return soup.get_text(separator="\n", strip=True)[: self.html_text_budget]
 
-    def _extract_attachments(self, payload: Dict) -> List[str]:
-        """Extract attachment filenames.
+    def _selectolax_to_text(self, html: str) -> str:
+        """Extract text with selectolax's lexbor backend.
 
         Args:
-            payload: Email payload
+            html: HTML content
 
         Returns:
-            List of attachment filenames
+            Plain text content
         """
-        attachments = []
+        from selectolax.lexbor import LexborHTMLParser
+
+        tree = LexborHTMLParser(html)
+        tree.strip_tags(list(NON_TEXT_TAGS))
+        root = tree.body or tree.root
+        if root is None:
+            return ""
+        return root.text(separator="\n", strip=True)[: self.html_text_budget]
 
-        if "parts" in payload:
-            for part in payload["parts"]:
-                if part.get("filename"):
-                    attachments.append(part["filename"])
-                elif "parts" in part:
-                    # Recursive for nested parts
-                    attachments.extend(self._extract_attachments(part))
+    def _lxml_to_text(self, html: str) -> str:
+        """Extract text with lxml, stopping once the budget is reached.
 
-        return attachments
+        Args:
+            html: HTML content
+
+        Returns:
+            Plain text content
+        """
+        from lxml import etree
+        from lxml import html as lxml_html
+
+        if not html.strip():
+            return ""
+
+        root = lxml_html.document_fromstring(html)
+        etree.strip_elements(root, etree.Comment, *NON_TEXT_TAGS, with_tail=False)
+
+        chunks = []
+        size = 0
+        for chunk in root.itertext():
+            chunk = chunk.strip()
+            if not chunk:
+                continue
+            chunks.append(chunk)
+            size += len(chunk) + 1
+            if size >= self.html_text_budget:
+                break
+
+        return "\n".join(chunks)[: self.html_text_budget]
 
     def _parse_email_address(self, email_str: str) -> str:
         """Parse email address from string.
@@ -206,19 +606,6 @@ class EmailParser:
             body: Raw email body
 
         Returns:
-            Cleaned email body
+            Cleaned email body without quoted replies or signatures
         """
-        # Remove excessive whitespace
-        body = re.sub(r"\n\s*\n\s*\n+", "\n\n", body)
-
-        # Remove email signatures (common patterns)
-        body = re.sub(
-            r"--+\s*\n.*?(?:\n--+|$)", "", body, flags=re.DOTALL | re.MULTILINE
-        )
-
-        # Remove quoted replies (lines starting with >)
-        lines = body.split("\n")
-        cleaned_lines = [line for line in lines if not line.strip().startswith(">")]
-        body = "\n".join(cleaned_lines)
-
-        return body.strip()
+        return working_text(body, max_chars=len(body), strip_quoted=True)
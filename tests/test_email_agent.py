@@ -1,10 +1,16 @@
 """Tests for Email Agent."""
 
+import asyncio
+import threading
+import time
+
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
+from config import Settings
 from src.agents import EmailAgent
-from src.models import Email, EmailCategory, EmailPriority
+from src.models import Email, EmailCategory, EmailPriority, EmailSummary
+from src.services.push_subscriber import QueueSubscriber
 
 
 @pytest.fixture
@@ -20,6 +26,303 @@ def sample_email():
     )
 
 
+@pytest.fixture
+def settings():
+    """Create settings without reading API keys from the environment."""
+    return Settings(
+        google_api_key="test",
+        gmail_client_id="test",
+        gmail_client_secret="test",
+        smtp_username="test@example.com",
+        smtp_password="test",
+        auto_response_enabled=False,
+        gmail_incremental_sync=False,
+        thread_index_path=":memory:",
+    )
+
+
+def _make_emails(count):
+    """Create a list of distinct sample emails."""
+    return [
+        Email(
+            id=f"email{i}",
+            message_id=f"msg{i}",
+            sender="test@example.com",
+            subject=f"Subject {i}",
+            body="Body",
+            date="2024-01-01T12:00:00Z",
+        )
+        for i in range(count)
+    ]
+
+
+def _make_agent(settings, emails, delay=0.05):
+    """Create an agent whose services are mocks with a fixed per-call latency."""
+    with patch.multiple(
+        "src.agents.email_agent",
+        GmailService=Mock(),
+        GeminiService=Mock(),
+        RAGService=Mock(),
+        SlackService=Mock(),
+        EmailArchive=Mock(),
+    ):
+        agent = EmailAgent(settings)
+    events = []
+    lock = threading.Lock()
+
+    def record(name, email_id):
+        with lock:
+            events.append((name, email_id))
+
+    async def summarize(batch):
+        await asyncio.sleep(delay)
+        summaries = []
+        for email in batch:
+            record("summary", email.id)
+            summaries.append(
+                EmailSummary(
+                    email_id=email.id,
+                    subject=email.subject,
+                    sender=email.sender,
+                    date=email.date,
+                    summary="summary",
+                    category=EmailCategory.OTHER,
+                    priority=EmailPriority.MEDIUM,
+                )
+            )
+        return summaries
+
+    def find_similar(batch, threshold):
+        time.sleep(delay)
+        return {email.id: [] for email in batch}
+
+    def mark_as_read_batch(email_ids):
+        for email_id in email_ids:
+            record("read", email_id)
+        return []
+
+    agent.gmail_service.fetch_emails.return_value = emails
+    agent.gmail_service.mark_as_read_batch.side_effect = mark_as_read_batch
+    agent.gemini_service.batch_summarize_async = AsyncMock(side_effect=summarize)
+    agent.rag_service.find_similar_and_upsert.side_effect = find_similar
+    return agent, events
+
+
+async def test_process_emails_runs_stages_concurrently(settings):
+    """Summarization and the vector store lookup are in flight at the same time."""
+    emails = _make_emails(16)
+    agent, _ = _make_agent(settings, emails)
+    summarizing = threading.Event()
+    searching = threading.Event()
+    summarize = agent.gemini_service.batch_summarize_async.side_effect
+    find_similar = agent.rag_service.find_similar_and_upsert.side_effect
+
+    async def summarize_when_searching(batch):
+        summarizing.set()
+        overlapped = await asyncio.to_thread(searching.wait, 5)
+        return await summarize(batch) if overlapped else []
+
+    def search_when_summarizing(batch, threshold):
+        searching.set()
+        assert summarizing.wait(5)
+        return find_similar(batch, threshold)
+
+    agent.gemini_service.batch_summarize_async.side_effect = summarize_when_searching
+    agent.rag_service.find_similar_and_upsert.side_effect = search_when_summarizing
+
+    result = await agent.process_emails()
+
+    assert result["status"] == "success"
+    assert result["emails_processed"] == 16
+    assert len(result["summaries"]) == 16
+
+
+async def test_process_emails_marks_read_after_summary(settings):
+    """No email is marked as read before its summary exists."""
+    emails = _make_emails(8)
+    agent, events = _make_agent(settings, emails)
+
+    await agent.process_emails()
+
+    for email in emails:
+        assert events.index(("summary", email.id)) < events.index(("read", email.id))
+
+
+async def test_overlapping_triggers_are_coalesced(settings):
+    """A trigger during a running cycle reruns it afterwards instead of overlapping."""
+    agent, _ = _make_agent(settings, _make_emails(2))
+
+    running = asyncio.create_task(agent.process_emails())
+    await asyncio.sleep(0.01)
+    skipped = await agent.process_emails()
+    result = await running
+
+    assert skipped["status"] == "skipped"
+    assert result["status"] == "success"
+    assert agent.gmail_service.fetch_emails.call_count == 2
+
+
+async def test_read_marks_are_flushed_once_and_failures_retried(settings):
+    """A cycle issues one bulk read-marking call; failed IDs join the next one."""
+    emails = _make_emails(4)
+    agent, _ = _make_agent(settings, emails)
+    agent.gmail_service.mark_as_read_batch.side_effect = [["email2"], []]
+
+    await agent.process_emails()
+    agent.gmail_service.fetch_emails.return_value = _make_emails(1)
+    await agent.process_emails()
+
+    calls = agent.gmail_service.mark_as_read_batch.call_args_list
+    assert [call.args[0] for call in calls] == [
+        ["email0", "email1", "email2", "email3"],
+        ["email2", "email0"],
+    ]
+
+
+async def test_sync_checkpoint_is_committed_only_after_cycle(settings):
+    """A cycle that fails before finishing leaves the checkpoint untouched."""
+    settings.gmail_incremental_sync = True
+    emails = _make_emails(2)
+    agent, _ = _make_agent(settings, emails)
+    agent.gmail_service.sync_emails.return_value = (emails, "200")
+    agent.slack_service.send_email_summaries.side_effect = RuntimeError("Slack down")
+
+    result = await agent.process_emails()
+
+    assert result["status"] == "error"
+    agent.gmail_service.commit_sync_state.assert_not_called()
+
+    agent.slack_service.send_email_summaries.side_effect = None
+    await agent.process_emails()
+
+    agent.gmail_service.commit_sync_state.assert_called_once_with("200", ["email0", "email1"])
+
+
+async def test_triaged_emails_skip_llm_and_vector_store(settings):
+    """Emails with a deferred body are summarized from headers only."""
+    emails = _make_emails(2)
+    emails[1].set_body_loader(Mock())
+    agent, _ = _make_agent(settings, emails)
+
+    result = await agent.process_emails()
+
+    assert result["emails_processed"] == 2
+    assert result["triaged"] == 1
+    agent.gemini_service.header_summary.assert_called_once_with(emails[1])
+    agent.gemini_service.batch_summarize_async.assert_awaited_once_with([emails[0]])
+    assert agent.rag_service.find_similar_and_upsert.call_args.args[0] == [emails[0]]
+    assert agent.gmail_service.mark_as_read_batch.call_args.args[0] == ["email0", "email1"]
+
+
+async def test_known_message_reuses_summary_and_skips_vector_store(settings):
+    """A Message-ID seen under another ID short-circuits dedup and summarization."""
+    first = _make_emails(1)
+    agent, _ = _make_agent(settings, first, delay=0)
+    await agent.process_emails()
+
+    redelivered = first[0].model_copy(update={"id": "alias0"})
+    agent.gmail_service.fetch_emails.return_value = [redelivered]
+    agent.gemini_service.batch_summarize_async.reset_mock()
+    agent.rag_service.find_similar_and_upsert.reset_mock()
+
+    result = await agent.process_emails()
+
+    assert result["duplicates_found"] == 1
+    assert result["summaries"][0]["email_id"] == "alias0"
+    agent.gemini_service.batch_summarize_async.assert_awaited_once_with([])
+    agent.rag_service.find_similar_and_upsert.assert_not_called()
+
+
+async def test_failed_cycle_does_not_mark_messages_known(settings):
+    """Emails from a cycle that fails are reprocessed in full, vector store included."""
+    emails = _make_emails(2)
+    agent, _ = _make_agent(settings, emails, delay=0)
+    agent.slack_service.send_email_summaries.side_effect = RuntimeError("Slack down")
+
+    assert (await agent.process_emails())["status"] == "error"
+    assert agent.thread_index.find_known(emails) == {}
+
+    agent.slack_service.send_email_summaries.side_effect = None
+    await agent.process_emails()
+
+    assert agent.rag_service.find_similar_and_upsert.call_count == 2
+    assert set(agent.thread_index.find_known(emails)) == {"email0", "email1"}
+
+
+async def test_known_message_without_summary_is_summarized(settings):
+    """A known record with no stored summary falls back to summarizing the email."""
+    emails = _make_emails(1)
+    agent, _ = _make_agent(settings, emails, delay=0)
+    agent.thread_index.record(emails, {})
+
+    result = await agent.process_emails()
+
+    assert result["status"] == "success"
+    assert result["summaries"][0]["email_id"] == "email0"
+    agent.gemini_service.batch_summarize_async.assert_awaited_once_with(emails)
+    assert agent.thread_index.find_known(emails)["email0"]["summary"] is not None
+
+
+async def test_thread_reply_updates_running_summary(settings):
+    """Replies are summarized from the thread's running summary, not from scratch."""
+    root = _make_emails(1)[0].model_copy(update={"thread_id": "thread1"})
+    agent, _ = _make_agent(settings, [root], delay=0)
+    await agent.process_emails()
+
+    reply = Email(
+        id="reply1",
+        message_id="<reply1@example.com>",
+        thread_id="thread1",
+        in_reply_to="msg0",
+        sender="other@example.com",
+        subject="Re: Subject 0",
+        body="Sounds good",
+        date="2024-01-02T12:00:00Z",
+    )
+    agent.gmail_service.fetch_emails.return_value = [reply]
+    agent.gemini_service.summarize_thread_async = AsyncMock(
+        side_effect=lambda emails, previous: previous.model_copy(update={"summary": "updated"})
+    )
+
+    result = await agent.process_emails()
+
+    emails, previous = agent.gemini_service.summarize_thread_async.await_args.args
+    assert [e.id for e in emails] == ["reply1"]
+    assert previous.email_id == root.id
+    assert result["summaries"][0]["email_id"] == "reply1"
+    assert result["summaries"][0]["summary"] == "updated"
+    assert agent.thread_index.get_thread_summary("thread1").summary == "updated"
+
+
+async def test_push_notification_triggers_processing(settings):
+    """A notification starts a cycle without waiting for the poll interval."""
+    agent, _ = _make_agent(settings, [])
+    agent.process_emails = AsyncMock(return_value={"status": "success"})
+    subscriber = QueueSubscriber()
+
+    task = asyncio.create_task(agent.run_push_trigger(subscriber, fallback_interval=60))
+    subscriber.publish({"emailAddress": "me@example.com", "historyId": "42"})
+    for _ in range(100):
+        if agent.process_emails.await_count:
+            break
+        await asyncio.sleep(0.01)
+    task.cancel()
+
+    assert agent.process_emails.await_count == 1
+
+
+async def test_push_trigger_falls_back_to_polling(settings):
+    """Without notifications, a cycle still runs after the fallback interval."""
+    agent, _ = _make_agent(settings, [])
+    agent.process_emails = AsyncMock(return_value={"status": "success"})
+
+    task = asyncio.create_task(agent.run_push_trigger(QueueSubscriber(), fallback_interval=0.02))
+    await asyncio.sleep(0.1)
+    task.cancel()
+
+    assert agent.process_emails.await_count >= 2
+
+
 def test_email_agent_initialization():
     """Test email agent can be initialized."""
     # This is a placeholder test
@@ -0,0 +1,243 @@
+"""Tests for the Gmail message parser."""
+
+import base64
+
+import pytest
+
+from src.models import Email
+from src.utils import EmailParser
+from src.utils.email_parser import resolve_html_extractor
+
+NEWSLETTER_HTML = (
+    "<html><head><title>Ignored</title><style>.c1{color:red}</style></head><body>"
+    "<table><tr><td class='c1'>Big <b>summer</b> sale</td></tr>"
+    "<tr><td><a href='https://example.com'>Shop now</a></td></tr></table>"
+    "<script>track()</script><!-- tracking pixel --></body></html>"
+)
+
+
+def _b64(text: str) -> str:
+    """Encode text the way the Gmail API does."""
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii")
+
+
+def _message(parts: list) -> dict:
+    """Build a multipart Gmail API message resource."""
+    return {
+        "id": "m1",
+        "threadId": "t1",
+        "labelIds": ["INBOX"],
+        "payload": {
+            "mimeType": "multipart/mixed",
+            "headers": [
+                {"name": "From", "value": "Alice <alice@example.com>"},
+                {"name": "Subject", "value": "Hello"},
+                {"name": "Date", "value": "Mon, 1 Jan 2024 12:00:00 +0000"},
+            ],
+            "parts": parts,
+        },
+    }
+
+
+def _newsletter() -> dict:
+    """Build a message with alternative bodies and an attachment."""
+    return _message(
+        [
+            {
+                "mimeType": "multipart/alternative",
+                "parts": [
+                    {"mimeType": "text/plain", "body": {"data": _b64("Plain body")}},
+                    {"mimeType": "text/html", "body": {"data": _b64("<p>HTML body</p>")}},
+                ],
+            },
+            {"mimeType": "text/plain", "body": {"data": _b64("Footer part")}},
+            {"mimeType": "application/pdf", "filename": "report.pdf", "body": {"size": 10}},
+        ]
+    )
+
+
+def test_first_plain_part_wins_and_attachments_are_collected():
+    """The first text/plain part is the body; attachments are listed by name."""
+    parsed = EmailParser().parse_gmail_message(_newsletter())
+
+    assert parsed["body"] == "Plain body"
+    assert parsed["html_body"] == "<p>HTML body</p>"
+    assert parsed["attachments"] == ["report.pdf"]
+
+
+def test_html_is_skipped_when_plain_part_exists_and_not_kept():
+    """With keep_html off the HTML part is not decoded next to a plain part."""
+    parser = EmailParser(keep_html=False)
+
+    parsed = parser.parse_gmail_message(_newsletter())
+    assert parsed["body"] == "Plain body"
+    assert parsed["html_body"] == ""
+
+    html_only = _message([{"mimeType": "text/html", "body": {"data": _b64("<p>Only HTML</p>")}}])
+    assert "Only HTML" in parser.parse_gmail_message(html_only)["body"]
+
+
+def test_decoded_parts_are_capped():
+    """Each decoded part keeps at most max_part_bytes."""
+    message = _message([{"mimeType": "text/plain", "body": {"data": _b64("x" * 5000)}}])
+
+    parsed = EmailParser(max_part_bytes=1024).parse_gmail_message(message)
+
+    assert parsed["body"] == "x" * 1024
+
+
+def test_parse_many_with_pool_matches_serial():
+    """Parsing across a process pool returns the same results in order."""
+    parser = EmailParser()
+    messages = [_newsletter(), {"id": "bad", "payload": None}, _newsletter()]
+
+    serial = parser.parse_many(messages)
+    with parser.create_pool(2) as pool:
+        pooled = parser.parse_many(messages, executor=pool, workers=2)
+
+    assert pooled[0] == serial[0] == serial[2]
+    assert isinstance(serial[1], Exception) and isinstance(pooled[1], Exception)
+
+
+def test_working_text_is_normalized_capped_and_sized():
+    """Parsed emails carry a capped working text and the raw part sizes."""
+    body = "Hello   team,\n\n\n\n" + "word " * 2000
+    html = "<p>" + "x" * 300 + "</p>"
+    message = _message(
+        [
+            {"mimeType": "text/plain", "body": {"data": _b64(body), "size": len(body)}},
+            {"mimeType": "text/html", "body": {"data": _b64(html), "size": len(html)}},
+        ]
+    )
+
+    parsed = EmailParser(keep_html=False, text_max_chars=600).parse_gmail_message(message)
+
+    assert parsed["text"].startswith("Hello team,\n\nword word")
+    assert len(parsed["text"]) == 600
+    assert parsed["body_size"] == len(body)
+    assert parsed["html_size"] == len(html)
+    assert parsed["html_body"] == ""
+
+
+@pytest.mark.parametrize("extractor", ["selectolax", "lxml"])
+def test_fast_html_extractors_drop_non_text_and_respect_budget(extractor):
+    """C-backed extractors keep visible text only and stop at the budget."""
+    pytest.importorskip("selectolax.lexbor" if extractor == "selectolax" else "lxml.html")
+    parser = EmailParser(html_extractor=extractor, html_text_budget=1024)
+
+    assert parser.html_extractor == extractor
+    text = parser._html_to_text(NEWSLETTER_HTML)
+    assert text.split() == ["Big", "summer", "sale", "Shop", "now"]
+
+    long_html = "<body>" + "<p>word</p>" * 1000 + "</body>"
+    assert len(parser._html_to_text(long_html)) == 1024
+
+
+def test_html_extractor_falls_back_to_html2text(monkeypatch):
+    """Unknown extractors are rejected and missing ones fall back to html2text."""
+    import builtins
+
+    real_import = builtins.__import__
+
+    def no_fast_parsers(name, *args, **kwargs):
+        if name.startswith(("selectolax", "lxml")):
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_fast_parsers)
+
+    assert resolve_html_extractor("auto") == "html2text"
+    assert resolve_html_extractor("lxml") == "html2text"
+    with pytest.raises(ValueError):
+        resolve_html_extractor("regex")
+
+
+def test_working_text_strips_quoted_history_and_signatures():
+    """Quoted replies, wrapped reply headers and signatures are dropped."""
+    body = (
+        "Thanks, Thursday works.\n"
+        "\n"
+        "On Mon, Jan 1, 2024 at 9:00 AM Alice Example <\n"
+        "alice@example.com> wrote:\n"
+        "> Can we meet on Thursday?\n"
+        ">> Earlier message\n"
+        "On our side the room is booked.\n"
+        "-- \n"
+        "Bob\n"
+        "Example Corp\n"
+    )
+
+    text = EmailParser().parse_gmail_message(
+        _message([{"mimeType": "text/plain", "body": {"data": _b64(body)}}])
+    )["text"]
+
+    assert text == "Thanks, Thursday works.\n\nOn our side the room is booked."
+    assert EmailParser().clean_email_body("> only quoted") == "> only quoted"
+
+
+def test_underscore_rule_cuts_only_before_a_forwarded_header():
+    """Underscore dividers keep the content after them unless Outlook history follows."""
+    parser = EmailParser()
+
+    assert parser.clean_email_body("Price list\n__________\nItem A 10") == (
+        "Price list\n__________\nItem A 10"
+    )
+    assert parser.clean_email_body(
+        "See below.\n\n________________\n\nFrom: Alice\nSent: Monday\nOld message"
+    ) == "See below."
+
+
+def test_mobile_signoff_cuts_only_near_the_end():
+    """'Sent from my ...' ends the content only among the last few lines."""
+    parser = EmailParser()
+
+    assert parser.clean_email_body("Thanks!\n\nSent from my iPhone\nBob") == "Thanks!"
+    body = "Checklist:\nSent from my phone, not ideal\nStep 1\nStep 2\nStep 3\nStep 4"
+    assert parser.clean_email_body(body) == body
+
+
+def test_cleaning_is_linear_on_adversarial_input():
+    """Long delimiter-like runs do not trigger regex backtracking."""
+    import time
+
+    body = "-" * 200_000 + "x\n" + "> q\n" * 50_000 + "Reply\n" + "--\n" * 50_000
+
+    start = time.perf_counter()
+    text = EmailParser().clean_email_body(body)
+    elapsed = time.perf_counter() - start
+
+    assert text.endswith("Reply")
+    assert elapsed < 1.0
+
+
+def test_from_parsed_matches_validated_model_and_quarantines_bad_addresses():
+    """Trusted construction equals full validation and keeps emails with bad recipients."""
+    parsed = EmailParser().parse_gmail_message(_newsletter())
+    parsed["recipients"] = ["bob@example.com", "carol@example.org"]
+
+    assert Email.from_parsed(parsed) == Email(**parsed)
+
+    parsed["cc"] = ["dave@example.com", "undisclosed-recipients", "eve@localhost"]
+    email = Email.from_parsed(parsed)
+
+    assert email.cc == ["dave@example.com"]
+    assert email.quarantined_addresses == ["undisclosed-recipients", "eve@localhost"]
+
+    parsed["sender"] = ""
+    with pytest.raises(ValueError):
+        Email.from_parsed(parsed)
+
+
+def test_from_parsed_round_trips_through_validated_model():
+    """Addresses kept by trusted construction also pass model validation."""
+    parsed = EmailParser().parse_gmail_message(_newsletter())
+    parsed["recipients"] = ["bob@example.com", "a..b@example.com"]
+    parsed["cc"] = ["x@-bad-.com", "carol@example.org"]
+
+    email = Email.from_parsed(parsed)
+    restored = Email.model_validate_json(email.model_dump_json())
+
+    assert email.recipients == ["bob@example.com"]
+    assert email.cc == ["carol@example.org"]
+    assert email.quarantined_addresses == ["a..b@example.com", "x@-bad-.com"]
+    assert restored == email
@@ -0,0 +1,76 @@
+"""Tests for embedding backends."""
+
+import numpy as np
+import pytest
+from huggingface_hub import try_to_load_from_cache
+
+from src.services.embedding_backends import (
+    EmbeddingBackend,
+    create_embedding_backend,
+    mean_pool,
+)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+CORPUS = [
+    "Your interview is scheduled for Monday at 10am.",
+    "Reminder: interview on Monday morning at ten.",
+    "Invoice #4821 for October is attached.",
+    "Please find attached the invoice for last month.",
+    "50% off everything this weekend only!",
+    "Team offsite moved to the lake house on Friday.",
+    "The quarterly report is due by end of day Thursday.",
+    "Your package has shipped and will arrive tomorrow.",
+]
+
+
+def _load_backend(backend):
+    """Load a backend, skipping the test when the model cannot be fetched."""
+    # Only run against a locally cached model to avoid slow network retries
+    cached = try_to_load_from_cache(f"sentence-transformers/{MODEL_NAME}", "config.json")
+    if not isinstance(cached, str):
+        pytest.skip(f"{MODEL_NAME} is not in the local Hugging Face cache")
+
+    try:
+        return create_embedding_backend(MODEL_NAME, backend=backend)
+    except Exception as e:
+        pytest.skip(f"{backend} backend unavailable: {e}")
+
+
+def _similarities(backend):
+    """Cosine similarity matrix of the corpus for a backend."""
+    embeddings = np.asarray(backend.encode(CORPUS, normalize_embeddings=True))
+    return embeddings @ embeddings.T
+
+
+def test_mean_pool_ignores_padding():
+    """Padded tokens do not contribute to the pooled embedding."""
+    tokens = np.array([[[1.0, 2.0], [3.0, 4.0], [100.0, 100.0]]])
+    mask = np.array([[1, 1, 0]])
+
+    np.testing.assert_allclose(mean_pool(tokens, mask), [[2.0, 3.0]])
+
+
+def test_unknown_backend_is_rejected():
+    """Misconfigured backend names fail loudly."""
+    with pytest.raises(ValueError):
+        create_embedding_backend(MODEL_NAME, backend="tensorflow")
+
+
+def test_incomplete_backend_cannot_be_created():
+    """A backend without encode fails when it is built, not on first use."""
+
+    class NoEncode(EmbeddingBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        NoEncode()
+
+
+@pytest.mark.parametrize("backend,tolerance", [("onnx", 1e-3), ("onnx-int8", 0.05)])
+def test_onnx_similarities_match_pytorch(backend, tolerance):
+    """ONNX backends reproduce the PyTorch cosine similarities on a fixed corpus."""
+    reference = _similarities(_load_backend("sentence-transformers"))
+    candidate = _similarities(_load_backend(backend))
+
+    assert np.max(np.abs(reference - candidate)) <= tolerance
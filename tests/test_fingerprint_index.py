@@ -0,0 +1,93 @@
+"""Tests for the content fingerprint index."""
+
+import pytest
+
+from src.models import Email
+from src.services.fingerprint_index import FingerprintIndex, normalize_body, simhash
+
+BODY = (
+    "Hi team, the quarterly planning review has moved to Thursday at 3pm in the "
+    "main conference room. Please bring your roadmap updates and budget estimates "
+    "for next quarter so we can finalize priorities before the board meeting."
+)
+
+
+def _email(email_id: str, body: str) -> Email:
+    """Create an email for testing."""
+    return Email(
+        id=email_id,
+        message_id=f"<{email_id}@example.com>",
+        sender="test@example.com",
+        subject="Planning review",
+        body=body,
+        date="2024-01-01T12:00:00Z",
+    )
+
+
+@pytest.fixture
+def index(tmp_path):
+    """Create a fingerprint index in a temporary directory."""
+    return FingerprintIndex(tmp_path / "fingerprints.db")
+
+
+def test_normalization_ignores_case_whitespace_and_punctuation():
+    """Formatting-only differences normalize to the same text."""
+    assert normalize_body("Hello,\n\n  WORLD!") == normalize_body("hello world")
+
+
+def test_exact_resend_matches(index):
+    """A resend with different formatting is an exact match."""
+    index.match_and_add([_email("a", BODY)])
+
+    matches = index.match_and_add([_email("b", BODY.upper().replace(" ", "\n"))])
+
+    assert matches == {"b": ("a", 1.0)}
+    assert index.get_stats()["exact_hits"] == 1
+
+
+def test_near_duplicate_matches_within_distance(index):
+    """A forwarded copy with a signature is matched through SimHash bands."""
+    edited = "Fwd: " + BODY + "\n\nCheers, Alex"
+    assert bin(simhash(normalize_body(BODY)) ^ simhash(normalize_body(edited))).count("1") <= 6
+
+    matches = index.match_and_add([_email("a", BODY), _email("b", edited)])
+
+    assert matches["b"][0] == "a"
+    assert 0.9 <= matches["b"][1] < 1.0
+
+
+def test_unrelated_and_short_emails_do_not_match(index):
+    """Different content and short bodies fall through to vector search."""
+    index.match_and_add([_email("a", BODY), _email("short1", "Thanks!")])
+
+    matches = index.match_and_add(
+        [
+            _email("b", "Your package has shipped and will arrive in three to five business days."),
+            _email("short2", "Thanks!"),
+        ]
+    )
+
+    assert matches == {}
+    assert index.get_stats()["misses"] == 2
+
+
+def test_reprocessing_does_not_self_match(index, tmp_path):
+    """An email never matches its own stored fingerprint, even after reopening."""
+    index.match_and_add([_email("a", BODY)])
+
+    reopened = FingerprintIndex(tmp_path / "fingerprints.db")
+
+    assert reopened.match_and_add([_email("a", BODY)]) == {}
+    assert reopened.size() == 1
+
+
+def test_exact_match_requires_identical_full_body(index):
+    """Bodies that only share their capped working text are near, not exact, matches."""
+    shared = " ".join([BODY] * 60)
+    index.match_and_add([_email("a", shared + " Option one.")])
+
+    matches = index.match_and_add([_email("b", shared + " Option two.")])
+
+    assert matches["b"][0] == "a"
+    assert matches["b"][1] < 1.0
+    assert index.get_stats()["exact_hits"] == 0
@@ -0,0 +1,249 @@
+"""Tests for Gemini service."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.models import Email, EmailCategory, EmailPriority
+from src.services.gemini_service import SUMMARY_OUTPUT_TOKENS, GeminiService
+from src.services.summary_cache import SummaryCache
+
+
+class FakeModel:
+    """Stand-in for GenerativeModel that records async concurrency."""
+
+    def __init__(self, text, delay: float = 0.01):
+        self.text = text
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+
+    def _respond(self, prompt):
+        text = self.text(prompt) if callable(self.text) else self.text
+        return SimpleNamespace(text=text)
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        return self._respond(prompt)
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return self._respond(prompt)
+
+
+def _gemini_service(
+    model,
+    max_concurrent: int = 8,
+    token_budget: int = 8000,
+    cache=None,
+    max_emails: int = 20,
+    max_output_tokens: int = 8192,
+) -> GeminiService:
+    """Create a GeminiService around a fake model."""
+    service = GeminiService.__new__(GeminiService)
+    service.settings = SimpleNamespace(
+        gemini_batch_token_budget=token_budget,
+        gemini_max_emails_per_batch=max_emails,
+        gemini_max_output_tokens=max_output_tokens,
+    )
+    service.model = model
+    service._request_limit = asyncio.Semaphore(max_concurrent)
+    service.cache = cache
+    return service
+
+
+@pytest.fixture
+def sample_email():
+    """Create a sample email for testing."""
+    return Email(
+        id="test123",
+        message_id="msg123",
+        sender="test@example.com",
+        subject="Interview invitation",
+        body="We would like to schedule an interview for the position.",
+        date="2024-01-01T12:00:00Z",
+    )
+
+
+async def test_summarize_email_async_parses_response(sample_email):
+    """Async summaries are parsed the same way as sync ones."""
+    payload = {"summary": "Interview request", "category": "job_related", "priority": "high"}
+    service = _gemini_service(FakeModel(f"```json\n{json.dumps(payload)}\n```"))
+
+    summary = await service.summarize_email_async(sample_email)
+
+    assert summary.summary == "Interview request"
+    assert summary.category == EmailCategory.JOB_RELATED
+    assert summary.priority == EmailPriority.HIGH
+
+
+async def test_async_requests_respect_concurrency_cap(sample_email):
+    """The shared semaphore caps in-flight requests across all async methods."""
+    model = FakeModel("yes")
+    service = _gemini_service(model, max_concurrent=3)
+
+    await asyncio.gather(
+        *(service.is_job_related_async(sample_email, ["interview"]) for _ in range(10)),
+        *(service.classify_email_async(sample_email) for _ in range(10)),
+    )
+
+    assert model.calls == 20
+    assert model.max_in_flight == 3
+
+
+def _make_emails(count):
+    """Create a list of distinct sample emails."""
+    return [
+        Email(
+            id=f"email{i}",
+            message_id=f"msg{i}",
+            sender="test@example.com",
+            subject=f"Subject {i}",
+            body="Body " * 50,
+            date="2024-01-01T12:00:00Z",
+        )
+        for i in range(count)
+    ]
+
+
+def _batch_reply(prompt, skip=()):
+    """Answer batch prompts with a JSON array and single prompts with one object."""
+    if "JSON array" not in prompt:
+        return json.dumps({"summary": "single", "priority": "low"})
+    ids = [line.split(": ", 1)[1] for line in prompt.splitlines() if line.startswith("Email ID: ")]
+    return json.dumps([{"email_id": eid, "summary": "batched"} for eid in ids if eid not in skip])
+
+
+def test_batch_summarize_packs_emails_into_one_request():
+    """Emails that fit the token budget share one request."""
+    model = FakeModel(_batch_reply)
+    service = _gemini_service(model)
+    emails = _make_emails(5)
+
+    summaries = service.batch_summarize(emails)
+
+    assert model.calls == 1
+    assert [s.email_id for s in summaries] == [e.id for e in emails]
+    assert all(s.summary == "batched" for s in summaries)
+
+
+def test_batch_summarize_falls_back_for_missing_emails():
+    """Emails missing from the batch response are summarized individually."""
+    model = FakeModel(lambda prompt: _batch_reply(prompt, skip={"email1"}))
+    service = _gemini_service(model)
+    emails = _make_emails(3)
+
+    summaries = service.batch_summarize(emails)
+
+    assert model.calls == 2
+    assert [s.summary for s in summaries] == ["batched", "single", "batched"]
+
+
+def test_batch_plan_respects_token_budget():
+    """Batches are split so each prompt stays within the token budget."""
+    service = _gemini_service(FakeModel(_batch_reply), token_budget=500)
+    emails = _make_emails(6)
+
+    batches = service._plan_summary_batches(emails)
+
+    assert len(batches) > 1
+    assert [e.id for batch in batches for e in batch] == [e.id for e in emails]
+    for batch in batches:
+        if len(batch) > 1:
+            assert service._estimate_tokens(service._build_batch_summary_prompt(batch)) <= 500
+
+
+def test_batch_plan_caps_emails_and_output_tokens():
+    """Many tiny emails are split so each answer fits the model's output limit."""
+    emails = [
+        Email(
+            id=f"tiny{i}",
+            message_id=f"tiny{i}",
+            sender="a@example.com",
+            subject="Hi",
+            body="ok",
+            date="2024-01-01T12:00:00Z",
+        )
+        for i in range(100)
+    ]
+
+    capped = _gemini_service(FakeModel(_batch_reply), max_emails=8)
+    by_output = _gemini_service(
+        FakeModel(_batch_reply), max_output_tokens=5 * SUMMARY_OUTPUT_TOKENS
+    )
+
+    assert [len(batch) for batch in capped._plan_summary_batches(emails)] == [8] * 12 + [4]
+    assert max(len(batch) for batch in by_output._plan_summary_batches(emails)) == 5
+
+
+async def test_batch_summarize_async_handles_malformed_response():
+    """A malformed batch response falls back to single-email calls."""
+    model = FakeModel(lambda prompt: "not json" if "JSON array" in prompt else _batch_reply(prompt))
+    service = _gemini_service(model)
+    emails = _make_emails(3)
+
+    summaries = await service.batch_summarize_async(emails)
+
+    assert model.calls == 4
+    assert [s.summary for s in summaries] == ["single"] * 3
+
+
+def test_summary_cache_skips_repeat_llm_calls(tmp_path, sample_email):
+    """Re-summarizing the same content is served from the cache."""
+    model = FakeModel(json.dumps({"summary": "cached", "category": "job_related"}))
+    cache = SummaryCache(tmp_path / "cache.db")
+    service = _gemini_service(model, cache=cache)
+    resend = sample_email.model_copy(update={"id": "resend456"})
+
+    first = service.summarize_email(sample_email)
+    second = service.summarize_email(resend)
+
+    assert model.calls == 1
+    assert second.summary == first.summary == "cached"
+    assert second.email_id == "resend456"
+    assert cache.get_stats()["hits"] == 1
+
+
+async def test_batch_fallbacks_count_one_cache_miss_per_email(tmp_path):
+    """Single-email batches and fallbacks do not look the cache up a second time."""
+    model = FakeModel(lambda prompt: _batch_reply(prompt, skip={"email1"}))
+    cache = SummaryCache(tmp_path / "cache.db")
+    service = _gemini_service(model, cache=cache)
+
+    service.batch_summarize(_make_emails(3))
+    await service.batch_summarize_async(_make_emails(4)[3:])
+
+    assert cache.get_stats()["misses"] == 4
+    assert cache.get_stats()["hits"] == 0
+
+
+async def test_classification_and_job_checks_use_cache(tmp_path, sample_email):
+    """Category and job answers are cached separately from summaries."""
+    model = FakeModel("yes")
+    service = _gemini_service(model, cache=SummaryCache(tmp_path / "cache.db"))
+
+    for _ in range(3):
+        assert await service.is_job_related_async(sample_email, ["interview"])
+        assert service.classify_email(sample_email) == EmailCategory.OTHER
+
+    assert model.calls == 2
+
+
+def test_header_summary_uses_gmail_category(sample_email):
+    """Triaged mail is categorized from its labels without a model call."""
+    model = FakeModel("unused")
+    service = _gemini_service(model)
+    promo = sample_email.model_copy(update={"labels": ["INBOX", "CATEGORY_PROMOTIONS"]})
+
+    summary = service.header_summary(promo)
+
+    assert model.calls == 0
+    assert summary.category == EmailCategory.PROMOTIONAL
+    assert summary.priority == EmailPriority.LOW
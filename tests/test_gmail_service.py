@@ -0,0 +1,404 @@
+"""Tests for Gmail service."""
+
+import base64
+import json
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import Mock, patch
+
+import pytest
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpMockSequence
+
+from config import Settings
+from src.services.gmail_service import MAX_FETCH_ATTEMPTS, GmailService
+
+
+def _gmail_message(message_id: str) -> dict:
+    """Build a minimal Gmail API message resource."""
+    body = base64.urlsafe_b64encode(f"Body of {message_id}".encode()).decode()
+    return {
+        "id": message_id,
+        "threadId": f"thread-{message_id}",
+        "labelIds": ["INBOX", "UNREAD"],
+        "payload": {
+            "mimeType": "text/plain",
+            "headers": [
+                {"name": "From", "value": "Sender <sender@example.com>"},
+                {"name": "To", "value": "me@example.com"},
+                {"name": "Subject", "value": f"Subject {message_id}"},
+                {"name": "Date", "value": "Mon, 1 Jan 2024 12:00:00 +0000"},
+                {"name": "Message-ID", "value": f"<{message_id}@example.com>"},
+            ],
+            "body": {"data": body},
+        },
+    }
+
+
+def _batch_response(parts: list) -> tuple:
+    """Build a multipart/mixed batch response from (request_id, status, body) parts."""
+    boundary = "batch_boundary"
+    chunks = []
+    for request_id, status, body in parts:
+        payload = json.dumps(body)
+        chunks.append(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <response-base + {request_id}>\r\n\r\n"
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n"
+            f"{payload}\r\n"
+        )
+    content = "".join(chunks) + f"--{boundary}--\r\n"
+    headers = {"status": "200", "content-type": f"multipart/mixed; boundary={boundary}"}
+    return headers, content
+
+
+def _gmail_service(transport, sync_state_path=None, metadata_first=False) -> GmailService:
+    """Create a GmailService backed by a fake HTTP transport."""
+    if isinstance(transport, list):
+        transport = HttpMockSequence(transport)
+    settings = Settings(
+        google_api_key="test",
+        gmail_client_id="test",
+        gmail_client_secret="test",
+        smtp_username="test@example.com",
+        smtp_password="test",
+        gmail_sync_state_path=str(sync_state_path),
+        gmail_metadata_first=metadata_first,
+        email_parse_workers=0,
+    )
+    with patch.object(GmailService, "_initialize_service"):
+        service = GmailService(settings)
+    service.service = build("gmail", "v1", http=transport, static_discovery=True)
+    return service
+
+
+def test_fetch_emails_batched_collects_messages_in_order():
+    """Messages from one batch request are parsed in request order."""
+    listing = {"messages": [{"id": "m1"}, {"id": "m2"}, {"id": "m3"}]}
+    batch = _batch_response(
+        [(mid, 200, _gmail_message(mid)) for mid in ("m1", "m2", "m3")]
+    )
+    service = _gmail_service([({"status": "200"}, json.dumps(listing)), batch])
+
+    emails, failures = service.fetch_emails_batched(max_results=3)
+
+    assert [email.id for email in emails] == ["m1", "m2", "m3"]
+    assert emails[0].sender == "sender@example.com"
+    assert failures == {}
+
+
+def test_broken_parse_pool_falls_back_to_in_process_parsing():
+    """A killed worker does not fail the fetch; the pool is rebuilt next time."""
+    listing = {"messages": [{"id": "m1"}, {"id": "m2"}]}
+    batch = _batch_response([(mid, 200, _gmail_message(mid)) for mid in ("m1", "m2")])
+    service = _gmail_service([({"status": "200"}, json.dumps(listing)), batch])
+    service.settings.email_parse_workers = 2
+    broken = Mock()
+    broken.map.side_effect = BrokenProcessPool("worker killed")
+    service._parse_pool, service._parse_workers = broken, 2
+
+    emails, failures = service.fetch_emails_batched(max_results=2)
+
+    assert [email.id for email in emails] == ["m1", "m2"]
+    assert failures == {}
+    assert service._parse_pool is None
+    broken.shutdown.assert_called_once()
+
+
+def test_fetch_emails_batched_reports_per_message_failures():
+    """A failed get call is reported without dropping the rest of the batch."""
+    listing = {"messages": [{"id": "m1"}, {"id": "m2"}]}
+    batch = _batch_response(
+        [
+            ("m1", 200, _gmail_message("m1")),
+            ("m2", 404, {"error": {"code": 404, "message": "Not Found"}}),
+        ]
+    )
+    service = _gmail_service([({"status": "200"}, json.dumps(listing)), batch])
+
+    emails, failures = service.fetch_emails_batched(max_results=2)
+
+    assert [email.id for email in emails] == ["m1"]
+    assert list(failures) == ["m2"]
+
+
+def test_batch_get_messages_keeps_request_order():
+    """Parts answered out of order are returned in the order they were requested."""
+    ids = ["m1", "m2", "m3"]
+    batch = _batch_response([(mid, 200, {"id": mid}) for mid in reversed(ids)])
+    service = _gmail_service([batch])
+
+    messages, failures = service._batch_get_messages(ids)
+
+    assert [msg["id"] for msg in messages] == ids
+    assert failures == {}
+
+
+@pytest.mark.parametrize("count,expected_batches", [(100, 1), (101, 2), (250, 3)])
+def test_batch_get_messages_chunks_requests(count, expected_batches):
+    """Batches never carry more than 100 get calls."""
+    ids = [f"m{i}" for i in range(count)]
+    responses = []
+    for start in range(0, count, 100):
+        chunk = ids[start : start + 100]
+        responses.append(_batch_response([(mid, 200, {"id": mid}) for mid in chunk]))
+    transport = HttpMockSequence(list(responses))
+    service = _gmail_service(transport)
+
+    messages, failures = service._batch_get_messages(ids)
+
+    assert [msg["id"] for msg in messages] == ids
+    assert failures == {}
+    assert len(responses) == expected_batches
+    assert not transport._iterable
+
+
+def _ok(body: dict) -> tuple:
+    """Build a successful JSON response."""
+    return {"status": "200"}, json.dumps(body)
+
+
+def _history(*added: tuple, history_id: str = "200") -> dict:
+    """Build a history.list response from (message_id, label_ids) pairs."""
+    return {
+        "history": [
+            {"messagesAdded": [{"message": {"id": mid, "labelIds": labels}}]}
+            for mid, labels in added
+        ],
+        "historyId": history_id,
+    }
+
+
+def test_sync_without_checkpoint_runs_full_resync(tmp_path):
+    """The first sync lists is:unread and commits the profile's history ID."""
+    state = tmp_path / "sync.json"
+    service = _gmail_service(
+        [
+            _ok({"historyId": "100"}),
+            _ok({"messages": [{"id": "m1"}]}),
+            _batch_response([("m1", 200, _gmail_message("m1"))]),
+        ],
+        state,
+    )
+
+    emails, history_id = service.sync_emails()
+    service.commit_sync_state(history_id, [email.id for email in emails])
+
+    assert [email.id for email in emails] == ["m1"]
+    assert json.loads(state.read_text()) == {
+        "history_id": "100",
+        "pending_ids": [],
+        "attempts": {},
+    }
+
+
+def test_full_resync_lists_only_the_newest_unread(tmp_path):
+    """A resync stops listing at max_results instead of queueing the whole backlog."""
+    state = tmp_path / "sync.json"
+    transport = HttpMockSequence(
+        [
+            _ok({"historyId": "100"}),
+            _ok({"messages": [{"id": "m1"}], "nextPageToken": "p2"}),
+            _batch_response([("m1", 200, _gmail_message("m1"))]),
+        ]
+    )
+    service = _gmail_service(transport, state)
+
+    emails, history_id = service.sync_emails(max_results=1)
+    service.commit_sync_state(history_id, [email.id for email in emails])
+
+    assert [email.id for email in emails] == ["m1"]
+    assert json.loads(state.read_text())["pending_ids"] == []
+    assert not transport._iterable
+
+
+def test_sync_fetches_only_unread_messages_added_since_checkpoint(tmp_path):
+    """Incremental syncs fetch new unread messages and return the next checkpoint."""
+    state = tmp_path / "sync.json"
+    state.write_text(json.dumps({"history_id": "100", "pending_ids": []}))
+    service = _gmail_service(
+        [
+            _ok(_history(("m2", ["INBOX", "UNREAD"]), ("m3", ["INBOX"]))),
+            _batch_response([("m2", 200, _gmail_message("m2"))]),
+        ],
+        state,
+    )
+
+    emails, history_id = service.sync_emails()
+
+    assert [email.id for email in emails] == ["m2"]
+    assert history_id == "200"
+
+
+def test_sync_checkpoint_waits_for_commit(tmp_path):
+    """Fetched emails stay pending until the cycle commits them."""
+    state = tmp_path / "sync.json"
+    state.write_text(json.dumps({"history_id": "100", "pending_ids": []}))
+    service = _gmail_service(
+        [
+            _ok(_history(("m2", ["INBOX", "UNREAD"]))),
+            _batch_response([("m2", 200, _gmail_message("m2"))]),
+        ],
+        state,
+    )
+
+    emails, history_id = service.sync_emails()
+
+    assert json.loads(state.read_text())["history_id"] == "100"
+    assert json.loads(state.read_text())["pending_ids"] == ["m2"]
+
+    service.commit_sync_state(history_id, ["m2"])
+
+    assert json.loads(state.read_text()) == {
+        "history_id": "200",
+        "pending_ids": [],
+        "attempts": {},
+    }
+
+
+def test_sync_without_changes_is_a_single_call(tmp_path):
+    """A quiet mailbox costs one history.list call."""
+    state = tmp_path / "sync.json"
+    state.write_text(json.dumps({"history_id": "100", "pending_ids": []}))
+    transport = HttpMockSequence([_ok({"historyId": "100"})])
+    service = _gmail_service(transport, state)
+
+    assert service.sync_emails() == ([], "100")
+    assert not transport._iterable
+
+
+def test_sync_retries_failed_and_deferred_messages(tmp_path):
+    """Failed and over-limit messages are kept for the next sync, behind new mail."""
+    state = tmp_path / "sync.json"
+    state.write_text(json.dumps({"history_id": "100", "pending_ids": ["m1"]}))
+    service = _gmail_service(
+        [
+            _ok(_history(("m2", ["UNREAD"]), ("m3", ["UNREAD"]))),
+            _batch_response(
+                [
+                    ("m2", 500, {"error": {"code": 500, "message": "Backend Error"}}),
+                    ("m3", 200, _gmail_message("m3")),
+                ]
+            ),
+        ],
+        state,
+    )
+
+    emails, history_id = service.sync_emails(max_results=2)
+    service.commit_sync_state(history_id, [email.id for email in emails])
+
+    assert [email.id for email in emails] == ["m3"]
+    assert json.loads(state.read_text())["pending_ids"] == ["m2", "m1"]
+    assert json.loads(state.read_text())["attempts"] == {"m2": 1}
+
+
+def test_sync_drops_deleted_and_repeatedly_failing_messages(tmp_path):
+    """Messages that 404 or keep failing stop blocking the pending queue."""
+    state = tmp_path / "sync.json"
+    state.write_text(
+        json.dumps(
+            {
+                "history_id": "100",
+                "pending_ids": ["m1", "m2", "m3"],
+                "attempts": {"m2": MAX_FETCH_ATTEMPTS - 1},
+            }
+        )
+    )
+    error = {"error": {"code": 500, "message": "Backend Error"}}
+    service = _gmail_service(
+        [
+            _ok({"historyId": "100"}),
+            _batch_response(
+                [
+                    ("m1", 404, {"error": {"code": 404, "message": "Not Found"}}),
+                    ("m2", 500, error),
+                    ("m3", 500, error),
+                ]
+            ),
+        ],
+        state,
+    )
+
+    emails, _ = service.sync_emails()
+
+    assert emails == []
+    assert json.loads(state.read_text())["pending_ids"] == ["m3"]
+    assert json.loads(state.read_text())["attempts"] == {"m3": 1}
+
+
+def test_sync_falls_back_to_full_resync_when_checkpoint_expired(tmp_path):
+    """A 404 from history.list triggers a full resync."""
+    state = tmp_path / "sync.json"
+    state.write_text(json.dumps({"history_id": "1", "pending_ids": []}))
+    service = _gmail_service(
+        [
+            ({"status": "404"}, json.dumps({"error": {"code": 404, "message": "Not Found"}})),
+            _ok({"historyId": "300"}),
+            _ok({"messages": []}),
+        ],
+        state,
+    )
+
+    assert service.sync_emails() == ([], "300")
+
+
+def test_batch_modify_chunks_ids():
+    """batchModify calls carry at most 1000 IDs each."""
+    ids = [f"m{i}" for i in range(1500)]
+    transport = HttpMockSequence([({"status": "204"}, ""), ({"status": "204"}, "")])
+    service = _gmail_service(transport)
+
+    assert service.mark_as_read_batch(ids) == []
+    assert not transport._iterable
+
+
+def test_batch_modify_retries_failed_call_per_email():
+    """IDs of a failed batchModify are retried individually."""
+    error = json.dumps({"error": {"code": 500, "message": "Backend Error"}})
+    service = _gmail_service(
+        [
+            ({"status": "500"}, error),
+            _ok({"id": "m1"}),
+            ({"status": "404"}, json.dumps({"error": {"code": 404, "message": "Not Found"}})),
+        ]
+    )
+
+    assert service.add_label_batch(["m1", "m2"], "Label_1") == ["m2"]
+
+
+def _metadata_message(message_id: str, labels: list) -> dict:
+    """Build a Gmail message resource as returned with format="metadata"."""
+    message = _gmail_message(message_id)
+    del message["payload"]["body"]
+    message["labelIds"] = labels
+    return message
+
+
+def test_metadata_first_fetches_bodies_only_for_untriaged_mail():
+    """Promotions keep a deferred body; other mail is fetched in full."""
+    listing = {"messages": [{"id": "m1"}, {"id": "promo"}]}
+    transport = HttpMockSequence(
+        [
+            _ok(listing),
+            _batch_response(
+                [
+                    ("m1", 200, _metadata_message("m1", ["INBOX", "UNREAD"])),
+                    ("promo", 200, _metadata_message("promo", ["CATEGORY_PROMOTIONS"])),
+                ]
+            ),
+            _batch_response([("m1", 200, _gmail_message("m1"))]),
+            _ok(_gmail_message("promo")),
+        ]
+    )
+    service = _gmail_service(transport, metadata_first=True)
+
+    emails, failures = service.fetch_emails_batched(max_results=2)
+    by_id = {email.id: email for email in emails}
+
+    assert failures == {}
+    assert by_id["m1"].body_loaded and by_id["m1"].body == "Body of m1"
+    assert not by_id["promo"].body_loaded and by_id["promo"].subject == "Subject promo"
+    assert by_id["promo"].resolve_body() == "Body of promo"
+    assert not transport._iterable
@@ -0,0 +1,42 @@
+"""Tests for Gmail push subscribers."""
+
+import asyncio
+
+from src.services.push_subscriber import FileSubscriber, QueueSubscriber
+
+
+async def test_queue_subscriber_coalesces_pending_notifications():
+    """Notifications queued together are delivered in one receive."""
+    subscriber = QueueSubscriber()
+    subscriber.publish({"historyId": "1"})
+    subscriber.publish({"historyId": "2"})
+
+    assert await subscriber.receive(timeout=1) == [{"historyId": "1"}, {"historyId": "2"}]
+    assert await subscriber.receive(timeout=0.01) == []
+
+
+async def test_file_subscriber_delivers_only_new_lines(tmp_path):
+    """Lines written before startup are ignored; new ones are delivered once."""
+    path = tmp_path / "push.jsonl"
+    path.write_text('{"historyId": "old"}\n')
+    subscriber = FileSubscriber(path, poll_interval=0.01)
+
+    receiving = asyncio.create_task(subscriber.receive(timeout=1))
+    await asyncio.sleep(0.03)
+    subscriber.publish({"historyId": "new"})
+
+    assert await receiving == [{"historyId": "new"}]
+    assert await subscriber.receive(timeout=0.03) == []
+
+
+async def test_file_subscriber_waits_for_complete_lines(tmp_path):
+    """A partially written line is delivered once it is complete."""
+    path = tmp_path / "push.jsonl"
+    subscriber = FileSubscriber(path, poll_interval=0.01)
+
+    path.write_text('{"historyId": ')
+    assert await subscriber.receive(timeout=0.03) == []
+
+    with open(path, "a") as f:
+        f.write('"7"}\n')
+    assert await subscriber.receive(timeout=0.1) == [{"historyId": "7"}]
@@ -0,0 +1,490 @@
+"""Tests for RAG service."""
+
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import chromadb
+import numpy as np
+import pytest
+
+from config import Settings
+from src.models import Email
+from src.services.email_archive import EmailArchive
+from src.services.fingerprint_index import FingerprintIndex
+from src.services.rag_service import STAGING_SUFFIX, RAGService
+
+
+class FakeEncoder:
+    """Deterministic bag-of-words encoder that counts encode calls."""
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+        self.calls = 0
+        self.texts_encoded = 0
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        self.calls += 1
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        self.texts_encoded += len(texts)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, sum(map(ord, word)) % self.dim] += 1.0
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors[0] if single else vectors
+
+
+def _rag_service(
+    encoder=None, metric: str = "cosine", name: str = None, **settings
+) -> RAGService:
+    """Create a RAGService with an in-memory Chroma collection and fake encoder."""
+    service = RAGService.__new__(RAGService)
+    service.settings = SimpleNamespace(
+        embedding_batch_size=32,
+        embedding_cache_size=128,
+        vector_distance_metric=metric,
+        vector_retention_days=0,
+        vector_max_count=0,
+        retention_batch_size=500,
+    )
+    for key, value in settings.items():
+        setattr(service.settings, key, value)
+    service.embedding_model = encoder or FakeEncoder()
+    service._embedding_cache = OrderedDict()
+    service._embedding_cache_lock = threading.Lock()
+    service.client = chromadb.EphemeralClient()
+    service.collection = service._open_collection(name or f"test_{uuid.uuid4().hex}")
+    service.fingerprints = None
+    return service
+
+
+def _email(email_id: str, subject: str, body: str) -> Email:
+    """Create an email for testing."""
+    return Email(
+        id=email_id,
+        message_id=f"<{email_id}@example.com>",
+        sender="test@example.com",
+        subject=subject,
+        body=body,
+        date="2024-01-01T12:00:00Z",
+    )
+
+
+@pytest.fixture
+def emails():
+    """Two near-identical emails and one unrelated email."""
+    return [
+        _email("a", "Team offsite", "The offsite is on Friday at the lake house"),
+        _email("b", "Team offsite", "The offsite is on Friday at the lake house"),
+        _email("c", "Invoice 42", "Please find attached the invoice for March"),
+    ]
+
+
+def test_find_similar_and_upsert_encodes_once(emails):
+    """A batch is encoded in one call and embeddings are reused for the upsert."""
+    encoder = FakeEncoder()
+    service = _rag_service(encoder)
+
+    similar = service.find_similar_and_upsert(emails, threshold=0.9)
+
+    assert encoder.calls == 1
+    assert encoder.texts_encoded == 3
+    assert service.get_email_count() == 3
+    assert [eid for eid, _ in similar["a"]] == ["b"]
+    assert [eid for eid, _ in similar["b"]] == ["a"]
+    assert similar["c"] == []
+
+
+def test_find_similar_batch_matches_single_queries(emails):
+    """Batched queries return the same neighbours as per-email queries."""
+    service = _rag_service()
+    service.add_emails(emails)
+
+    batched = service.find_similar_batch(emails, threshold=0.5)
+
+    for email in emails:
+        single = service.find_similar_emails(email, threshold=0.5)
+        assert [eid for eid, _ in batched[email.id]] == [eid for eid, _ in single]
+        assert [score for _, score in batched[email.id]] == pytest.approx(
+            [score for _, score in single], abs=1e-5
+        )
+
+
+def test_repeat_encodes_are_served_from_cache(emails):
+    """Encoding the same email twice only reaches the model once."""
+    encoder = FakeEncoder()
+    service = _rag_service(encoder)
+
+    embedding = service.add_email(emails[0])
+    service.find_similar_emails(emails[0])
+
+    assert encoder.texts_encoded == 1
+    assert service.encode_emails([emails[0]]) == [embedding]
+    assert encoder.texts_encoded == 1
+
+
+def test_changed_content_is_re_encoded(emails):
+    """The cache key includes a content hash, not just the email ID."""
+    encoder = FakeEncoder()
+    service = _rag_service(encoder)
+
+    service.encode_emails([emails[0]])
+    service.encode_emails([emails[0].model_copy(update={"body": "Edited body", "text": "Edited body"})])
+
+    assert encoder.texts_encoded == 2
+
+
+def test_rerun_is_idempotent_and_skips_self_match(emails):
+    """Processing the same batch twice neither errors nor matches an email to itself."""
+    service = _rag_service()
+
+    first = service.find_similar_and_upsert(emails, threshold=0.9)
+    second = service.find_similar_and_upsert(emails, threshold=0.9)
+
+    assert service.get_email_count() == 3
+    assert first == second
+    assert all(email.id not in [eid for eid, _ in second[email.id]] for email in emails)
+
+
+def test_query_matches_emails_from_earlier_cycles(emails):
+    """Stored emails from earlier batches are found by the vector search."""
+    service = _rag_service()
+    service.find_similar_and_upsert(emails[:1])
+
+    similar = service.find_similar_and_upsert(emails[1:], threshold=0.9)
+
+    assert [eid for eid, _ in similar["b"]] == ["a"]
+    assert similar["c"] == []
+
+
+def test_detect_duplicates_is_order_independent(emails):
+    """Groups are the same whatever order the emails arrive in."""
+    service = _rag_service()
+    extra = _email("d", "Team offsite", "The offsite is on Friday at the lake house")
+    batch = emails + [extra]
+
+    forward = service.detect_duplicates(batch, threshold=0.9)
+    backward = service.detect_duplicates(list(reversed(batch)), threshold=0.9)
+
+    assert forward == backward
+    assert len(forward) == 1
+    assert forward[0].primary_email_id == "a"
+    assert forward[0].duplicate_ids == ["b", "d"]
+    assert forward[0].count == 3
+
+
+def test_detect_duplicates_blocks_match_full_matrix():
+    """Blocked pair search finds the same pairs as a single block."""
+    service = _rag_service()
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=(20, 16))
+    vectors = np.vstack([base, base + rng.normal(scale=0.01, size=base.shape)])
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def pairs(block_size):
+        found = set()
+        for rows, cols in service._similar_pairs(vectors, 0.95, block_size=block_size):
+            found.update(zip(rows.tolist(), cols.tolist()))
+        return found
+
+    assert pairs(7) == pairs(1024)
+    assert len(pairs(1024)) >= 20
+
+
+@pytest.mark.parametrize("metric", ["cosine", "ip", "l2"])
+def test_similarity_scores_are_cosine_for_every_metric(emails, metric):
+    """Scores from the store match the cosine similarity of the embeddings."""
+    service = _rag_service(metric=metric)
+    service.upsert_emails(emails[:1])
+    vectors = np.asarray(service.encode_emails([emails[0], emails[2]]))
+    expected = float(vectors[0] @ vectors[1])
+
+    similar = service.find_similar_emails(emails[2], threshold=-1.0)
+
+    assert similar[0][0] == "a"
+    assert similar[0][1] == pytest.approx(expected, abs=1e-5)
+
+
+def test_existing_l2_store_is_migrated(emails):
+    """A collection created with the default metric is rebuilt on open."""
+    client = chromadb.EphemeralClient()
+    name = f"test_{uuid.uuid4().hex}"
+    legacy = client.create_collection(name=name, metadata={"description": "legacy"})
+    legacy.add(
+        ids=["a", "c"],
+        embeddings=[[3.0] + [0.0] * 63, [0.0, 2.0] + [0.0] * 62],
+        metadatas=[{"email_id": "a"}, {"email_id": "c"}],
+    )
+
+    service = _rag_service(name=name)
+
+    assert service.collection.metadata["hnsw:space"] == "cosine"
+    assert service.get_email_count() == 2
+    stored = service.collection.get(ids=["a"], include=["embeddings"])["embeddings"][0]
+    assert np.linalg.norm(stored) == pytest.approx(1.0)
+
+
+def test_failed_migration_keeps_old_collection(monkeypatch):
+    """A copy that fails part-way leaves the original collection in place."""
+    service = _rag_service(metric="l2")
+    service.collection.add(ids=["a"], embeddings=[[3.0] + [0.0] * 63])
+    service.settings.vector_distance_metric = "cosine"
+    create = service.client.create_collection
+
+    def failing_add(**kwargs):
+        raise RuntimeError("disk full")
+
+    def failing_create(**kwargs):
+        collection = create(**kwargs)
+        monkeypatch.setattr(collection, "add", failing_add)
+        return collection
+
+    monkeypatch.setattr(service.client, "create_collection", failing_create)
+
+    with pytest.raises(RuntimeError):
+        service.migrate_collection(service.collection)
+
+    names = [c if isinstance(c, str) else c.name for c in service.client.list_collections()]
+    assert service.collection.name in names
+    assert service.collection.name + STAGING_SUFFIX not in names
+    assert service.get_email_count() == 1
+
+
+def test_interrupted_swap_is_recovered_on_open():
+    """A crash between deleting the original and renaming the copy loses nothing."""
+    client = chromadb.EphemeralClient()
+    name = f"test_{uuid.uuid4().hex}"
+    staging = client.create_collection(
+        name=name + STAGING_SUFFIX, metadata={"hnsw:space": "cosine"}
+    )
+    staging.add(ids=["a", "c"], embeddings=[[1.0] + [0.0] * 63, [0.0, 1.0] + [0.0] * 62])
+
+    service = _rag_service(name=name)
+
+    assert service.get_email_count() == 2
+    assert service.collection.name == name
+    assert service._find_collection(name + STAGING_SUFFIX) is None
+
+
+def test_partial_staging_copy_is_discarded_on_open():
+    """A crash mid-copy keeps the original and drops the partial copy."""
+    client = chromadb.EphemeralClient()
+    name = f"test_{uuid.uuid4().hex}"
+    original = client.create_collection(name=name, metadata={"hnsw:space": "cosine"})
+    original.add(ids=["a", "c"], embeddings=[[1.0] + [0.0] * 63, [0.0, 1.0] + [0.0] * 62])
+    staging = client.create_collection(
+        name=name + STAGING_SUFFIX, metadata={"hnsw:space": "cosine"}
+    )
+    staging.add(ids=["a"], embeddings=[[1.0] + [0.0] * 63])
+
+    service = _rag_service(name=name)
+
+    assert service.get_email_count() == 2
+    assert service._find_collection(name + STAGING_SUFFIX) is None
+
+
+def test_embedding_model_loads_on_first_encode(monkeypatch, emails):
+    """The model is fetched from the shared registry only when first needed."""
+    loads = []
+
+    def fake_registry(model_name, **kwargs):
+        loads.append(model_name)
+        return FakeEncoder()
+
+    monkeypatch.setattr("src.services.rag_service.get_embedding_model", fake_registry)
+    service = _rag_service()
+    service.embedding_model = None
+    service.settings.embedding_model_name = "test-model"
+    service.settings.embedding_backend = "onnx"
+    service.settings.embedding_threads = 0
+
+    assert not service.model_loaded
+    service.encode_emails(emails)
+    service.encode_emails(emails[:1])
+
+    assert loads == ["test-model"]
+    assert service.model_loaded
+
+
+def test_persistent_store_survives_restart(tmp_path, emails):
+    """Vectors written by one service instance are loaded by the next."""
+    settings = Settings(
+        google_api_key="test",
+        gmail_client_id="test",
+        gmail_client_secret="test",
+        smtp_username="test@example.com",
+        smtp_password="test",
+        chroma_persist_directory=str(tmp_path / "chroma"),
+        fingerprint_index_path=str(tmp_path / "fingerprints.db"),
+    )
+    first = RAGService(settings)
+    first.embedding_model = FakeEncoder()
+    first.upsert_emails(emails)
+
+    encoder = FakeEncoder()
+    second = RAGService(settings)
+    second.embedding_model = encoder
+
+    assert second.get_email_count() == 3
+    assert encoder.calls == 0
+
+
+def test_rebuild_index_from_archive(tmp_path, emails):
+    """The index can be rebuilt in batches from the local archive."""
+    archive = EmailArchive(tmp_path / "archive.jsonl")
+    archive.append(emails)
+    archive.append(emails[:1])
+    encoder = FakeEncoder()
+    service = _rag_service(encoder)
+    service.upsert_emails([_email("stale", "Old", "Stale vector")])
+
+    indexed = service.rebuild_index(archive.iter_batches(batch_size=2))
+
+    assert indexed == 3
+    assert encoder.calls == 3
+    assert sorted(service.collection.get()["ids"]) == ["a", "b", "c"]
+
+
+def test_archive_compaction_keeps_latest_copies(tmp_path, emails):
+    """Compaction drops superseded copies and emails before the cutoff."""
+    archive = EmailArchive(tmp_path / "archive.jsonl")
+    old = emails[2].model_copy(update={"date": datetime(2020, 1, 1, tzinfo=timezone.utc)})
+    archive.append(emails[:2] + [old])
+    archive.append([emails[0].model_copy(update={"subject": "Edited"})])
+
+    result = archive.compact(cutoff=datetime(2023, 1, 1, tzinfo=timezone.utc))
+    archived = [email for batch in archive.iter_batches() for email in batch]
+
+    assert result == {"kept": 2, "dropped": 2}
+    assert [email.id for email in archived] == ["b", "a"]
+    assert archived[1].subject == "Edited"
+    assert len(archive.path.read_text().splitlines()) == 2
+
+
+def _dated_emails(ages_in_days):
+    """Create emails received the given number of days ago."""
+    now = datetime.now(timezone.utc)
+    return [
+        _email(f"old{age}", f"Subject {age}", f"Body {age}").model_copy(
+            update={"date": now - timedelta(days=age)}
+        )
+        for age in ages_in_days
+    ]
+
+
+def test_retention_evicts_emails_older_than_cutoff():
+    """Emails older than the retention window are evicted, newer ones kept."""
+    service = _rag_service(vector_retention_days=30)
+    service.upsert_emails(_dated_emails([1, 10, 45, 90]))
+
+    result = service.enforce_retention()
+
+    assert result["evicted"] == 2
+    assert result["bytes_reclaimed"] > 0
+    assert result["pending"] == 0
+    assert sorted(service.collection.get()["ids"]) == ["old1", "old10"]
+
+
+def test_retention_caps_count_incrementally():
+    """The oldest emails beyond the cap are evicted in bounded chunks."""
+    service = _rag_service(vector_max_count=2, retention_batch_size=1)
+    service.upsert_emails(_dated_emails([1, 2, 3, 4]))
+
+    first = service.enforce_retention()
+    second = service.enforce_retention()
+    third = service.enforce_retention()
+
+    assert (first["evicted"], first["pending"]) == (1, 1)
+    assert (second["evicted"], second["pending"]) == (1, 0)
+    assert third["evicted"] == 0
+    assert sorted(service.collection.get()["ids"]) == ["old1", "old2"]
+
+
+def test_retention_only_scans_dates_over_the_count_cap(monkeypatch):
+    """Age eviction uses the date_ts filter; a full scan happens only for the cap."""
+    service = _rag_service(vector_retention_days=30, vector_max_count=10)
+    service.upsert_emails(_dated_emails([1, 45, 90]))
+    monkeypatch.setattr(service, "_scan_dates", lambda: pytest.fail("unexpected scan"))
+
+    result = service.enforce_retention()
+
+    assert (result["evicted"], result["pending"]) == (2, 0)
+    assert service.enforce_retention()["evicted"] == 0
+
+
+def test_rebuild_does_not_restore_evicted_emails(tmp_path):
+    """Rebuilding from the archive applies the same retention policy."""
+    archive = EmailArchive(tmp_path / "archive.jsonl")
+    archive.append(_dated_emails([1, 2, 3, 45]))
+    service = _rag_service(vector_retention_days=30, vector_max_count=2)
+
+    indexed = service.rebuild_index(archive.iter_batches(batch_size=2))
+
+    assert indexed == 2
+    assert sorted(service.collection.get()["ids"]) == ["old1", "old2"]
+
+
+def test_rebuild_from_empty_archive_keeps_index(tmp_path, emails):
+    """An empty or missing archive never wipes the working index."""
+    service = _rag_service()
+    service.upsert_emails(emails)
+
+    indexed = service.rebuild_index(EmailArchive(tmp_path / "missing.jsonl").iter_batches())
+
+    assert indexed == 0
+    assert service.get_email_count() == 3
+    assert service._find_collection(service.collection.name + STAGING_SUFFIX) is None
+
+
+def test_retention_uses_email_dates_for_fingerprints(tmp_path):
+    """Selection is side-effect free; eviction drops fingerprints by email date."""
+    service = _rag_service(vector_retention_days=30)
+    service.fingerprints = FingerprintIndex(tmp_path / "fingerprints.db", min_length=1)
+    emails = _dated_emails([1, 45])
+    service.fingerprints.add(emails)
+    service.upsert_emails(emails[:1])
+
+    assert service.select_evictions(service.retention_cutoff()) == []
+    assert service.fingerprints.size() == 2
+
+    service.enforce_retention()
+
+    assert service.fingerprints.size() == 1
+
+
+def test_fingerprint_hits_skip_encoding(tmp_path):
+    """Byte-identical resends are answered by the fingerprint index."""
+    encoder = FakeEncoder()
+    service = _rag_service(encoder)
+    service.fingerprints = FingerprintIndex(tmp_path / "fingerprints.db")
+    body = "Please review the attached contract before our meeting on Friday afternoon. " * 2
+
+    service.find_similar_and_upsert([_email("original", "Contract", body)])
+    similar = service.find_similar_and_upsert(
+        [_email("resend", "Fwd: Contract", body), _email("other", "Lunch", "Lunch at noon?")]
+    )
+
+    assert similar["resend"] == [("original", 1.0)]
+    assert encoder.texts_encoded == 2
+    assert sorted(service.collection.get()["ids"]) == ["original", "other"]
+
+
+def test_same_thread_matches_are_not_duplicates():
+    """Replies quoting earlier thread messages are not reported as duplicates."""
+    service = _rag_service()
+    body = "Can we move the design review to Thursday afternoon?"
+    original = _email("orig", "Design review", body).model_copy(update={"thread_id": "t1"})
+    reply = _email("reply", "Re: Design review", "Sure. > " + body).model_copy(
+        update={"thread_id": "t1"}
+    )
+    resend = _email("resend", "Design review", body)
+
+    service.find_similar_and_upsert([original])
+    similar = service.find_similar_and_upsert([reply, resend], threshold=0.5)
+
+    assert "orig" not in [match[0] for match in similar["reply"]]
+    assert "orig" in [match[0] for match in similar["resend"]]
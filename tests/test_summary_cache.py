@@ -0,0 +1,73 @@
+"""Tests for the summary cache."""
+
+import time
+
+from src.services import summary_cache
+from src.services.summary_cache import SummaryCache
+
+
+def test_cache_round_trip(tmp_path):
+    """Stored values are returned and counted as hits."""
+    cache = SummaryCache(tmp_path / "cache.db")
+    key = SummaryCache.make_key("summary", "1", "Subject", "Body")
+
+    assert cache.get(key) is None
+    cache.set(key, {"summary": "hello"})
+
+    assert cache.get(key) == {"summary": "hello"}
+    assert cache.get_stats()["hits"] == 1
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_cache_key_depends_on_prompt_version():
+    """Changing the prompt version invalidates existing entries."""
+    assert SummaryCache.make_key("summary", "1", "S", "B") != SummaryCache.make_key(
+        "summary", "2", "S", "B"
+    )
+
+
+def test_cache_expires_entries(tmp_path):
+    """Entries older than the TTL are treated as misses."""
+    cache = SummaryCache(tmp_path / "cache.db", ttl_seconds=0)
+    cache.set("key", True)
+    time.sleep(0.01)
+
+    assert cache.get("key") is None
+    cache.set("other", True)
+    assert cache.size() == 1
+
+
+def test_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    """The cache never holds more than max_entries."""
+    monkeypatch.setattr(summary_cache, "ACCESS_REFRESH_SECONDS", 0)
+    cache = SummaryCache(tmp_path / "cache.db", max_entries=2)
+    cache.set("a", 1)
+    time.sleep(0.01)
+    cache.set("b", 2)
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.set("c", 3)
+
+    assert cache.size() == 2
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+
+def test_repeat_hits_do_not_write(tmp_path):
+    """Hits on a recently accessed entry are reads only."""
+    cache = SummaryCache(tmp_path / "cache.db")
+    cache.set("key", "value")
+    writes = cache._conn.total_changes
+
+    for _ in range(5):
+        assert cache.get("key") == "value"
+
+    assert cache._conn.total_changes == writes
+
+
+def test_cache_persists_across_instances(tmp_path):
+    """Entries survive reopening the database."""
+    SummaryCache(tmp_path / "cache.db").set("key", "value")
+
+    assert SummaryCache(tmp_path / "cache.db").get("key") == "value"